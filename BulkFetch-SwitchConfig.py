@@ -8,98 +8,279 @@
     Retrieved configurations are saved to individual files, named based on the switch IP and the current timestamp, in the
     ~/configs/switches/<SwitchIP>/ directory.
 
+    Switches can be fetched concurrently with -workers. Every host gets its own connect and command deadline, so an
+    unreachable switch only ties up one worker. Progress is reported in the order of the input file, and a summary of
+    successes, failures and per-host timings is printed at the end (and optionally written to a CSV file with -summary).
+
+    The transport that worked for each switch is remembered in ~/configs/transport_cache.json. Switches known to be
+    Telnet-only skip the SSH attempt until SSH is due to be re-probed (every 7 days by default, see -reprobe_days).
+
+    With -storage cas, configs go to the content-addressed store in config_store.py instead: a config is hashed with
+    volatile lines ignored, and a new blob plus an index.tsv entry are written only when it actually changed.
+
+    -commands runs several commands over one login per switch (see switch_session.py). The running-config goes to the
+    config storage above; every other command's output is saved to ~/configs/<command>/<SwitchIP>/. The output of
+    "show cdp neighbors detail" is also parsed (cdp_parser.py) into a CSV file next to the raw text, and with -cdp_db
+    added to the fleet-wide neighbor database in cdp_store.py.
+
+    Every finished host is recorded in a run journal (~/configs/bulkfetch_journal.tsv, see run_journal.py). If a run
+    is interrupted, -resume skips the hosts that already succeeded in it. -order stale fetches the switches whose last
+    successful backup in ~/configs/switches/<SwitchIP>/ is oldest first (never-fetched switches before all others),
+    and -time_budget stops starting new switches after the given number of minutes, so a limited window is spent on
+    the hosts that need it most.
+
 .NOTES
     File Name      : BulkFetch-SwitchConfig.py
     Author         : Dan Clancey
-    Prerequisite   : Python 3.x, paramiko, pytz, telnetlib
+    Prerequisite   : Python 3.9+, paramiko, telnetlib
     Date           : 29-Jun-2023
-    Version        : 1.0
+    Version        : 1.5
 
 .EXAMPLE
     python3 BulkFetch-SwitchConfig.py -file ~/allswitches.txt -username admin -password secret
 
     This will attempt to fetch configurations for all switches listed in the allswitches.txt file using the provided credentials and save them in the respective directories.
+
+.EXAMPLE
+    python3 BulkFetch-SwitchConfig.py -file ~/allswitches.txt -username admin -password secret -workers 32 -summary ~/fetch-summary.csv
+
+    Same as above, but fetches 32 switches at a time and writes the per-host results to fetch-summary.csv.
+
+.EXAMPLE
+    python3 BulkFetch-SwitchConfig.py -file ~/allswitches.txt -username admin -password secret -commands "show run" "show version" "show cdp neighbors detail" "show interfaces status"
+
+    Full inventory sweep with one login per switch.
+
+.EXAMPLE
+    python3 BulkFetch-SwitchConfig.py -file ~/allswitches.txt -username admin -password secret -workers 16 -order stale -time_budget 45
+
+    Spends at most 45 minutes starting fetches, stalest backups first. If it is interrupted, the same command with -resume picks up where it stopped.
 """
 
-import paramiko
 import argparse
+import csv
 import os
-import paramiko
-import telnetlib
-from datetime import datetime
-from pytz import timezone
-import pytz
-
-def ssh_and_save_config(ip, username, password):
-    """SSH into the switch and save the config."""
-    try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(ip, username=username, password=password)
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-        # Assuming the switch is a Cisco device running IOS
-        stdin, stdout, stderr = ssh.exec_command('show run')
-        config_data = stdout.read().decode('utf-8')
-        ssh.close()
+from cdp_parser import iter_cdp_neighbors
+from cdp_store import CdpStore
+from config_store import ConfigStore
+from run_journal import DEFAULT_JOURNAL_PATH, RunJournal
+from switch_session import DEFAULT_COMMAND_TIMEOUT, DEFAULT_CONNECT_TIMEOUT, DEFAULT_SSH_PORT, DEFAULT_TELNET_PORT, collect
+from time_utils import format_now
+from transport_cache import DEFAULT_CACHE_PATH, DEFAULT_REPROBE_DAYS, TransportCache
 
-    except paramiko.ssh_exception.AuthenticationException:
-        raise
+CDP_FIELDNAMES = ['device_id', 'ip_address', 'platform', 'capabilities', 'interface', 'management_address']
+
+def current_timestamp():
+    """Timestamp used in saved file names, in US/Eastern time."""
+    return format_now('%Y%m%d-%I%M%p')
 
-    except Exception as e:
-        # If SSH fails, try Telnet
-        print(f"SSH failed for {ip}. Trying Telnet...")
-        try:
-            tn = telnetlib.Telnet(ip)
-            tn.read_until(b"Username: ")
-            tn.write(username.encode('ascii') + b"\n")
-            tn.read_until(b"Password: ")
-            tn.write(password.encode('ascii') + b"\n")
-
-            # Depending on your device, the next prompts might differ. Adjust as needed.
-            tn.write(b"terminal length 0\n")  # Set terminal length to 0 for no pagination
-            tn.write(b"show run\n")
-            tn.write(b"exit\n")
-            config_data = tn.read_all().decode('utf-8')
-        except Exception as te:
-            raise Exception(f"Telnet also failed for {ip} with error: {te}")
+
+def save_config(ip, config_data, store=None):
+    """Save a config, either to a new timestamped file or, given a ConfigStore, only if it changed."""
+    if store:
+        store.save(ip, config_data)
+        return
 
     # Check and create the directory for specific Switch IP if it doesn't exist
     directory = os.path.expanduser(f'~/configs/switches/{ip}')
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    os.makedirs(directory, exist_ok=True)
 
     # Save to file
-    eastern = timezone('US/Eastern')
-    current_time = datetime.now(eastern).strftime('%Y%m%d-%I%M%p')
-    filepath = os.path.join(directory, f"{ip}-{current_time}.txt")
+    filepath = os.path.join(directory, f"{ip}-{current_timestamp()}.txt")
     with open(filepath, 'w') as file:
         file.write(config_data)
 
+
+def save_running_config(ip, command, output, store=None, cdp_store=None):
+    save_config(ip, output, store)
+
+
+def save_command_output(ip, command, output, store=None, cdp_store=None):
+    """Save the output of any other command to ~/configs/<command>/<SwitchIP>/<SwitchIP>-<timestamp>.txt."""
+    slug = re.sub(r'\W+', '_', command.strip()).strip('_')
+    directory = os.path.expanduser(f'~/configs/{slug}/{ip}')
+    os.makedirs(directory, exist_ok=True)
+    filepath = os.path.join(directory, f"{ip}-{current_timestamp()}.txt")
+    with open(filepath, 'w') as file:
+        file.write(output)
+    return filepath
+
+
+def save_cdp_neighbors(ip, command, output, store=None, cdp_store=None):
+    """Save the raw CDP output like any other command, plus the parsed neighbors in a CSV file next to it.
+
+    Given a CdpStore, the neighbors are also added to the fleet-wide neighbor database.
+    """
+    filepath = save_command_output(ip, command, output, store)
+    neighbors = list(iter_cdp_neighbors(output.splitlines()))
+    with open(os.path.splitext(filepath)[0] + '.csv', 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CDP_FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(neighbors)
+    if cdp_store:
+        cdp_store.ingest(ip, neighbors)
+
+
+# Where each command's output goes; anything not listed is saved by save_command_output
+COMMAND_HANDLERS = {
+    'show run': save_running_config,
+    'show running-config': save_running_config,
+    'show cdp neighbors detail': save_cdp_neighbors,
+}
+
+
+def ssh_and_save_config(ip, username, password, connect_timeout=DEFAULT_CONNECT_TIMEOUT, command_timeout=DEFAULT_COMMAND_TIMEOUT,
+                        transport_cache=None, store=None, commands=('show run',), cdp_store=None, ssh_port=DEFAULT_SSH_PORT,
+                        telnet_port=DEFAULT_TELNET_PORT):
+    """SSH into the switch (Telnet as a fallback), run the commands over one login and save each output.
+
+    Returns the transport that worked.
+    """
+    transport, outputs = collect(ip, username, password, list(commands), connect_timeout, command_timeout, transport_cache,
+                                 ssh_port, telnet_port)
+    for command, output in zip(commands, outputs):
+        COMMAND_HANDLERS.get(command, save_command_output)(ip, command, output, store, cdp_store)
+    return transport
+
+
+def fetch_host(ip, args, transport_cache=None, store=None, cdp_store=None, journal=None, deadline=None):
+    """Fetch a single switch and return (ip, transport, error, seconds) instead of raising.
+
+    A host that has not started by the deadline is skipped and returned as (ip, None, None, 0.0). Finished hosts
+    are recorded in the run journal as soon as they are done.
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        return ip, None, None, 0.0
+    start = time.monotonic()
+    try:
+        transport = ssh_and_save_config(ip, args.username, args.password, args.connect_timeout, args.command_timeout,
+                                        transport_cache, store, args.commands, cdp_store, args.ssh_port, args.telnet_port)
+        result = ip, transport, None, time.monotonic() - start
+    except Exception as e:
+        result = ip, None, e, time.monotonic() - start
+    if journal:
+        journal.record(ip, 'failed' if result[2] else 'ok', result[1], result[3])
+    return result
+
+
+def order_by_staleness(ips, store):
+    """Order hosts by their last successful backup, never-fetched hosts first, then oldest first."""
+    last_backups = {ip: store.last_backup(ip) for ip in ips}
+    return sorted(ips, key=lambda ip: (last_backups[ip] is not None, last_backups[ip] or 0))
+
+
+def write_summary(path, results):
+    """Write per-host results to a CSV file."""
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['ip', 'status', 'transport', 'seconds', 'error'])
+        for ip, transport, error, seconds in results:
+            status = 'failed' if error else 'ok' if transport else 'skipped'
+            writer.writerow([ip, status, transport or '', f"{seconds:.2f}", error or ''])
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch Cisco Switch Configurations")
     parser.add_argument("-file", type=str, required=True, help="File containing switch IP addresses")
     parser.add_argument("-username", type=str, required=True, help="SSH username")
     parser.add_argument("-password", type=str, required=True, help="SSH password")
-    
+    parser.add_argument("-workers", type=int, default=1, help="Number of switches to fetch at the same time (default: 1)")
+    parser.add_argument("-connect_timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help=f"Seconds allowed to connect and log in to a switch (default: {DEFAULT_CONNECT_TIMEOUT})")
+    parser.add_argument("-command_timeout", type=float, default=DEFAULT_COMMAND_TIMEOUT,
+                        help=f"Seconds allowed for each command once logged in (default: {DEFAULT_COMMAND_TIMEOUT})")
+    parser.add_argument("-ssh_port", type=int, default=DEFAULT_SSH_PORT, help=f"SSH port (default: {DEFAULT_SSH_PORT})")
+    parser.add_argument("-telnet_port", type=int, default=DEFAULT_TELNET_PORT, help=f"Telnet port (default: {DEFAULT_TELNET_PORT})")
+    parser.add_argument("-summary", type=str, help="Optional CSV file to write per-host results to")
+    parser.add_argument("-transport_cache", type=str, default=DEFAULT_CACHE_PATH,
+                        help=f"File remembering which transport works for each switch (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("-reprobe_days", type=float, default=DEFAULT_REPROBE_DAYS,
+                        help=f"Days before SSH is tried again on a Telnet-only switch (default: {DEFAULT_REPROBE_DAYS})")
+    parser.add_argument("-no_transport_cache", action="store_true", help="Always try SSH first and do not update the cache")
+    parser.add_argument("-storage", choices=["files", "cas"], default="files",
+                        help="files: a new <ip>-<timestamp>.txt per run (default); cas: content-addressed, only written on change")
+    parser.add_argument("-commands", nargs="+", default=["show run"],
+                        help="Commands to run over a single login to each switch (default: 'show run'). "
+                             "Running-config output goes to the config storage, anything else to ~/configs/<command>/<ip>/")
+    parser.add_argument("-cdp_db", type=str,
+                        help="Also add parsed 'show cdp neighbors detail' output to this CDP neighbor database (see cdp_store.py)")
+    parser.add_argument("-journal", type=str, default=DEFAULT_JOURNAL_PATH,
+                        help=f"Run journal recording each finished host (default: {DEFAULT_JOURNAL_PATH})")
+    parser.add_argument("-resume", action="store_true",
+                        help="Skip hosts that already succeeded in the journal's run of the same -file and -commands")
+    parser.add_argument("-order", choices=["file", "stale"], default="file",
+                        help="file: input file order (default); stale: hosts with the oldest last successful backup first")
+    parser.add_argument("-time_budget", type=float,
+                        help="Minutes to keep starting new hosts; the rest are skipped and left for -resume")
+
     args = parser.parse_args()
-    
+    if args.workers < 1:
+        parser.error("-workers must be at least 1")
+
     # Ensure the config directory exists
     directory = os.path.expanduser('~/configs/switches')
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    os.makedirs(directory, exist_ok=True)
 
-    # Read IPs and fetch config
+    # Read IPs
     with open(args.file, 'r') as f:
-        for line in f:
-            ip = line.strip()
-            if ip:
-                try:
-                    ssh_and_save_config(ip, args.username, args.password)
-                    print(f"Saved config for {ip}")
-                except Exception as e:
-                    print(f"Error fetching config for {ip}: {e}")
+        ips = [line.strip() for line in f if line.strip()]
+
+    transport_cache = None if args.no_transport_cache else TransportCache(args.transport_cache, args.reprobe_days)
+    store = ConfigStore(directory) if args.storage == 'cas' else None
+    cdp_store = CdpStore(args.cdp_db) if args.cdp_db else None
+
+    # A run is identified by its input file and commands, so -resume never mixes up two different sweeps
+    journal = RunJournal(args.journal)
+    run_id = f"{os.path.abspath(args.file)} {'; '.join(args.commands)}"
+    if args.resume:
+        done = journal.completed(run_id)
+        if done:
+            print(f"Resuming: {len(done)} switches already fetched in this run are skipped")
+        ips = [ip for ip in ips if ip not in done]
+    journal.start(run_id, resume=args.resume)
+
+    if args.order == 'stale':
+        # Both storage layouts live under the same directory, so the store can date either one
+        ips = order_by_staleness(ips, store or ConfigStore(directory))
+
+    # Fetch configs, reporting progress in the order they were scheduled
+    results = []
+    start = time.monotonic()
+    deadline = start + args.time_budget * 60 if args.time_budget else None
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            fetches = executor.map(lambda ip: fetch_host(ip, args, transport_cache, store, cdp_store, journal, deadline), ips)
+            for count, result in enumerate(fetches, 1):
+                ip, transport, error, seconds = result
+                results.append(result)
+                if error:
+                    print(f"[{count}/{len(ips)}] Error fetching config for {ip}: {error} ({seconds:.1f}s)")
+                elif transport:
+                    print(f"[{count}/{len(ips)}] Saved config for {ip} via {transport} ({seconds:.1f}s)")
+    finally:
+        if transport_cache:
+            transport_cache.save()
+    elapsed = time.monotonic() - start
+
+    failures = [result for result in results if result[2]]
+    skipped = [result for result in results if not result[1] and not result[2]]
+    print(f"\nFetched {len(results) - len(failures) - len(skipped)} of {len(results)} switches in {elapsed:.1f}s "
+          f"with {args.workers} worker(s); {len(failures)} failed")
+    if skipped:
+        print(f"  {len(skipped)} switches were not started within the time budget; run again with -resume to fetch them")
+    for ip, transport, error, seconds in failures:
+        print(f"  FAILED {ip} after {seconds:.1f}s: {error}")
+    slowest = sorted((result for result in results if result[1]), key=lambda result: result[3], reverse=True)[:5]
+    for ip, transport, error, seconds in slowest:
+        print(f"  slow   {ip} {seconds:.1f}s via {transport}")
+
+    if args.summary:
+        write_summary(args.summary, results)
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,185 @@
+"""
+---------------------------------------------------------------
+Script Name: CDP Parser Benchmark
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Generates a synthetic "show cdp neighbors detail" dump and compares the streaming parser in cdp_parser.py with
+    the original parse_cdp_neighbors() that used to live in parse_cdp_neighbors.py / parse_cdp_neighbors_telnet.py.
+
+    For each parser it reports the best time over several runs, neighbors per second and peak memory (tracemalloc).
+    The streaming parser is measured twice: on an in-memory string, and reading straight from the dump file.
+    It then checks that both parsers return the same device_id, ip_address, platform, capabilities and interface
+    for every neighbor. The old parser never filled in management_address (it skipped the indented address line),
+    so that field is only counted, not compared.
+
+Usage:
+    python benchmark_cdp_parser.py [-n NEIGHBORS] [-r REPEAT] [-o DUMP_FILE]
+
+Examples:
+    python benchmark_cdp_parser.py -n 20000
+
+Requirements:
+    - Python 3.x
+    - cdp_parser.py
+---------------------------------------------------------------
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+
+from cdp_parser import iter_cdp_neighbors, parse_cdp_neighbors
+
+COMPARED_FIELDS = ['device_id', 'ip_address', 'platform', 'capabilities', 'interface']
+
+
+def legacy_parse_cdp_neighbors(data):
+    """The original parser, kept verbatim for comparison."""
+    neighbors = []
+
+    device_id_pattern = re.compile(r'Device ID:(.+)')
+    ip_address_pattern = re.compile(r'IPv4 Address: (.+)|IP address: (.+)')
+    platform_pattern = re.compile(r'Platform: (.+),\s*Capabilities: (.+)')
+    interface_pattern = re.compile(r'Interface: (.+),\s*Port ID \(outgoing port\): (.+)|Interface: (.+),\s*Port ID \(outgoing port\): (.+)')
+    management_address_pattern = re.compile(r'Management address\(es\):')
+
+    lines = data.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        i += 1
+
+        if device_id_pattern.match(line):
+            neighbor = {}
+            neighbor['device_id'] = device_id_pattern.match(line).group(1).strip()
+
+            while i < len(lines):
+                line = lines[i].strip()
+                i += 1
+
+                if ip_address_pattern.match(line):
+                    match = ip_address_pattern.match(line)
+                    neighbor['ip_address'] = match.group(1).strip() if match.group(1) else match.group(2).strip()
+                elif platform_pattern.match(line):
+                    neighbor['platform'], neighbor['capabilities'] = platform_pattern.match(line).group(1, 2)
+                elif interface_pattern.match(line):
+                    match = interface_pattern.match(line)
+                    neighbor['interface'] = match.group(1).strip() if match.group(1) else match.group(3).strip()
+                elif management_address_pattern.match(line):
+                    while i < len(lines) and not re.match(r'\S', lines[i]):
+                        i += 1
+                    line = lines[i].strip()
+                    ip_address = re.match(r'IP address: (.+)|IPv4 Address: (.+)', line)
+                    if ip_address:
+                        neighbor['management_address'] = ip_address.group(1).strip() if ip_address.group(1) else ip_address.group(2).strip()
+                elif '---' in line:
+                    neighbors.append(neighbor)
+                    break
+            else:
+                neighbors.append(neighbor)  # Append the last neighbor when the loop finishes
+
+    return neighbors
+
+
+def generate_dump(count, seed=1):
+    """Return a synthetic "show cdp neighbors detail" output with count neighbors."""
+    rng = random.Random(seed)
+    platforms = ['cisco WS-C2960X-48FPD-L', 'cisco WS-C3850-48P', 'cisco C9300-48P', 'Cisco IP Phone 8845', 'cisco AIR-AP2802I-B-K9']
+    capabilities = ['Switch IGMP', 'Router Switch IGMP', 'Host Phone Two-port Mac Relay', 'Trans-Bridge Source-Route-Bridge IGMP']
+    records = []
+    for index in range(count):
+        address = f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+        label = rng.choice(['IP address', 'IPv4 Address'])
+        record = [
+            '-------------------------',
+            f"Device ID: device-{index:06d}.example.com",
+            'Entry address(es): ',
+            f"  {label}: {address}",
+            f"Platform: {rng.choice(platforms)},  Capabilities: {rng.choice(capabilities)} ",
+            f"Interface: GigabitEthernet{rng.randint(1, 4)}/0/{rng.randint(1, 48)},  Port ID (outgoing port): GigabitEthernet0/{rng.randint(1, 4)}",
+            f"Holdtime : {rng.randint(120, 180)} sec",
+            '',
+            'Version :',
+            'Cisco IOS Software, C2960X Software (C2960X-UNIVERSALK9-M), Version 15.2(7)E4, RELEASE SOFTWARE (fc2)',
+            'Technical Support: http://www.cisco.com/techsupport',
+            'Copyright (c) 1986-2021 by Cisco Systems, Inc.',
+            'Compiled Sat 20-Feb-21 03:14 by mcpre',
+            '',
+            'advertisement version: 2',
+            'Protocol Hello:  OUI=0x00000C, Protocol ID=0x0112; payload len=27, value=00000000FFFFFFFF010221FF0000',
+            "VTP Management Domain: ''",
+            'Native VLAN: 1',
+            'Duplex: full',
+        ]
+        if rng.random() < 0.8:
+            record += ['Management address(es): ', f"  {label}: {address}"]
+        record.append('')
+        records.append('\n'.join(record))
+    return '\n'.join(records) + f"\n\nTotal cdp entries displayed : {count}\n"
+
+
+def measure(function, repeat):
+    """Return (best seconds, peak bytes, result) for function()."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def count_from_file(path):
+    """Stream the dump from disk, keeping only a running count."""
+    with open(path, 'r') as file:
+        return sum(1 for _ in iter_cdp_neighbors(file))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CDP neighbor parsers on a synthetic dump.')
+    parser.add_argument('-n', '--neighbors', type=int, default=10000, help='Number of neighbors in the dump (default: 10000)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per parser; the best is reported (default: 3)')
+    parser.add_argument('-o', '--output', help='Keep the generated dump in this file')
+    args = parser.parse_args()
+
+    data = generate_dump(args.neighbors)
+    path = args.output or os.path.join(tempfile.mkdtemp(), 'cdp_dump.txt')
+    with open(path, 'w') as file:
+        file.write(data)
+    print(f"Dump: {args.neighbors} neighbors, {len(data) / 1e6:.1f} MB ({path})\n")
+
+    legacy_time, legacy_peak, legacy = measure(lambda: legacy_parse_cdp_neighbors(data), args.repeat)
+    string_time, string_peak, streamed = measure(lambda: parse_cdp_neighbors(data), args.repeat)
+    file_time, file_peak, file_count = measure(lambda: count_from_file(path), args.repeat)
+
+    print(f"{'parser':<28} {'seconds':>8} {'neighbors/s':>12} {'peak MB':>8}")
+    for name, seconds, peak in [('legacy (string)', legacy_time, legacy_peak),
+                                ('streaming (string)', string_time, string_peak),
+                                ('streaming (file, count only)', file_time, file_peak)]:
+        print(f"{name:<28} {seconds:>8.3f} {args.neighbors / seconds:>12,.0f} {peak / 1e6:>8.1f}")
+    print(f"\nSpeed-up on a string: {legacy_time / string_time:.1f}x")
+
+    mismatches = sum(1 for old, new in zip(legacy, streamed)
+                     if any(old.get(field) != new.get(field) for field in COMPARED_FIELDS))
+    mismatches += abs(len(legacy) - len(streamed)) + abs(file_count - len(streamed))
+    management = sum(1 for neighbor in streamed if 'management_address' in neighbor)
+    print(f"Neighbors: legacy {len(legacy)}, streaming {len(streamed)}, mismatched records {mismatches}")
+    print(f"management_address found: legacy {sum(1 for n in legacy if 'management_address' in n)}, streaming {management}")
+
+    if not args.output:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+---------------------------------------------------------------
+Script Name: Snapshot Scripts Benchmark
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Runs create_snapshot.py and delete_snapshot.py against a local fake OpenSearch cluster (fake_opensearch.py)
+    filled with thousands of synthetic indices and snapshots, and reports for each scenario the number of requests
+    the script made, its wall time and its peak memory (max RSS of the script process).
+
+    Every scenario gets a freshly generated cluster, so the scenarios do not affect each other. The scripts are run
+    as they are in production, as separate processes, with OPENSEARCH_NODES pointing at the fake server and
+    GRAYLOG_LOG_DIR (log file and ledger) pointing at a temporary directory. Failure emails go to a closed local
+    port and are dropped.
+
+    Scenarios:
+        create-dry-run      --policy over every family, --dry-run (listing and planning only)
+        create-policy       --policy over every family, snapshots submitted one after another
+        create-async        --policy with group_size, --async --max-in-flight 4
+        create-firewall     no policy: the original firewall-only run
+        delete-batched      delete_snapshot.py down to --threshold 170, 10 names per request, 2 workers
+        delete-single       the same, one name per request and one worker (how it used to delete)
+
+Usage:
+    python benchmark_snapshot_scripts.py [--indices COUNT] [--snapshots COUNT] [--latency MS] [--error-rate RATE]
+                                         [--delete-seconds SECONDS] [--single-delete] [--verbose] [SCENARIO ...]
+
+Examples:
+    python benchmark_snapshot_scripts.py
+    python benchmark_snapshot_scripts.py --indices 8000 --snapshots 5000 --latency 20 delete-batched delete-single
+
+Requirements:
+    - Python 3.9+ (Linux or macOS, for the per-process peak memory)
+    - fake_opensearch.py and the scripts' own requirements (requests)
+---------------------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_opensearch import DEFAULT_REPOSITORY, FakeCluster, FakeOpenSearch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+POLICY = [
+    {'pattern': 'firewall_*', 'keep': 9},
+    {'pattern': 'graylog_*', 'keep': 20, 'max_age_days': 90},
+    {'pattern': 'gl-events_*', 'keep': 4, 'snapshot': False, 'delete': True},
+    {'pattern': 'gl-system-events_*', 'max_age_days': 30, 'health': ['green', 'yellow']},
+]
+GROUPED_POLICY = [dict(rule, group_size=100) for rule in POLICY]
+
+# name: (script, arguments, policy file contents or None)
+SCENARIOS = {
+    'create-dry-run': ('create_snapshot.py', ['--dry-run'], POLICY),
+    'create-policy': ('create_snapshot.py', [], POLICY),
+    'create-async': ('create_snapshot.py', ['--async', '--max-in-flight', '4'], GROUPED_POLICY),
+    'create-firewall': ('create_snapshot.py', [], None),
+    'delete-batched': ('delete_snapshot.py', ['--threshold', '170'], None),
+    'delete-single': ('delete_snapshot.py', ['--threshold', '170', '--batch-size', '1', '--workers', '1'], None),
+}
+
+
+def closed_port():
+    """A local port nothing listens on, so failure emails are refused straight away."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_script(script, arguments, env, workdir):
+    """Run a script to completion. Returns (exit code, seconds, peak RSS in MB, stderr)."""
+    stderr_path = os.path.join(workdir, 'stderr.txt')
+    with open(stderr_path, 'w') as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, os.path.join(HERE, script)] + arguments, env=env, cwd=workdir,
+                                   stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 gives this child's own resource usage, not the running maximum over all children
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    with open(stderr_path, 'r') as stderr:
+        return process.returncode, seconds, peak, stderr.read()
+
+
+def run_scenario(name, args, workdir):
+    script, arguments, policy = SCENARIOS[name]
+    cluster = FakeCluster(args.indices, args.snapshots, snapshot_seconds=args.snapshot_seconds, seed=args.seed)
+    server = FakeOpenSearch(('127.0.0.1', 0), cluster, args.latency / 1000.0, error_rate=args.error_rate,
+                            delete_seconds=args.delete_seconds, single_delete=args.single_delete, seed=args.seed).start()
+    before = (len(cluster.indices), len(cluster.repositories[DEFAULT_REPOSITORY]))
+    try:
+        scenario_dir = os.path.join(workdir, name)
+        os.makedirs(scenario_dir)
+        if policy is not None:
+            policy_path = os.path.join(scenario_dir, 'policy.json')
+            with open(policy_path, 'w') as file:
+                json.dump(policy, file)
+            arguments = ['--policy', policy_path] + arguments
+        env = dict(os.environ, OPENSEARCH_NODES=server.url, OPENSEARCH_REPOSITORY=DEFAULT_REPOSITORY,
+                   GRAYLOG_LOG_DIR=scenario_dir, NOTIFY_SMTP_HOST='127.0.0.1', NOTIFY_SMTP_PORT=str(closed_port()),
+                   NOTIFY_SMTP_SSL='0')
+        code, seconds, peak, stderr = run_script(script, arguments, env, scenario_dir)
+    finally:
+        server.shutdown()
+        server.server_close()
+    after = (len(cluster.indices), len(cluster.repositories[DEFAULT_REPOSITORY]))
+    return {'name': name, 'code': code, 'seconds': seconds, 'peak': peak, 'stderr': stderr,
+            'stats': dict(server.stats), 'before': before, 'after': after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the snapshot scripts against a fake OpenSearch cluster.')
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--indices', type=int, default=3000, help='Synthetic indices (default: 3000)')
+    parser.add_argument('--snapshots', type=int, default=2000, help='Existing snapshots (default: 2000)')
+    parser.add_argument('--latency', type=float, default=2, help='Milliseconds added to every request (default: 2)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with a 503 (default: 0)')
+    parser.add_argument('--snapshot-seconds', type=float, default=0.01, help='Snapshot run time per index (default: 0.01)')
+    parser.add_argument('--delete-seconds', type=float, default=0.05, help='Time taken by each snapshot delete request (default: 0.05)')
+    parser.add_argument('--single-delete', action='store_true', help='Refuse multi-snapshot deletes, like older clusters')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic data')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show the requests per endpoint')
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name} (choose from {', '.join(SCENARIOS)})")
+
+    print(f"{args.indices} indices, {args.snapshots} snapshots, {args.latency:g} ms latency, "
+          f"{args.error_rate:g} error rate, {args.delete_seconds:g}s per snapshot delete")
+    print(f"{'scenario':<16} {'exit':>4} {'requests':>9} {'wall s':>8} {'peak MB':>8}  {'indices':>11}  {'snapshots':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.scenarios or SCENARIOS:
+            result = run_scenario(name, args, workdir)
+            requests = sum(count for key, count in result['stats'].items() if key != 'injected 503')
+            print(f"{name:<16} {result['code']:>4} {requests:>9} {result['seconds']:>8.2f} {result['peak']:>8.1f}  "
+                  f"{result['before'][0]:>5}>{result['after'][0]:<5}  {result['before'][1]:>5}>{result['after'][1]:<5}")
+            if args.verbose:
+                for key, count in sorted(result['stats'].items()):
+                    print(f"{'':<16} {count:>14}  {key}")
+            if result['code']:
+                print(result['stderr'].rstrip(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+---------------------------------------------------------------
+Script Name: Switch Collectors Benchmark
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Runs the switch collectors against a simulated fleet (fake_switch.py) on loopback addresses and reports, per
+    scenario, devices per second, per-device latency percentiles and the collector's peak memory (max RSS).
+
+    Every scenario gets a fresh fleet. The collectors run as they do in production, as separate processes, with
+    HOME pointing at a temporary directory (so ~/configs and the journal stay out of the way). A device counts as
+    done once one of its sessions finished a command without an injected failure; its latency is the time from its
+    first connection to the end of its last session, as seen by the simulator, so SSH-to-Telnet fallbacks and
+    retries are included.
+
+    Scenarios:
+        bulkfetch           BulkFetch-SwitchConfig.py, show run + show cdp neighbors detail, --workers at once
+        bulkfetch-telnet    the same with every switch Telnet-only (paged output, prompt detection)
+        crawl               parse_cdp_neighbors.py --crawl from the first switch through the whole CDP tree
+        cdp-ssh             parse_cdp_neighbors.py on one switch with --huge-neighbors CDP entries (streaming)
+        cdp-telnet          parse_cdp_neighbors_telnet.py on the same switch over Telnet
+
+Usage:
+    python benchmark_switch_collectors.py [--devices COUNT] [--workers COUNT] [--latency MS] [--failure-rate RATE]
+                                          [--config-lines COUNT] [--huge-neighbors COUNT] [SCENARIO ...]
+
+Examples:
+    python benchmark_switch_collectors.py
+    python benchmark_switch_collectors.py --devices 500 --workers 64 --latency 100 bulkfetch crawl
+    python benchmark_switch_collectors.py --config-lines 200000 --failure-rate 0.05 bulkfetch
+
+Requirements:
+    - Python 3.9+ on Linux (other loopback addresses than 127.0.0.1 need aliases elsewhere)
+    - fake_switch.py and the collectors' requirements (paramiko)
+---------------------------------------------------------------
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_switch import FakeSwitchServer, build_fleet
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+USERNAME = 'admin'
+PASSWORD = 'admin'
+
+
+def bulkfetch_command(args, devices, workdir):
+    list_path = os.path.join(workdir, 'switches.txt')
+    with open(list_path, 'w') as file:
+        file.write(''.join(f"{device.ip}\n" for device in devices))
+    return ['BulkFetch-SwitchConfig.py', '-file', list_path, '-username', USERNAME, '-password', PASSWORD,
+            '-workers', str(args.workers), '-commands', 'show run', 'show cdp neighbors detail',
+            '-ssh_port', str(args.ssh_port), '-telnet_port', str(args.telnet_port), '-no_transport_cache',
+            '-connect_timeout', str(args.connect_timeout), '-command_timeout', str(args.command_timeout),
+            '-summary', os.path.join(workdir, 'summary.csv')]
+
+
+def crawl_command(args, devices, workdir):
+    return ['parse_cdp_neighbors.py', '-u', USERNAME, '-p', PASSWORD, '-H', devices[0].ip, '--crawl',
+            '--depth', str(len(devices)), '--workers', str(args.workers), '-e', os.path.join(workdir, 'edges.csv'),
+            '--ssh_port', str(args.ssh_port), '--telnet_port', str(args.telnet_port)]
+
+
+def cdp_ssh_command(args, devices, workdir):
+    return ['parse_cdp_neighbors.py', '-u', USERNAME, '-p', PASSWORD, '-H', devices[0].ip,
+            '-t', os.path.join(workdir, 'cdp.txt'), '--ssh_port', str(args.ssh_port)]
+
+
+def cdp_telnet_command(args, devices, workdir):
+    return ['parse_cdp_neighbors_telnet.py', '-u', USERNAME, '-p', PASSWORD, '-H', devices[0].ip,
+            '-t', os.path.join(workdir, 'cdp.txt'), '--port', str(args.telnet_port)]
+
+
+# name: (command builder, fleet settings: devices (None for --devices), share of Telnet-only switches
+# (None for --telnet-only), CDP neighbors per switch (None for --neighbors, 'huge' for --huge-neighbors))
+SCENARIOS = {
+    'bulkfetch': (bulkfetch_command, None, None, None),
+    'bulkfetch-telnet': (bulkfetch_command, None, 1.0, None),
+    'crawl': (crawl_command, None, None, None),
+    'cdp-ssh': (cdp_ssh_command, 1, 0.0, 'huge'),
+    'cdp-telnet': (cdp_telnet_command, 1, 1.0, 'huge'),
+}
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_script(command, env, workdir):
+    """Run a collector to completion. Returns (exit code, seconds, peak RSS in MB, output)."""
+    output_path = os.path.join(workdir, 'output.txt')
+    with open(output_path, 'w') as output:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, os.path.join(HERE, command[0])] + command[1:], env=env,
+                                   cwd=workdir, stdout=output, stderr=subprocess.STDOUT)
+        # wait4 gives this child's own resource usage, not the running maximum over all children
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    with open(output_path, 'r') as output:
+        return process.returncode, seconds, peak, output.read()
+
+
+def run_scenario(name, args, workdir):
+    build_command, count, telnet_only, neighbors = SCENARIOS[name]
+    devices = build_fleet(count or args.devices, args.base_ip, args.fanout,
+                          args.telnet_only if telnet_only is None else telnet_only, args.config_lines,
+                          args.huge_neighbors if neighbors == 'huge' else args.neighbors, args.seed)
+    server = FakeSwitchServer(devices, args.ssh_port, args.telnet_port, USERNAME, PASSWORD, args.latency / 1000.0,
+                              args.rate, args.failure_rate, seed=args.seed).start()
+    try:
+        scenario_dir = os.path.join(workdir, name)
+        os.makedirs(scenario_dir)
+        env = dict(os.environ, HOME=scenario_dir, PYTHONWARNINGS='ignore::DeprecationWarning')
+        code, seconds, peak, output = run_script(build_command(args, devices, scenario_dir), env, scenario_dir)
+        # Sessions are recorded when the simulator sees them close
+        server.wait_idle()
+    finally:
+        server.shutdown()
+
+    with server.lock:
+        sessions = list(server.sessions)
+        stats = dict(server.stats)
+    spans = {}
+    done = set()
+    for ip, transport, start, end, completed in sessions:
+        first, last = spans.get(ip, (start, end))
+        spans[ip] = (min(first, start), max(last, end))
+        if completed:
+            done.add(ip)
+    latencies = sorted(end - start for ip, (start, end) in spans.items() if ip in done)
+    return {'name': name, 'code': code, 'seconds': seconds, 'peak': peak, 'output': output, 'stats': stats,
+            'devices': len(devices), 'done': len(done), 'latencies': latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the switch collectors against a simulated switch fleet.')
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--devices', type=int, default=100, help='Simulated switches (default: 100)')
+    parser.add_argument('--workers', type=int, default=16, help='Collector workers (default: 16)')
+    parser.add_argument('--base-ip', default='127.0.1.1', help='Address of the first switch (default: 127.0.1.1)')
+    parser.add_argument('--ssh-port', type=int, default=2222, help='SSH port (default: 2222)')
+    parser.add_argument('--telnet-port', type=int, default=2323, help='Telnet port (default: 2323)')
+    parser.add_argument('--config-lines', type=int, default=2000, help='Lines of running-config per switch (default: 2000)')
+    parser.add_argument('--neighbors', type=int, default=40, help='Phones and access points per switch (default: 40)')
+    parser.add_argument('--huge-neighbors', type=int, default=5000, help='CDP neighbors in the cdp-* scenarios (default: 5000)')
+    parser.add_argument('--fanout', type=int, default=4, help='Downstream switches per switch in the CDP tree (default: 4)')
+    parser.add_argument('--telnet-only', type=float, default=0.1, help='Share of Telnet-only switches (default: 0.1)')
+    parser.add_argument('--latency', type=float, default=20, help='Milliseconds before every prompt and output (default: 20)')
+    parser.add_argument('--rate', type=int, default=0, help='Bytes per second per session, 0 for unlimited (default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0, help='Share of connections that fail (default: 0)')
+    parser.add_argument('--connect-timeout', type=float, default=5, help='Collector connect/login timeout (default: 5)')
+    parser.add_argument('--command-timeout', type=float, default=60, help='Collector command timeout (default: 60)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the fleet and failures')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show the simulator counters and failed collector output')
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name} (choose from {', '.join(SCENARIOS)})")
+
+    print(f"{args.devices} switches, {args.workers} workers, {args.latency:g} ms latency, {args.failure_rate:g} failure rate, "
+          f"{args.config_lines} config lines, {args.huge_neighbors} CDP neighbors in cdp-*")
+    print(f"{'scenario':<17} {'exit':>4} {'done':>9} {'wall s':>8} {'dev/s':>7} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} "
+          f"{'max s':>7} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.scenarios or SCENARIOS:
+            result = run_scenario(name, args, workdir)
+            latencies = result['latencies']
+            print(f"{name:<17} {result['code']:>4} {result['done']:>4}/{result['devices']:<4} {result['seconds']:>8.2f} "
+                  f"{result['done'] / result['seconds']:>7.1f} {percentile(latencies, 50):>7.2f} "
+                  f"{percentile(latencies, 90):>7.2f} {percentile(latencies, 99):>7.2f} "
+                  f"{latencies[-1] if latencies else 0:>7.2f} {result['peak']:>8.1f}")
+            if args.verbose:
+                for key, count in sorted(result['stats'].items()):
+                    print(f"{'':<17} {count:>14}  {key}")
+            if result['code'] and args.verbose:
+                print(result['output'].rstrip()[-2000:], file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
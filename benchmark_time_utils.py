@@ -0,0 +1,121 @@
+"""
+---------------------------------------------------------------
+Script Name: Time Utilities Benchmark
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Compares the pytz timestamp chain the scripts used to repeat (fromtimestamp -> localize -> astimezone ->
+    strftime, with pytz.timezone('US/Eastern') resolved per call as create_snapshot.get_indices did) with
+    time_utils.format_epoch().
+
+    Startup: the best wall time over several fresh interpreters of a single epoch conversion, the way the cron
+    scripts and shell loops run it. Once with pytz imported, once through time_utils, and once for
+    "python convert_epoch.py EPOCH" itself.
+
+    Throughput: conversions per second for a list of index creation times, and a count of the strings that differ.
+    pytz is only needed for the comparison; the scripts no longer use it.
+
+    The old chain is reproduced as it was: fromtimestamp() gives the host's local time, which pytz then treated as
+    UTC before converting to US/Eastern. It only gave real US/Eastern on hosts running in UTC, so the mismatch count
+    is 0 there and, anywhere else, every result is off by the host's UTC offset (the bug time_utils fixes).
+
+Usage:
+    python benchmark_time_utils.py [-n EPOCHS] [-r REPEAT]
+
+Requirements:
+    - Python 3.9+
+    - pytz library (for the comparison only)
+---------------------------------------------------------------
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+from time_utils import format_bucket, format_epoch
+
+FORMAT = '%Y-%m-%d_%I%M%p'
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+LEGACY_STARTUP = '''
+import datetime, pytz
+creation_date = datetime.datetime.fromtimestamp(1686587400)
+creation_date = pytz.utc.localize(creation_date).astimezone(pytz.timezone('US/Eastern'))
+print(creation_date.strftime('%Y-%m-%d_%I%M%p'))
+'''
+NEW_STARTUP = '''
+from time_utils import format_epoch
+print(format_epoch(1686587400, '%Y-%m-%d_%I%M%p'))
+'''
+
+
+def legacy_format(seconds):
+    import datetime
+    import pytz
+    creation_date = datetime.datetime.fromtimestamp(seconds)
+    creation_date = pytz.utc.localize(creation_date).astimezone(pytz.timezone('US/Eastern'))
+    return creation_date.strftime(FORMAT)
+
+
+def best_startup(command, repeat):
+    """Best wall time of a fresh interpreter running command"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def best_run(function, values, repeat, reset=None):
+    best = None
+    for _ in range(repeat):
+        if reset:
+            reset()  # Every run starts with a cold cache
+        start = time.perf_counter()
+        result = [function(value) for value in values]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark time_utils against the old pytz formatting.')
+    parser.add_argument('-n', '--epochs', type=int, default=100000, help='Epochs to format (default: 100000)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Runs per measurement; the best is reported (default: 5)')
+    args = parser.parse_args()
+
+    print(f"{'startup (fresh interpreter)':<32} {'ms':>8}")
+    baseline = best_startup([sys.executable, '-c', 'pass'], args.repeat)
+    legacy = best_startup([sys.executable, '-c', LEGACY_STARTUP], args.repeat)
+    new = best_startup([sys.executable, '-c', NEW_STARTUP], args.repeat)
+    script = best_startup([sys.executable, 'convert_epoch.py', '1686587400000'], args.repeat)
+    for name, seconds in [('python -c pass', baseline), ('pytz chain', legacy), ('time_utils', new),
+                          ('convert_epoch.py EPOCH', script)]:
+        print(f"{name:<32} {seconds * 1000:>8.1f}")
+    print(f"Startup over bare interpreter: pytz {(legacy - baseline) * 1000:.1f} ms, "
+          f"time_utils {(new - baseline) * 1000:.1f} ms\n")
+
+    # Index creation times: a new index every few hours over a couple of years
+    rng = random.Random(1)
+    start = 1640000000
+    values = sorted(start + rng.randint(0, 2 * 365 * 86400) for _ in range(args.epochs))
+    legacy_time, legacy_result = best_run(legacy_format, values, args.repeat)
+    new_time, new_result = best_run(lambda value: format_epoch(value, FORMAT), values, args.repeat,
+                                   format_bucket.cache_clear)
+
+    print(f"{'formatting':<32} {'seconds':>8} {'per second':>12}")
+    for name, seconds in [('pytz chain', legacy_time), ('time_utils.format_epoch', new_time)]:
+        print(f"{name:<32} {seconds:>8.3f} {len(values) / seconds:>12,.0f}")
+    mismatches = sum(1 for old, new in zip(legacy_result, new_result) if old != new)
+    print(f"\nSpeed-up: {legacy_time / new_time:.1f}x, mismatched results: {mismatches} "
+          f"(host timezone {time.strftime('%Z')}; the old chain only matched on UTC hosts)")
+
+
+if __name__ == '__main__':
+    main()
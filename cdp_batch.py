@@ -0,0 +1,212 @@
+"""
+---------------------------------------------------------------
+Script Name: CDP Dump Batch Parser
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Re-parses saved "show cdp neighbors detail" dumps offline, without logging in to any device, and writes all
+    the neighbors found as one merged CSV (or JSON lines) dataset. The dumps are the raw text files written by
+    parse_cdp_neighbors.py / parse_cdp_neighbors_telnet.py (-t/--text_output) and by BulkFetch-SwitchConfig.py
+    (~/configs/show_cdp_neighbors_detail/<SwitchIP>/).
+
+    Directory trees are walked for matching files, and the files are parsed in a process pool (one process per
+    core by default) with the streaming parser in cdp_parser.py. The results are cached in
+    ~/configs/cdp_parse_cache.json: a file whose size and modification time are unchanged is not read again, and
+    the parsed neighbors are stored once per content hash, so copies of the same dump share one entry and a
+    touched or re-copied dump with known content is only hashed, not parsed again. The cache
+    is tied to the parser: when cdp_parser.py changes, every dump is parsed again.
+
+    Each output row is one neighbor plus the dump it came from: source, host (the switch directory for
+    BulkFetch-SwitchConfig.py dumps, otherwise the file name) and collected_at (the file's modification time).
+    With --db, every dump that has not been added to that CDP neighbor database (cdp_store.py) yet, or has been
+    rewritten since, is added to it. The cache remembers per database which version of each dump went in, so
+    running once without --db and then with it still fills the database, and nothing is added twice.
+
+Usage:
+    python cdp_batch.py PATH [PATH ...] [--pattern GLOB] [--output FILE] [--workers N] [--db DB_FILE]
+
+Examples:
+    python cdp_batch.py ~/configs/show_cdp_neighbors_detail --output ~/cdp_all.csv
+    python cdp_batch.py /srv/cdp-dumps --pattern "*.log" --output cdp_all.jsonl --db ~/configs/cdp_neighbors.db
+
+Requirements:
+    - Python 3.x
+    - cdp_parser.py (and cdp_store.py for --db)
+---------------------------------------------------------------
+"""
+
+import argparse
+import csv
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cdp_parser
+from cdp_parser import iter_cdp_neighbors
+
+DEFAULT_CACHE_PATH = '~/configs/cdp_parse_cache.json'
+FIELDS = ['device_id', 'ip_address', 'management_address', 'platform', 'capabilities', 'interface', 'port_id']
+OUTPUT_FIELDS = ['source', 'host', 'collected_at'] + FIELDS
+
+
+def parser_fingerprint():
+    """Hash of the parser source, so cached results are dropped when the parser changes."""
+    with open(cdp_parser.__file__, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()[:16]
+
+
+def find_dumps(paths, pattern):
+    """Yield every file under the given files/directories whose name matches pattern."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield os.path.abspath(path)
+            continue
+        for directory, _, names in os.walk(path):
+            for name in sorted(names):
+                if fnmatch.fnmatch(name, pattern):
+                    yield os.path.abspath(os.path.join(directory, name))
+
+
+def dump_host(path):
+    """The switch a dump belongs to: its directory for <ip>/<ip>-<timestamp>.txt files, otherwise its name."""
+    directory = os.path.basename(os.path.dirname(path))
+    name = os.path.basename(path)
+    if name.startswith(directory + '-'):
+        return directory
+    return os.path.splitext(name)[0]
+
+
+def hash_dump(path):
+    """Worker: hash one dump. Returns (path, sha256)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return path, digest.hexdigest()
+
+
+def parse_dump(path):
+    """Worker: read, hash and parse one dump. Returns (path, sha256, neighbors)."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    return path, digest, list(iter_cdp_neighbors(data.decode('utf-8', errors='replace').splitlines()))
+
+
+def load_cache(path, fingerprint):
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            cache = json.load(file)
+        if cache.get('parser') == fingerprint:
+            cache.setdefault('ingested', {})
+            return cache
+        # A new parser only invalidates the parsed results; what went into each database stays recorded
+        return {'parser': fingerprint, 'files': {}, 'parsed': {}, 'ingested': cache.get('ingested', {})}
+    return {'parser': fingerprint, 'files': {}, 'parsed': {}, 'ingested': {}}
+
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(cache, file)
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse saved CDP neighbor dumps into one merged dataset.')
+    parser.add_argument('paths', nargs='+', help='Dump files or directories to search')
+    parser.add_argument('--pattern', default='*.txt', help='File name pattern inside directories (default: *.txt)')
+    parser.add_argument('--output', '-o', help='Merged CSV file, or JSON lines if it ends in .jsonl (default: CSV on stdout)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: one per core)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Parse cache (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--db', help='Also add new and rewritten dumps to this CDP neighbor database (see cdp_store.py)')
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    cache_path = os.path.expanduser(args.cache)
+    cache = load_cache(cache_path, parser_fingerprint())
+    files, parsed = cache['files'], cache['parsed']
+
+    # Stat every dump; only those whose size or modification time changed need to be read
+    dumps = {}
+    changed = []
+    for path in find_dumps(args.paths, args.pattern):
+        stat = os.stat(path)
+        dumps[path] = (stat.st_size, stat.st_mtime_ns)
+        cached = files.get(path)
+        if not cached or cached[:2] != [stat.st_size, stat.st_mtime_ns] or cached[2] not in parsed:
+            changed.append(path)
+
+    # Hash the changed dumps first: a touched or re-copied file with known content only costs its hash, and only
+    # one copy of each new content is parsed
+    to_parse = []
+    if changed:
+        workers = max(1, min(args.workers, len(changed)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            new_digests = set()
+            for path, digest in executor.map(hash_dump, changed, chunksize=max(1, len(changed) // (workers * 4))):
+                files[path] = list(dumps[path]) + [digest]
+                if digest not in parsed and digest not in new_digests:
+                    new_digests.add(digest)
+                    to_parse.append(path)
+            chunksize = max(1, len(to_parse) // (workers * 4))
+            for path, digest, neighbors in executor.map(parse_dump, to_parse, chunksize=chunksize):
+                # The file may have been rewritten since it was hashed
+                files[path] = list(dumps[path]) + [digest]
+                parsed[digest] = neighbors
+        # A copy of content that changed between hashing and parsing
+        for path in changed:
+            if files[path][2] not in parsed:
+                _, digest, neighbors = parse_dump(path)
+                files[path] = list(dumps[path]) + [digest]
+                parsed[digest] = neighbors
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    rows = 0
+    try:
+        as_json = bool(args.output and args.output.endswith('.jsonl'))
+        writer = None if as_json else csv.DictWriter(output, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+        if writer:
+            writer.writeheader()
+        for path in sorted(dumps):
+            source = {'source': path, 'host': dump_host(path), 'collected_at': dumps[path][1] // 1000000000}
+            for neighbor in parsed[files[path][2]]:
+                row = {**source, **{field: neighbor.get(field, '') for field in FIELDS}}
+                if as_json:
+                    output.write(json.dumps(row, separators=(',', ':')) + '\n')
+                else:
+                    writer.writerow(row)
+                rows += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.db:
+        from cdp_store import CdpStore
+        store = CdpStore(args.db)
+        # {dump: [size, mtime]} of the version last added to this database
+        ingested = cache['ingested'].setdefault(os.path.abspath(os.path.expanduser(args.db)), {})
+        for path in sorted(dumps):
+            if ingested.get(path) != list(dumps[path]):
+                store.ingest(dump_host(path), parsed[files[path][2]], dumps[path][1] // 1000000000)
+                ingested[path] = list(dumps[path])
+
+    # Forget dumps that have been deleted, and parsed content that no dump refers to any more
+    cache['files'] = {path: value for path, value in files.items() if path in dumps or os.path.exists(path)}
+    cache['parsed'] = {digest: parsed[digest] for digest in {value[2] for value in cache['files'].values()}}
+    cache['ingested'] = {db: {path: value for path, value in ingested.items() if path in dumps or os.path.exists(path)}
+                         for db, ingested in cache['ingested'].items()}
+    save_cache(cache_path, cache)
+
+    print(f"{len(dumps)} dumps, {len(changed)} changed, {len(to_parse)} parsed, {len(dumps) - len(to_parse)} from cache, {rows} neighbors "
+          f"in {time.monotonic() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+---------------------------------------------------------------
+Script Name: CDP Neighbor Parser
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Shared parser for "show cdp neighbors detail" output, used by parse_cdp_neighbors.py and
+    parse_cdp_neighbors_telnet.py.
+
+    iter_cdp_neighbors() is a single-pass state machine: it reads one line at a time from any iterable (a list, an
+    open file, a socket reader), dispatches each line on its prefix with at most one regular expression, and yields
+    each neighbor as soon as its record ends. Memory use stays flat no matter how large the output is.
+
+    Each neighbor is a dict with any of: device_id, ip_address, platform, capabilities, interface, port_id (the
+    neighbor's outgoing port) and management_address (the first address listed under "Management address(es):").
+
+    iter_lines() turns raw byte chunks (for example from switch_session.SSHSession.stream()) into lines, so records
+    can be parsed while the rest of the output is still on its way.
+
+Usage:
+    from cdp_parser import iter_cdp_neighbors
+    with open('cdp_output.txt') as file:
+        for neighbor in iter_cdp_neighbors(file):
+            print(neighbor['device_id'])
+
+Requirements:
+    - Python 3.x
+    - re library for regular expression matching
+---------------------------------------------------------------
+"""
+
+import codecs
+import re
+
+DEVICE_ID_PREFIX = 'Device ID:'
+ADDRESS_PREFIXES = ('IPv4 Address: ', 'IP address: ')
+MANAGEMENT_PREFIX = 'Management address(es):'
+PLATFORM_PATTERN = re.compile(r'Platform: (.+),\s*Capabilities: (.+)')
+INTERFACE_PATTERN = re.compile(r'Interface: (.+),\s*Port ID \(outgoing port\): (.+)')
+
+
+def iter_cdp_neighbors(lines):
+    """Yield one dict per neighbor from an iterable of "show cdp neighbors detail" lines."""
+    neighbor = None
+    in_management = False
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if neighbor is None:
+            # Skip everything up to the first record (prompts, the separator line, ...)
+            if line.startswith(DEVICE_ID_PREFIX) and len(line) > len(DEVICE_ID_PREFIX):
+                neighbor = {'device_id': line[len(DEVICE_ID_PREFIX):].strip()}
+            continue
+
+        if line.startswith(ADDRESS_PREFIXES):
+            address = line.split(': ', 1)[1].strip()
+            if in_management:
+                neighbor.setdefault('management_address', address)
+            else:
+                neighbor['ip_address'] = address
+        elif line.startswith('Platform:'):
+            match = PLATFORM_PATTERN.match(line)
+            if match:
+                neighbor['platform'], neighbor['capabilities'] = match.group(1, 2)
+        elif line.startswith('Interface:'):
+            match = INTERFACE_PATTERN.match(line)
+            if match:
+                neighbor['interface'] = match.group(1).strip()
+                neighbor['port_id'] = match.group(2).strip()
+        elif line.startswith(MANAGEMENT_PREFIX):
+            in_management = True
+        elif '---' in line:
+            yield neighbor
+            neighbor = None
+            in_management = False
+        elif line.startswith(DEVICE_ID_PREFIX) and len(line) > len(DEVICE_ID_PREFIX):
+            # A new record without a separator line in between
+            yield neighbor
+            neighbor = {'device_id': line[len(DEVICE_ID_PREFIX):].strip()}
+            in_management = False
+
+    if neighbor is not None:
+        yield neighbor  # The last neighbor has no separator after it
+
+
+def iter_lines(chunks, encoding='utf-8'):
+    """Turn an iterable of byte chunks (e.g. straight off an SSH channel) into lines, as they complete."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    partial = ''
+    for chunk in chunks:
+        lines = (partial + decoder.decode(chunk)).split('\n')
+        partial = lines.pop()
+        yield from lines
+    partial += decoder.decode(b'', final=True)
+    if partial:
+        yield partial
+
+
+def parse_cdp_neighbors(data):
+    """Parse a complete "show cdp neighbors detail" output held in a string into a list of neighbors."""
+    return list(iter_cdp_neighbors(data.split('\n')))
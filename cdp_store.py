@@ -0,0 +1,184 @@
+"""
+---------------------------------------------------------------
+Script Name: CDP Neighbor Store
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Fleet-wide store of parsed CDP neighbors in a local SQLite database (~/configs/cdp_neighbors.db by default).
+    Every sighting is appended with the host it was collected from and when, including the management address and
+    the neighbor's port that the per-run CSV files leave out. The database is indexed on device ID, entry and
+    management address, and host/local interface, so questions like "which switch port is device X plugged into?"
+    are answered across the whole fleet's history without grepping CSV files.
+
+    parse_cdp_neighbors.py, parse_cdp_neighbors_telnet.py and BulkFetch-SwitchConfig.py can ingest into it directly
+    (--db / -cdp_db); the ingest command below backfills from saved raw dumps or CSV files.
+
+Usage:
+    python cdp_store.py ingest [HOST] [FILE ...] [--at EPOCH]
+    python cdp_store.py query (--device DEVICE_ID | --address IP | --interface INTERFACE) [--host HOST] [--history]
+
+    Device IDs match case-insensitively, and a trailing * matches by prefix (e.g. "sw-core*").
+
+Examples:
+    python cdp_store.py ingest 192.168.1.1 cdp_output.txt
+    python cdp_store.py query --device SEP001122334455
+    python cdp_store.py query --address 10.1.20.15 --history
+    python cdp_store.py query --host 192.168.1.1 --interface GigabitEthernet1/0/7
+
+Requirements:
+    - Python 3.x
+    - sqlite3 library
+    - cdp_parser.py for parsing raw dumps
+---------------------------------------------------------------
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from cdp_parser import iter_cdp_neighbors
+
+DEFAULT_DB_PATH = '~/configs/cdp_neighbors.db'
+FIELDS = ['device_id', 'ip_address', 'management_address', 'platform', 'capabilities', 'interface', 'port_id']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS neighbors (
+    host TEXT NOT NULL,
+    collected_at INTEGER NOT NULL,
+    device_id TEXT COLLATE NOCASE,
+    ip_address TEXT,
+    management_address TEXT,
+    platform TEXT,
+    capabilities TEXT,
+    interface TEXT,
+    port_id TEXT
+);
+CREATE INDEX IF NOT EXISTS neighbors_device_id ON neighbors (device_id);
+CREATE INDEX IF NOT EXISTS neighbors_ip_address ON neighbors (ip_address);
+CREATE INDEX IF NOT EXISTS neighbors_management_address ON neighbors (management_address);
+CREATE INDEX IF NOT EXISTS neighbors_host_interface ON neighbors (host, interface);
+CREATE INDEX IF NOT EXISTS neighbors_interface ON neighbors (interface);
+'''
+
+
+class CdpStore:
+    """Append-only SQLite store of CDP neighbor sightings."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = self.connect()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def connect(self):
+        # One connection per call keeps the store safe to use from worker threads
+        return sqlite3.connect(self.path, timeout=60)
+
+    def ingest(self, host, neighbors, collected_at=None):
+        """Append the neighbors seen on host in one transaction. Returns the number of rows added."""
+        collected_at = int(collected_at if collected_at is not None else time.time())
+        rows = [(host, collected_at) + tuple(neighbor.get(field) for field in FIELDS) for neighbor in neighbors]
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(f"INSERT INTO neighbors (host, collected_at, {', '.join(FIELDS)}) "
+                                       f"VALUES ({', '.join('?' * (len(FIELDS) + 2))})", rows)
+        finally:
+            connection.close()
+        return len(rows)
+
+    def query(self, device_id=None, address=None, interface=None, host=None, history=False):
+        """Return matching sightings as dicts, newest first.
+
+        Without history, only the latest sighting of each (host, interface, device) is returned.
+        """
+        conditions = []
+        parameters = []
+        if device_id:
+            if device_id.endswith('*'):
+                conditions.append("device_id LIKE ? ESCAPE '\\'")
+                prefix = device_id[:-1].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                parameters.append(prefix + '%')
+            else:
+                conditions.append('device_id = ?')
+                parameters.append(device_id)
+        if address:
+            conditions.append('(ip_address = ? OR management_address = ?)')
+            parameters += [address, address]
+        if interface:
+            conditions.append('interface = ?')
+            parameters.append(interface)
+        if host:
+            conditions.append('host = ?')
+            parameters.append(host)
+        where = ' AND '.join(conditions) or '1'
+
+        columns = ['host', 'collected_at'] + FIELDS
+        if history:
+            sql = f"SELECT {', '.join(columns)} FROM neighbors WHERE {where} ORDER BY collected_at DESC"
+        else:
+            # SQLite returns the other columns from the row holding the MAX()
+            sql = (f"SELECT host, MAX(collected_at), {', '.join(FIELDS)} FROM neighbors WHERE {where} "
+                   f"GROUP BY host, interface, device_id ORDER BY 2 DESC")
+        connection = self.connect()
+        try:
+            return [dict(zip(columns, row)) for row in connection.execute(sql, parameters)]
+        finally:
+            connection.close()
+
+
+def read_neighbors_file(path):
+    """Read neighbors from a saved CSV file or a raw "show cdp neighbors detail" dump."""
+    with open(path, 'r', newline='') as file:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(file))
+        return list(iter_cdp_neighbors(file))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Store and query CDP neighbors across the fleet.')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'SQLite database (default: {DEFAULT_DB_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='Add saved dumps or CSV files collected from a host')
+    ingest_parser.add_argument('host', help='Host the files were collected from')
+    ingest_parser.add_argument('files', nargs='+', help='Raw "show cdp neighbors detail" text files or CSV files')
+    ingest_parser.add_argument('--at', type=int, help='Collection time as an epoch (default: each file\'s modification time)')
+
+    query_parser = subparsers.add_parser('query', help='Find where devices were seen')
+    query_parser.add_argument('--device', help='Neighbor device ID (case-insensitive, trailing * for a prefix match)')
+    query_parser.add_argument('--address', help='Neighbor entry or management address')
+    query_parser.add_argument('--interface', help='Local interface on the collecting host')
+    query_parser.add_argument('--host', help='Only sightings collected from this host')
+    query_parser.add_argument('--history', action='store_true', help='Show every sighting, not just the latest per port')
+
+    args = parser.parse_args()
+    store = CdpStore(args.db)
+
+    if args.command == 'ingest':
+        for path in args.files:
+            count = store.ingest(args.host, read_neighbors_file(path), args.at or os.path.getmtime(path))
+            print(f"Ingested {count} neighbors from {path}")
+    elif args.command == 'query':
+        if not (args.device or args.address or args.interface or args.host):
+            query_parser.error('give at least one of --device, --address, --interface or --host')
+        rows = store.query(args.device, args.address, args.interface, args.host, args.history)
+        for row in rows:
+            seen = datetime.fromtimestamp(row['collected_at']).strftime('%Y-%m-%d %H:%M')
+            address = row['management_address'] or row['ip_address'] or ''
+            print(f"{seen}  {row['host']:<16} {row['interface'] or '':<24} -> {row['device_id']} "
+                  f"{row['port_id'] or ''} {address}".rstrip())
+        if not rows:
+            print('No matching neighbors')
+
+
+if __name__ == '__main__':
+    main()
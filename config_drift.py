@@ -0,0 +1,285 @@
+"""
+---------------------------------------------------------------
+Script Name: Switch Config Drift and Compliance Checker
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Run after BulkFetch-SwitchConfig.py. For every switch under ~/configs/switches it compares the newest config
+    with the previous one, and checks the newest config against a JSON rule set. The result is a compact report
+    with one JSON object per switch.
+
+    Hosts are checked in a process pool (one process per core by default), so a full-fleet check scales with the
+    number of cores instead of running one diff after another. Results are cached in ~/configs/drift_cache.json
+    by config hash, i.e. the SHA-256 of the normalized config from config_store.py. Rule results are cached per
+    rule set, and diffs per pair of hashes. Legacy <ip>-<timestamp>.txt files are hashed once and remembered by
+    size and modification time. A switch whose newest two configs were already checked against the same rules is
+    answered from the cache without reading anything.
+
+    Rule set format (lines are compared after whitespace is collapsed; * and ? wildcards are allowed):
+
+        [
+            {"name": "no-http-server", "forbidden": ["ip http server", "ip http secure-server"]},
+            {"name": "password-encryption", "required": ["service password-encryption"]},
+            {"name": "portfast-on-access-ports", "section": "interface *Ethernet*",
+             "when": ["switchport mode access"], "required": ["spanning-tree portfast"]},
+            {"name": "ssh-only-vty", "section": "line vty *", "forbidden": ["transport input telnet*"]}
+        ]
+
+    A rule without "section" applies to the top-level lines. A rule with "section" applies to every section whose
+    header matches it, optionally only those containing all the "when" lines. Every "required" pattern must match
+    at least one line, and no line may match a "forbidden" pattern.
+
+    Report line:
+        {"host": "10.1.1.1", "epoch": 1760000000, "previous": 1759900000, "changed": true,
+         "added": ["..."], "removed": ["..."], "violations": [{"rule": "...", "section": null, "missing": "..."}]}
+
+    Nested lines in "added" and "removed" are prefixed with their section, e.g. "interface Gi1/0/7 > shutdown".
+
+Usage:
+    python config_drift.py [--rules RULES_FILE] [--workers N] [--output REPORT_FILE] [SWITCH_IP ...]
+
+Examples:
+    python config_drift.py --rules golden.json --output drift-report.jsonl
+    python config_drift.py --rules golden.json 192.168.1.1 | jq 'select(.violations != [])'
+
+Requirements:
+    - Python 3.x
+    - config_store.py
+---------------------------------------------------------------
+"""
+
+import argparse
+import difflib
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config_store import DEFAULT_ROOT, ConfigStore, config_hash, normalize_config
+
+DEFAULT_CACHE_PATH = '~/configs/drift_cache.json'
+# Added/removed lines kept per host in the report
+MAX_DIFF_LINES = 200
+
+
+def normalize_line(line):
+    return ' '.join(line.split())
+
+
+def parse_config(config_data):
+    """Split a normalized config into (top-level lines, {section header: [lines nested under it]})."""
+    top = []
+    sections = {}
+    header = None
+    for line in normalize_config(config_data).splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('!') or stripped == 'end':
+            continue
+        if line[0].isspace():
+            if header is not None:
+                sections[header].append(normalize_line(stripped))
+            continue
+        header = normalize_line(stripped)
+        if header not in sections:
+            top.append(header)
+            sections[header] = []
+    return top, sections
+
+
+def check_lines(rule, lines, section=None):
+    violations = []
+    for pattern in rule.get('required', []):
+        if not any(fnmatch.fnmatchcase(line, pattern) for line in lines):
+            violations.append({'rule': rule['name'], 'section': section, 'missing': pattern})
+    for pattern in rule.get('forbidden', []):
+        for line in lines:
+            if fnmatch.fnmatchcase(line, pattern):
+                violations.append({'rule': rule['name'], 'section': section, 'forbidden': line})
+    return violations
+
+
+def evaluate_rules(rules, config_data):
+    """Return the violations of a rule set in one config."""
+    top, sections = parse_config(config_data)
+    violations = []
+    for rule in rules:
+        if 'section' not in rule:
+            violations += check_lines(rule, top)
+            continue
+        for header, lines in sections.items():
+            if not fnmatch.fnmatchcase(header, rule['section']):
+                continue
+            if all(any(fnmatch.fnmatchcase(line, pattern) for line in lines) for pattern in rule.get('when', [])):
+                violations += check_lines(rule, lines, header)
+    return violations
+
+
+def contextual_lines(config_data):
+    """Normalized config lines in order, with nested lines prefixed by their section header."""
+    top, sections = parse_config(config_data)
+    lines = []
+    for header in top:
+        lines.append(header)
+        lines.extend(f"{header} > {line}" for line in sections[header])
+    return lines
+
+
+def diff_configs(old_data, new_data):
+    """Return (added, removed) lines between two configs, nested lines prefixed by their section header."""
+    added = []
+    removed = []
+    old_lines = contextual_lines(old_data)
+    new_lines = contextual_lines(new_data)
+    for line in difflib.unified_diff(old_lines, new_lines, n=0, lineterm=''):
+        if line.startswith(('---', '+++', '@@')):
+            continue
+        if line.startswith('+'):
+            added.append(line[1:])
+        elif line.startswith('-'):
+            removed.append(line[1:])
+    return added[:MAX_DIFF_LINES], removed[:MAX_DIFF_LINES]
+
+
+def check_host(task):
+    """Worker: read a host's newest two configs and work out what the cache did not have.
+
+    Returns the hashes of the configs read (with the legacy file stats they belong to) so the parent can cache them.
+    """
+    root, ip, versions, rules, need_rules, need_diff = task
+    store = ConfigStore(root)
+    configs = [store.read_version(ip, version) for version in versions]
+    hashes = [config_hash(config_data) for config_data in configs]
+    files = {}
+    for version, digest in zip(versions, hashes):
+        if version[2]:
+            stat = os.stat(version[2])
+            files[version[2]] = [stat.st_size, stat.st_mtime_ns, digest]
+    result = {'hashes': hashes, 'files': files}
+    if need_rules:
+        result['violations'] = evaluate_rules(rules, configs[-1])
+    if need_diff and len(configs) == 2 and hashes[0] != hashes[1]:
+        result['diff'] = diff_configs(configs[0], configs[1])
+    return ip, result
+
+
+def load_cache(path):
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            return json.load(file)
+    return {}
+
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(cache, file)
+    os.replace(temp_path, path)
+
+
+def known_digest(version, files):
+    """A version's config hash without reading it: stored CAS versions carry it, legacy files via the cache."""
+    epoch, digest, path = version
+    if digest:
+        return digest
+    cached = files.get(path)
+    if cached:
+        stat = os.stat(path)
+        if [stat.st_size, stat.st_mtime_ns] == cached[:2]:
+            return cached[2]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check switch configs for drift and rule compliance.')
+    parser.add_argument('ips', nargs='*', help='Switch IP addresses (default: every switch under the root)')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help=f'Config store root (default: {DEFAULT_ROOT})')
+    parser.add_argument('--rules', help='JSON rule set (without it only drift is reported)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: one per core)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Result cache (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--output', '-o', help='Write the report here instead of stdout')
+    args = parser.parse_args()
+
+    rules = []
+    if args.rules:
+        with open(args.rules, 'r') as file:
+            rules = json.load(file)
+    rules_key = hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    store = ConfigStore(args.root)
+    cache_path = os.path.expanduser(args.cache)
+    cache = load_cache(cache_path)
+    files = cache.get('files', {})
+    checks = cache.get('checks', {}).get(rules_key, {})
+    diffs = cache.get('diffs', {})
+
+    start = time.monotonic()
+    hosts = {}
+    tasks = []
+    for ip in args.ips or store.hosts():
+        versions = store.versions(ip)[-2:]
+        if not versions:
+            continue
+        digests = [known_digest(version, files) for version in versions]
+        hosts[ip] = (versions, digests)
+        need_rules = digests[-1] is None or digests[-1] not in checks
+        pair = f"{digests[0]}..{digests[-1]}"
+        need_diff = len(versions) == 2 and (None in digests or (digests[0] != digests[1] and pair not in diffs))
+        if need_rules or need_diff:
+            tasks.append((args.root, ip, versions, rules, need_rules, need_diff))
+
+    # Only hosts the cache could not answer go to the pool
+    if tasks:
+        workers = max(1, min(args.workers, len(tasks)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for ip, result in executor.map(check_host, tasks, chunksize=max(1, len(tasks) // (workers * 4))):
+                versions, _ = hosts[ip]
+                hosts[ip] = (versions, result['hashes'])
+                files.update(result['files'])
+                if 'violations' in result:
+                    checks[result['hashes'][-1]] = result['violations']
+                if 'diff' in result:
+                    diffs[f"{result['hashes'][0]}..{result['hashes'][-1]}"] = result['diff']
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    used_checks = {}
+    used_diffs = {}
+    violating = changed_count = 0
+    try:
+        for ip, (versions, digests) in sorted(hosts.items()):
+            changed = len(digests) == 2 and digests[0] != digests[1]
+            pair = f"{digests[0]}..{digests[-1]}"
+            added, removed = diffs[pair] if changed else ([], [])
+            violations = checks[digests[-1]]
+            used_checks[digests[-1]] = violations
+            if changed:
+                used_diffs[pair] = diffs[pair]
+            violating += bool(violations)
+            changed_count += changed
+            report = {'host': ip, 'epoch': versions[-1][0], 'previous': versions[0][0] if len(versions) == 2 else None,
+                      'changed': changed, 'added': added, 'removed': removed, 'violations': violations}
+            output.write(json.dumps(report, separators=(',', ':')) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.ips:
+        # A partial run only adds to the cache
+        used_checks, used_diffs = checks, diffs
+    else:
+        # A full run keeps only what it used, so the cache does not grow with every config ever seen
+        live_paths = {version[2] for versions, _ in hosts.values() for version in versions if version[2]}
+        files = {path: value for path, value in files.items() if path in live_paths}
+    all_checks = cache.get('checks', {})
+    all_checks[rules_key] = used_checks
+    save_cache(cache_path, {'files': files, 'checks': all_checks, 'diffs': used_diffs})
+    print(f"{len(hosts)} switches checked in {time.monotonic() - start:.1f}s ({len(tasks)} read, "
+          f"{len(hosts) - len(tasks)} from cache): {changed_count} changed, {violating} with violations", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+---------------------------------------------------------------
+Script Name: Switch Config Index
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Searchable index over the switch configs saved by BulkFetch-SwitchConfig.py, so questions like "which switches
+    still have ip http server?" or "where is VLAN 412 defined?" are answered from a SQLite database
+    (~/configs/config_index.db by default) instead of grepping every <ip>-<timestamp>.txt ever written.
+
+    Each config line is normalized (whitespace collapsed, "!" comments and volatile lines dropped) and stored once
+    together with its section path, the parent lines it is indented under (e.g. "interface Vlan412" for
+    " ip address 10.4.12.1 255.255.255.0", or "router bgp 65001 > address-family ipv4" for a line nested two
+    deep). The index maps each line to the hosts and config timestamps it appears in.
+
+    By default only the latest config per host is indexed. With "update --history", every stored version is
+    indexed as well, so queries can also answer "when did this line appear?". Configs are read through
+    config_store.py, so both storage layouts (timestamped files and the content-addressed store, including packs)
+    are covered.
+
+    update is incremental: a host whose directory, index.tsv and history.idx are unchanged since the last pass is
+    skipped without reading anything, and for the others only versions newer than the last indexed one are read.
+
+Usage:
+    python config_index.py update [--history]
+    python config_index.py query LINE [--section SECTION] [--history] [--missing]
+    python config_index.py query --section SECTION
+
+    LINE and SECTION match case-insensitively after whitespace is collapsed; a trailing * matches by prefix.
+
+Examples:
+    python config_index.py update
+    python config_index.py query "ip http server"
+    python config_index.py query "vlan 412"
+    python config_index.py query "switchport access vlan 412" --section "interface *"
+    python config_index.py query "service password-encryption" --missing
+
+Requirements:
+    - Python 3.x
+    - sqlite3 library
+    - config_store.py
+---------------------------------------------------------------
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from config_store import DEFAULT_ROOT, VOLATILE_PATTERNS, ConfigStore, config_hash
+
+DEFAULT_DB_PATH = '~/configs/config_index.db'
+SECTION_SEPARATOR = ' > '
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    epoch INTEGER NOT NULL,
+    digest TEXT,
+    signature TEXT
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    section TEXT COLLATE NOCASE NOT NULL,
+    text TEXT COLLATE NOCASE NOT NULL,
+    UNIQUE (text, section)
+);
+CREATE INDEX IF NOT EXISTS lines_section ON lines (section);
+CREATE TABLE IF NOT EXISTS postings (
+    line_id INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    PRIMARY KEY (line_id, host, epoch)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_host ON postings (host, epoch);
+'''
+
+
+def normalize_line(line):
+    return ' '.join(line.split())
+
+
+def config_entries(config_data):
+    """Return the set of (section path, normalized line) pairs in a config."""
+    entries = set()
+    parents = []  # (indent, normalized line) of the lines the current one is nested under
+    for raw in config_data.splitlines():
+        line = raw.rstrip()
+        stripped = line.lstrip()
+        if not stripped or stripped.startswith('!') or stripped == 'end' or VOLATILE_PATTERNS.match(line):
+            continue
+        indent = len(line) - len(stripped)
+        while parents and parents[-1][0] >= indent:
+            parents.pop()
+        text = normalize_line(stripped)
+        entries.add((SECTION_SEPARATOR.join(parent for _, parent in parents), text))
+        parents.append((indent, text))
+    return entries
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def like_pattern(value):
+    """Turn a normalized query with an optional trailing * into (operator, parameter)."""
+    value = normalize_line(value)
+    if value.endswith('*'):
+        return "LIKE ? ESCAPE '\\'", escape_like(value[:-1]) + '%'
+    return '= ?', value
+
+
+class ConfigIndex:
+    """Inverted index from normalized config lines to the hosts and versions containing them."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, root=DEFAULT_ROOT):
+        self.path = os.path.expanduser(path)
+        self.store = ConfigStore(root)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+        self.line_ids = {}
+
+    def close(self):
+        self.connection.close()
+
+    def history_enabled(self):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'history'").fetchone()
+        return bool(row and row[0] == '1')
+
+    def signature(self, ip):
+        """Modification times that change whenever a host gets a new version (or is compacted)."""
+        parts = []
+        for path in (self.store.host_dir(ip), self.store.index_path(ip), self.store.pack_index_path(ip)):
+            try:
+                parts.append(str(os.stat(path).st_mtime_ns))
+            except FileNotFoundError:
+                parts.append('-')
+        return ':'.join(parts)
+
+    def line_id(self, section, text):
+        key = (section, text)
+        line_id = self.line_ids.get(key)
+        if line_id is None:
+            cursor = self.connection.execute('INSERT OR IGNORE INTO lines (section, text) VALUES (?, ?)', key)
+            line_id = cursor.lastrowid if cursor.rowcount else self.connection.execute(
+                'SELECT id FROM lines WHERE text = ? AND section = ?', (text, section)).fetchone()[0]
+            self.line_ids[key] = line_id
+        return line_id
+
+    def update(self, history=False):
+        """Index whatever is new since the last pass. Returns (hosts updated, versions indexed)."""
+        enabled = self.history_enabled()
+        known = {host: (epoch, digest, signature) for host, epoch, digest, signature
+                 in self.connection.execute('SELECT host, epoch, digest, signature FROM hosts')}
+        if history and not enabled:
+            # Switching to history: go back over every stored version once
+            known = {}
+        history = history or enabled
+        updated = indexed = 0
+        with self.connection:
+            if history:
+                self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('history', '1')")
+            for ip in self.store.hosts():
+                signature = self.signature(ip)
+                last_epoch, last_digest, last_signature = known.get(ip, (None, None, None))
+                if signature == last_signature:
+                    continue
+                versions = [version for version in self.store.versions(ip) if last_epoch is None or version[0] > last_epoch]
+                if not history:
+                    versions = versions[-1:]
+                for version in versions:
+                    config_data = self.store.read_version(ip, version)
+                    digest = config_hash(config_data)
+                    if digest != last_digest:
+                        if not history:
+                            # Only the latest config per host is kept
+                            self.connection.execute('DELETE FROM postings WHERE host = ?', (ip,))
+                        rows = [(self.line_id(section, text), ip, version[0]) for section, text in config_entries(config_data)]
+                        self.connection.executemany('INSERT OR IGNORE INTO postings (line_id, host, epoch) VALUES (?, ?, ?)', rows)
+                        indexed += 1
+                    elif not history:
+                        # Same content fetched again: the latest version is now this one
+                        self.connection.execute('UPDATE postings SET epoch = ? WHERE host = ?', (version[0], ip))
+                    else:
+                        # Same content again: the new version has the previous one's lines, so latest-only
+                        # queries (joined on hosts.epoch) still find them
+                        self.connection.execute('INSERT OR IGNORE INTO postings (line_id, host, epoch) '
+                                                'SELECT line_id, host, ? FROM postings WHERE host = ? AND epoch = ?',
+                                                (version[0], ip, last_epoch))
+                    last_epoch, last_digest = version[0], digest
+                if last_epoch is not None:
+                    self.connection.execute('INSERT OR REPLACE INTO hosts (host, epoch, digest, signature) VALUES (?, ?, ?, ?)',
+                                            (ip, last_epoch, last_digest, signature))
+                updated += 1
+        return updated, indexed
+
+    def query(self, line=None, section=None, history=False):
+        """Return [(host, epoch, section, line)] matching a line and/or section, newest first.
+
+        Without history only each host's latest indexed config is searched.
+        """
+        conditions = []
+        parameters = []
+        if line:
+            operator, parameter = like_pattern(line)
+            conditions.append(f'l.text {operator}')
+            parameters.append(parameter)
+        if section:
+            operator, parameter = like_pattern(section)
+            conditions.append(f'(l.section {operator} OR l.section LIKE ? ESCAPE \'\\\')')
+            parameters.append(parameter)
+            # Lines nested deeper under the section match too
+            if operator.startswith('LIKE'):
+                parameters.append(parameter)
+            else:
+                parameters.append(escape_like(parameter) + SECTION_SEPARATOR + '%')
+        latest = '' if history else 'JOIN hosts h ON h.host = p.host AND h.epoch = p.epoch'
+        sql = (f"SELECT p.host, p.epoch, l.section, l.text FROM lines l JOIN postings p ON p.line_id = l.id {latest} "
+               f"WHERE {' AND '.join(conditions) or '1'} ORDER BY p.epoch DESC, p.host")
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def missing(self, line=None, section=None):
+        """Return [(host, epoch)] whose latest config has no match."""
+        found = {host for host, _, _, _ in self.query(line, section)}
+        return [(host, epoch) for host, epoch in self.connection.execute('SELECT host, epoch FROM hosts ORDER BY host')
+                if host not in found]
+
+
+def format_epoch(epoch):
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index and search the stored switch configs.')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'SQLite index (default: {DEFAULT_DB_PATH})')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help=f'Config store root (default: {DEFAULT_ROOT})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help='Index configs saved since the last pass')
+    update_parser.add_argument('--history', action='store_true', help='Index every stored version, not just the latest (sticky)')
+
+    query_parser = subparsers.add_parser('query', help='Find the switches whose config has a line')
+    query_parser.add_argument('line', nargs='?', help='Config line, e.g. "ip http server" (trailing * for a prefix match)')
+    query_parser.add_argument('--section', help='Only lines in this section, e.g. "interface Vlan412" or "interface *"')
+    query_parser.add_argument('--history', action='store_true', help='Search every indexed version, not just the latest')
+    query_parser.add_argument('--missing', action='store_true', help='List the switches whose latest config has no match')
+
+    args = parser.parse_args()
+    index = ConfigIndex(args.db, args.root)
+    try:
+        if args.command == 'update':
+            start = time.monotonic()
+            updated, indexed = index.update(args.history)
+            print(f"Indexed {indexed} config(s) from {updated} changed host(s) in {time.monotonic() - start:.1f}s")
+        elif args.command == 'query':
+            if not (args.line or args.section):
+                query_parser.error('give a line and/or --section')
+            start = time.monotonic()
+            if args.missing:
+                rows = index.missing(args.line, args.section)
+                for host, epoch in rows:
+                    print(f"{format_epoch(epoch)}  {host}")
+            else:
+                rows = index.query(args.line, args.section, args.history)
+                for host, epoch, section, text in rows:
+                    print(f"{format_epoch(epoch)}  {host:<16} {section + SECTION_SEPARATOR if section else ''}{text}")
+            print(f"{len(rows)} match(es) in {(time.monotonic() - start) * 1000:.0f} ms", file=sys.stderr)
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+"""
+---------------------------------------------------------------
+Script Name: Content-Addressed Switch Config Store
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.1
+Description:
+    Stores switch running-configs by content instead of by run. Each config is normalized (volatile lines such as
+    "! Last configuration change" and "ntp clock-period" are ignored) and hashed with SHA-256. A new blob is only
+    written when the hash differs from the last one recorded for the host, so an unchanged switch costs one hash
+    comparison and no new file.
+
+    Layout under ~/configs/switches/<SwitchIP>/:
+        objects/<sha256>.txt   the raw config, as first seen with that content
+        index.tsv              one "<epoch>\t<sha256>" line per change, oldest first
+
+    The modification time of index.tsv is bumped on every successful fetch, so it doubles as "last verified".
+
+    The compact command packs a host's loose history (the objects above plus the <ip>-<timestamp>.txt files written
+    by the default BulkFetch-SwitchConfig.py storage) into a single archive:
+        history.pack           zlib-compressed records, each a line delta against the previous version, with a
+                               full copy every 32 versions
+        history.idx            one "<epoch>\t<sha256>\t<offset>\t<length>\t<keyframe offset>" line per version
+    Reading the config at a given time seeks straight to the nearest full copy and replays at most 31 deltas.
+
+Usage:
+    python config_store.py history [SWITCH_IP]
+    python config_store.py show [SWITCH_IP] [--at "YYYY-MM-DD HH:MM"]
+    python config_store.py compact [SWITCH_IP ...]
+
+Examples:
+    python config_store.py history 192.168.1.1
+    python config_store.py show 192.168.1.1 --at "2026-10-01 08:00"
+    python config_store.py compact
+
+Requirements:
+    - Python 3.x
+---------------------------------------------------------------
+"""
+
+import argparse
+import bisect
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from datetime import datetime
+
+from time_utils import get_timezone
+
+DEFAULT_ROOT = '~/configs/switches'
+
+# A full copy is stored every KEYFRAME_INTERVAL packed versions
+KEYFRAME_INTERVAL = 32
+
+# BulkFetch-SwitchConfig.py names its files with US/Eastern wall-clock time
+LEGACY_TIMEZONE = get_timezone('US/Eastern')
+
+# Lines that change without anyone touching the config
+VOLATILE_PATTERNS = re.compile(
+    r'^(?:'
+    r'! Last configuration change at .*'
+    r'|! NVRAM config last updated at .*'
+    r'|! No configuration change since last restart.*'
+    r'|ntp clock-period \d+'
+    r'|Building configuration\.\.\.'
+    r'|Current configuration : \d+ bytes'
+    r')$'
+)
+
+
+def normalize_config(config_data):
+    """Return the config with volatile lines removed and line endings/trailing whitespace made consistent."""
+    lines = []
+    for line in config_data.splitlines():
+        line = line.rstrip()
+        if not VOLATILE_PATTERNS.match(line):
+            lines.append(line)
+    return '\n'.join(lines).strip('\n') + '\n'
+
+
+def config_hash(config_data):
+    """SHA-256 of the normalized config."""
+    return hashlib.sha256(normalize_config(config_data).encode('utf-8')).hexdigest()
+
+
+def parse_time(value):
+    """Parse an epoch or a "YYYY-MM-DD[ HH:MM]" local time into an epoch."""
+    if value.isdigit():
+        return int(value)
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d_%H%M', '%Y-%m-%d'):
+        try:
+            return int(datetime.strptime(value, fmt).timestamp())
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised time: {value}")
+
+
+def make_delta(old_lines, new_lines):
+    """Encode new_lines as copies of line ranges from old_lines plus inserted text."""
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old_lines, ops):
+    """Rebuild the lines encoded by make_delta."""
+    lines = []
+    for op in ops:
+        if isinstance(op, str):
+            lines.extend(op.splitlines(keepends=True))
+        else:
+            lines.extend(old_lines[op[0]:op[1]])
+    return lines
+
+
+class ConfigStore:
+    """Change-only config storage rooted at ~/configs/switches."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = os.path.expanduser(root)
+
+    def hosts(self):
+        """Return every host that has a directory under the root."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root) if entry.is_dir() and not entry.name.startswith('.'))
+
+    def host_dir(self, ip):
+        return os.path.join(self.root, ip)
+
+    def index_path(self, ip):
+        return os.path.join(self.host_dir(ip), 'index.tsv')
+
+    def object_path(self, ip, digest):
+        return os.path.join(self.host_dir(ip), 'objects', f"{digest}.txt")
+
+    def pack_path(self, ip):
+        return os.path.join(self.host_dir(ip), 'history.pack')
+
+    def pack_index_path(self, ip):
+        return os.path.join(self.host_dir(ip), 'history.idx')
+
+    def history(self, ip):
+        """Return [(epoch, sha256), ...] for every loose change in index.tsv, oldest first."""
+        path = self.index_path(ip)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as file:
+            return [(int(epoch), digest) for epoch, digest in (line.split() for line in file if line.strip())]
+
+    def latest(self, ip):
+        """Return the most recent loose (epoch, sha256) for a host, or None."""
+        path = self.index_path(ip)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as file:
+            # The index only grows at the end, so the last line is all we need
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - 256))
+            last = file.read().decode('ascii').strip().rsplit('\n', 1)[-1]
+        if not last:
+            return None
+        epoch, digest = last.split()
+        return int(epoch), digest
+
+    def legacy_files(self, ip):
+        """Return [(epoch, path), ...] for the <ip>-<timestamp>.txt files written by BulkFetch-SwitchConfig.py."""
+        directory = self.host_dir(ip)
+        if not os.path.isdir(directory):
+            return []
+        pattern = re.compile(re.escape(ip) + r'-(\d{8}-\d{4}[AP]M)\.txt$')
+        files = []
+        for entry in os.scandir(directory):
+            match = pattern.match(entry.name)
+            if match:
+                stamp = datetime.strptime(match.group(1), '%Y%m%d-%I%M%p').replace(tzinfo=LEGACY_TIMEZONE)
+                files.append((int(stamp.timestamp()), entry.path))
+        files.sort()
+        return files
+
+    def pack_entries(self, ip):
+        """Return [(epoch, sha256, offset, length, keyframe_offset), ...] from the host's pack index."""
+        path = self.pack_index_path(ip)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as file:
+            return [(int(epoch), digest, int(offset), int(length), int(keyframe))
+                    for epoch, digest, offset, length, keyframe in (line.split() for line in file if line.strip())]
+
+    def versions(self, ip):
+        """Return every known version as (epoch, sha256 or None, legacy path or None), oldest first."""
+        seen = set()
+        versions = []
+        for entry in self.pack_entries(ip) + [(epoch, digest) for epoch, digest in self.history(ip)]:
+            if entry[:2] not in seen:
+                seen.add(entry[:2])
+                versions.append((entry[0], entry[1], None))
+        versions.extend((epoch, None, path) for epoch, path in self.legacy_files(ip))
+        versions.sort(key=lambda version: version[0])
+        return versions
+
+    def last_backup(self, ip):
+        """Return when a host was last fetched successfully (epoch), or None if it never was.
+
+        Only file times are read: index.tsv is touched on every save, even when nothing changed, and legacy
+        <ip>-<timestamp>.txt files are written once per fetch. compact() keeps that time on index.tsv when it
+        rewrites it or removes the legacy files. The pack is only consulted if neither exists.
+        """
+        directory = self.host_dir(ip)
+        if not os.path.isdir(directory):
+            return None
+        prefix = f"{ip}-"
+        latest = None
+        for entry in os.scandir(directory):
+            if entry.name == 'index.tsv' or (entry.name.startswith(prefix) and entry.name.endswith('.txt')):
+                mtime = entry.stat().st_mtime
+                latest = mtime if latest is None else max(latest, mtime)
+        if latest is None:
+            entries = self.pack_entries(ip)
+            latest = entries[-1][0] if entries else None
+        return latest
+
+    def at(self, ip, epoch):
+        """Return the version in effect at the given time, or None."""
+        versions = self.versions(ip)
+        position = bisect.bisect_right([version[0] for version in versions], epoch)
+        return versions[position - 1] if position else None
+
+    def read(self, ip, digest):
+        """Return the config stored under a hash, from a loose object or the pack."""
+        object_path = self.object_path(ip, digest)
+        if os.path.exists(object_path):
+            with open(object_path, 'r') as file:
+                return file.read()
+        entries = self.pack_entries(ip)
+        for position, entry in enumerate(entries):
+            if entry[1] == digest:
+                return self.read_pack(ip, entries, position)
+        raise KeyError(f"{digest} is not stored for {ip}")
+
+    def read_version(self, ip, version):
+        """Return the config for an entry from versions()."""
+        epoch, digest, path = version
+        if path:
+            with open(path, 'r') as file:
+                return file.read()
+        return self.read(ip, digest)
+
+    def read_pack(self, ip, entries, position):
+        """Rebuild one packed version by reading from its keyframe up to it and applying the deltas in between."""
+        keyframe = entries[position][4]
+        first = position
+        while entries[first][2] != keyframe:
+            first -= 1
+        end = entries[position][2] + entries[position][3]
+        with open(self.pack_path(ip), 'rb') as file:
+            file.seek(keyframe)
+            data = file.read(end - keyframe)
+        lines = None
+        for epoch, digest, offset, length, _ in entries[first:position + 1]:
+            lines = self._decode_record(data[offset - keyframe:offset - keyframe + length], lines)
+        return ''.join(lines)
+
+    def iter_pack(self, ip, entries):
+        """Yield (epoch, config) for every packed version, decoding the pack once from start to end."""
+        if not entries:
+            return
+        with open(self.pack_path(ip), 'rb') as file:
+            lines = None
+            for epoch, digest, offset, length, _ in entries:
+                file.seek(offset)
+                lines = self._decode_record(file.read(length), lines)
+                yield epoch, ''.join(lines)
+
+    @staticmethod
+    def _decode_record(blob, previous_lines):
+        record = json.loads(zlib.decompress(blob))
+        if 'f' in record:
+            return record['f'].splitlines(keepends=True)
+        return apply_delta(previous_lines, record['d'])
+
+    def save(self, ip, config_data, timestamp=None):
+        """Store a config if it changed. Returns (sha256, changed)."""
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        digest = config_hash(config_data)
+        latest = self.latest(ip)
+        index_path = self.index_path(ip)
+
+        if latest and latest[1] == digest:
+            os.utime(index_path, (timestamp, timestamp))
+            return digest, False
+
+        object_path = self.object_path(ip, digest)
+        if not os.path.exists(object_path):
+            # Content can flip back to an earlier version, in which case the blob is already there
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temp_path = object_path + '.tmp'
+            with open(temp_path, 'w') as file:
+                file.write(config_data)
+            os.replace(temp_path, object_path)
+
+        with open(index_path, 'a') as file:
+            file.write(f"{timestamp}\t{digest}\n")
+        return digest, True
+
+    def compact(self, ip):
+        """Move a host's loose history (legacy files and objects) into its pack. Returns the number of versions read.
+
+        Each packed version is stored as a zlib-compressed delta against the previous one, with a full copy every
+        KEYFRAME_INTERVAL versions so that reading any version never replays more than that many deltas. Versions
+        whose normalized config matches the one before are dropped. The newest loose index entry and its object are
+        kept so that save() can still detect "unchanged" with a single comparison.
+        """
+        entries = self.pack_entries(ip)
+        packed = {entry[:2] for entry in entries}
+        loose = [(epoch, digest, None) for epoch, digest in self.history(ip) if (epoch, digest) not in packed]
+        loose += [(epoch, None, path) for epoch, path in self.legacy_files(ip)]
+        if not loose:
+            return 0
+        fetched = self.last_backup(ip)
+        loose.sort(key=lambda version: version[0])
+        pending = ((version[0], self.read_version(ip, version)) for version in loose)
+
+        pack_path = self.pack_path(ip)
+        if entries and loose[0][0] <= entries[-1][0]:
+            # Something older than the pack turned up, so rebuild it in time order
+            merged = sorted(list(self.iter_pack(ip, entries)) + list(pending), key=lambda version: version[0])
+            entries = []
+            # _append_pack appends, so a .tmp left behind by a crashed run would shift every offset
+            if os.path.exists(pack_path + '.tmp'):
+                os.remove(pack_path + '.tmp')
+            self._append_pack(ip, pack_path + '.tmp', entries, merged, None)
+            os.replace(pack_path + '.tmp', pack_path)
+        else:
+            previous = self.read_pack(ip, entries, len(entries) - 1).splitlines(keepends=True) if entries else None
+            self._append_pack(ip, pack_path, entries, pending, previous)
+
+        temp_path = self.pack_index_path(ip) + '.tmp'
+        with open(temp_path, 'w') as file:
+            for entry in entries:
+                file.write('\t'.join(str(field) for field in entry) + '\n')
+        os.replace(temp_path, self.pack_index_path(ip))
+
+        # Everything is packed now; drop the loose copies
+        latest = self.latest(ip)
+        for epoch, digest, path in loose:
+            if path:
+                os.remove(path)
+            elif latest and digest != latest[1] and os.path.exists(self.object_path(ip, digest)):
+                os.remove(self.object_path(ip, digest))
+        if latest:
+            with open(self.index_path(ip), 'w') as file:
+                file.write(f"{latest[0]}\t{latest[1]}\n")
+        if fetched is not None:
+            # Rewriting index.tsv and removing the legacy files must not move the last successful fetch; an empty
+            # index.tsv carries it for hosts that only had legacy files
+            open(self.index_path(ip), 'a').close()
+            os.utime(self.index_path(ip), (fetched, fetched))
+        return len(loose)
+
+    @staticmethod
+    def _append_pack(ip, pack_path, entries, versions, previous_lines):
+        """Append versions to a pack file, extending entries in place."""
+        since_keyframe = 0
+        for entry in reversed(entries):
+            if entry[2] == entry[4]:
+                break
+            since_keyframe += 1
+        previous_digest = entries[-1][1] if entries else None
+        with open(pack_path, 'ab') as file:
+            for epoch, config_data in versions:
+                digest = config_hash(config_data)
+                if digest == previous_digest:
+                    continue
+                lines = config_data.splitlines(keepends=True)
+                offset = file.tell()
+                if previous_lines is None or since_keyframe + 1 >= KEYFRAME_INTERVAL:
+                    record = {'f': config_data}
+                    keyframe = offset
+                    since_keyframe = 0
+                else:
+                    ops = make_delta(previous_lines, lines)
+                    if apply_delta(previous_lines, ops) != lines:
+                        raise ValueError(f"Delta check failed for {ip} at {epoch}")
+                    record = {'d': ops}
+                    keyframe = entries[-1][4]
+                    since_keyframe += 1
+                blob = zlib.compress(json.dumps(record).encode('utf-8'), 9)
+                file.write(blob)
+                entries.append((epoch, digest, offset, len(blob), keyframe))
+                previous_lines = lines
+                previous_digest = digest
+
+
+def format_epoch(epoch):
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and compact the switch config store.')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help=f'Store root (default: {DEFAULT_ROOT})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    history_parser = subparsers.add_parser('history', help='List the stored versions for a switch')
+    history_parser.add_argument('ip', help='Switch IP address')
+
+    show_parser = subparsers.add_parser('show', help='Print a stored config')
+    show_parser.add_argument('ip', help='Switch IP address')
+    show_parser.add_argument('--at', help='Show the config in effect at this time (epoch or "YYYY-MM-DD HH:MM"); default is the latest')
+
+    compact_parser = subparsers.add_parser('compact', help='Pack loose history into history.pack')
+    compact_parser.add_argument('ips', nargs='*', help='Switch IP addresses (default: every switch under the root)')
+
+    args = parser.parse_args()
+    store = ConfigStore(args.root)
+
+    if args.command == 'history':
+        for epoch, digest, path in store.versions(args.ip):
+            print(f"{format_epoch(epoch)}  {digest or os.path.basename(path)}")
+    elif args.command == 'show':
+        if args.at:
+            version = store.at(args.ip, parse_time(args.at))
+        else:
+            versions = store.versions(args.ip)
+            version = versions[-1] if versions else None
+        if version is None:
+            sys.exit(f"No config stored for {args.ip}")
+        sys.stdout.write(store.read_version(args.ip, version))
+    elif args.command == 'compact':
+        for ip in args.ips or store.hosts():
+            count = store.compact(ip)
+            if count:
+                print(f"Packed {count} loose version(s) for {ip} ({len(store.pack_entries(ip))} distinct in the pack)")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,27 @@
 Script Name: Epoch Time Converter
 Author: Dan Clancey
 Date: 7-May-2023
-Version: 1.0
+Version: 1.2
 Description:
     This script converts a given epoch time to a human-readable datetime string formatted as "YYYY-MM-DD_HHMM",
-    adjusting for the US Eastern timezone.
+    adjusting for the US Eastern timezone. Only the standard library is imported at startup (see time_utils.py).
+    Up to version 1.1 the host's local time was read as UTC before converting, so the output was only US Eastern
+    on hosts running in UTC; it is now US Eastern everywhere.
+
+    Without an epoch_time argument it runs in bulk mode. Epochs are read one per line from stdin or --input, or
+    from a column of a CSV file (--column). The converted timestamps are written out as a stream, in batches, so
+    thousands of values no longer need one process each. The timezone is resolved once. Each distinct minute
+    (or second, if the format shows seconds) is formatted only once and reused. If NumPy is installed, each batch
+    is converted vectorized: only its distinct minutes are formatted, then mapped back onto the batch.
+
+    --unit selects seconds, milliseconds (the default, as Graylog/OpenSearch use) or microseconds. --format takes
+    a strftime format or one of the presets: default (%Y-%m-%d_%I%M%p), iso (%Y-%m-%dT%H:%M:%S%z) or
+    graylog (%Y-%m-%d %H:%M:%S). Lines that are not numbers, nan/inf and epochs outside the range a datetime
+    can hold give an empty output line.
 
 Usage:
     python convert_epoch.py [epoch_time]
+    python convert_epoch.py [--input FILE] [--column COLUMN] [--unit s|ms|us] [--format FORMAT] [--tz TIMEZONE]
 
     Where:
     [epoch_time] is the epoch time to convert, specified as an integer.
@@ -18,29 +32,154 @@ Examples:
     python epoch_time_converter.py 1619710738000
     Output: 2023-04-29_0806PM
 
+    cut -d, -f3 messages.csv | python convert_epoch.py --format graylog
+    python convert_epoch.py --input indices.csv --column creation.date --format iso > indices_dated.csv
+
 Requirements:
     - Python 3.x
     - argparse library
-    - datetime library
-    - pytz library
+    - time_utils.py (zoneinfo)
+    - numpy library (optional, for vectorized bulk conversion)
 ---------------------------------------------------------------
 """
 
 import argparse
-import datetime
-import pytz
+import csv
+import itertools
+import sys
+
+from time_utils import bucket_size, format_seconds, get_timezone
+
+UNITS = {'s': 1, 'ms': 1000, 'us': 1000000}
+FORMATS = {
+    'default': '%Y-%m-%d_%I%M%p',
+    'iso': '%Y-%m-%dT%H:%M:%S%z',
+    'graylog': '%Y-%m-%d %H:%M:%S',
+}
+BATCH_SIZE = 65536
+# 10000-01-01 UTC; larger epochs cannot be a datetime, and would overflow int64 once bucketed
+MAX_SECONDS = 253402300800
+
+
+class EpochFormatter:
+    """Formats epochs in one timezone, caching one result per minute (or second) bucket"""
+
+    def __init__(self, fmt, timezone, unit='ms'):
+        self.fmt = fmt
+        self.timezone = timezone
+        get_timezone(timezone)  # Fail on an unknown timezone before reading any input
+        self.divisor = UNITS[unit]
+        self.step = bucket_size(fmt)
+        self.cache = {}
+
+    def format_seconds(self, seconds):
+        return format_seconds(seconds, self.fmt, self.timezone)
+
+    def format_bucket(self, bucket):
+        formatted = self.cache.get(bucket)
+        if formatted is None:
+            if len(self.cache) > 1000000:
+                self.cache.clear()
+            try:
+                formatted = self.format_seconds(bucket * self.step)
+            except (ValueError, OverflowError, OSError):
+                # Outside the range a datetime can hold
+                formatted = ''
+            self.cache[bucket] = formatted
+        return formatted
+
+    def format_value(self, value):
+        try:
+            seconds = float(value) / self.divisor
+            if self.step is None:
+                return self.format_seconds(seconds)
+            return self.format_bucket(int(seconds // self.step))
+        except (ValueError, OverflowError, OSError):
+            # Not a number, nan/inf, or outside the range a datetime can hold
+            return ''
+
+    def format_batch(self, values, numpy=None):
+        """Format a list of epoch strings; with numpy, only the distinct buckets in the batch are formatted"""
+        if numpy is None or self.step is None:
+            return [self.format_value(value) for value in values]
+        try:
+            seconds = numpy.asarray(values, dtype=numpy.float64) / self.divisor
+        except ValueError:
+            # A blank or non-numeric line somewhere in the batch
+            return [self.format_value(value) for value in values]
+        # nan, inf and huge values are bucketed as 0 (so the int64 cast cannot overflow) and blanked afterwards
+        valid = numpy.isfinite(seconds) & (numpy.abs(seconds) < MAX_SECONDS)
+        seconds = numpy.where(valid, seconds, 0)
+        buckets, inverse = numpy.unique(numpy.floor_divide(seconds, self.step).astype(numpy.int64), return_inverse=True)
+        formatted = [self.format_bucket(bucket) for bucket in buckets.tolist()]
+        return [formatted[i] if ok else '' for i, ok in zip(inverse.tolist(), valid.tolist())]
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def convert_lines(file, output, formatter, numpy=None):
+    """Convert one epoch per line"""
+    for batch in batches(file):
+        values = [line.strip() for line in batch]
+        output.write('\n'.join(formatter.format_batch(values, numpy)) + '\n')
+
+
+def convert_csv(file, output, formatter, column, numpy=None):
+    """Convert one CSV column, writing every row back with the converted value in a new <column>_formatted column"""
+    reader = csv.reader(file)
+    writer = csv.writer(output)
+    header = next(reader)
+    position = int(column) if column.isdigit() else header.index(column)
+    writer.writerow(header + [f"{header[position]}_formatted"])
+    for batch in batches(reader):
+        values = [row[position].strip() if len(row) > position else '' for row in batch]
+        writer.writerows(row + [formatted] for row, formatted in zip(batch, formatter.format_batch(values, numpy)))
+
+
+def main():
+    # Create the parser and add args
+    parser = argparse.ArgumentParser(description='Convert epoch time to datetime')
+    parser.add_argument('EpochTime', metavar='epoch_time', type=int, nargs='?',
+                        help='the epoch time to convert (omit to convert a stream from stdin or --input)')
+    parser.add_argument('--input', '-i', default='-', help='File with one epoch per line, or a CSV file with --column (default: stdin)')
+    parser.add_argument('--column', '-c', help='CSV column (name or 0-based number) holding the epochs')
+    parser.add_argument('--unit', '-u', choices=UNITS, default='ms', help='Unit of the epochs (default: ms)')
+    parser.add_argument('--format', '-f', default='default', help=f"strftime format or one of {', '.join(FORMATS)} (default: default)")
+    parser.add_argument('--tz', default='US/Eastern', help='Timezone to convert to (default: US/Eastern)')
+    parser.add_argument('--no-numpy', action='store_true', help='Do not use NumPy even if it is installed')
+    args = parser.parse_args()
+
+    formatter = EpochFormatter(FORMATS.get(args.format, args.format), args.tz, args.unit)
+
+    if args.EpochTime is not None:
+        # Convert and format time from Epoch to YYY-MM-DD_HHMM
+        print(formatter.format_seconds(args.EpochTime / UNITS[args.unit]))
+        return
 
-# Create the parser and add args
-parser = argparse.ArgumentParser(description='Convert epoch time to datetime')
-parser.add_argument('EpochTime', metavar='epoch_time', type=int,
-                    help='the epoch time to convert')
+    numpy = None
+    if not args.no_numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
 
-args = parser.parse_args()
+    file = sys.stdin if args.input == '-' else open(args.input, 'r', newline='')
+    try:
+        if args.column is not None:
+            convert_csv(file, sys.stdout, formatter, args.column, numpy)
+        else:
+            convert_lines(file, sys.stdout, formatter, numpy)
+    finally:
+        if file is not sys.stdin:
+            file.close()
 
-# Convert and format time from Epoch to YYY-MM-DD_HHMM
-creation_date = datetime.datetime.fromtimestamp(args.EpochTime / 1000.0)
-creation_date = pytz.utc.localize(creation_date)
-creation_date = creation_date.astimezone(pytz.timezone('US/Eastern'))
-creation_date_formatted = creation_date.strftime("%Y-%m-%d_%I%M%p")
 
-print(creation_date_formatted)
+if __name__ == '__main__':
+    main()
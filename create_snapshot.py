@@ -3,152 +3,477 @@
 Script Name: OpenSearch Index Management and Snapshot Creator
 Author: Dan Clancey
 Date: 12-Jun-2023
-Version: 1.0
+Version: 1.6
 Description:
     This script manages OpenSearch indices by querying the index status and creating snapshots. 
     It keeps the last 9 indices and creates snapshots for the rest before potentially removing them. 
-    If the snapshot creation fails, it sends an email notification.
+    If the snapshot creation fails, it sends an email notification. Failures are collected during the run and sent
+    as one digest email by a background worker (notify.py), so a bad run does not stall on one SMTP login per failure.
+
+    Each run is reconciled against the snapshots already in the repository: indices that are already covered by a
+    snapshot are not submitted again. Once an index's snapshot is verified (SUCCESS, no failed shards) the index can
+    be deleted with --delete-source. What was submitted, verified and deleted is recorded in a local JSON ledger.
+
+    With --async, snapshots are submitted with wait_for_completion=false. At most --max-in-flight run on the
+    cluster at once, their progress is polled through the _status API with exponential backoff, and the next
+    snapshot is submitted as soon as one finishes. --group-size puts several indices into each snapshot.
+
+    --policy replaces the fixed firewall keep count with a JSON retention policy that covers every index family
+    at once. Each rule matches index names with a shell-style pattern; the first matching rule applies. Indices are
+    grouped into families by their name without the rotation number. In each family the newest "keep" indices are
+    retained unless they are older than "max_age_days", and the rest are retired. The newest index of a family is
+    its active write index and is always retained, whatever "keep" and "max_age_days" say ("keep" must be at least
+    1). A retired index is snapshotted ("snapshot", default true) and/or deleted ("delete", default false). When it
+    is both, it is only deleted once its snapshot is verified. Snapshots are named "<family>_<creation date>" unless "snapshot_prefix" is set. All
+    families are planned from a single index listing and run through the same bounded queue.
+
+        [
+            {"pattern": "firewall_*", "keep": 9, "delete": true},
+            {"pattern": "graylog_*", "keep": 20, "max_age_days": 90, "delete": true, "group_size": 5},
+            {"pattern": "gl-events_*", "keep": 4, "snapshot": false, "delete": true},
+            {"pattern": "gl-system-events_*", "max_age_days": 30, "health": ["green", "yellow"]}
+        ]
 
 Usage:
-    python create_snapshot.py
+    python create_snapshot.py [--keep COUNT] [--ledger LEDGER_FILE] [--delete-source]
+                              [--async] [--max-in-flight COUNT] [--max-wait SECONDS] [--group-size COUNT]
+    python create_snapshot.py --policy POLICY_FILE [--dry-run] [--async] [--max-in-flight COUNT]
+
+Examples:
+    python create_snapshot.py --policy /etc/graylog/retention.json --dry-run
+    python create_snapshot.py --policy /etc/graylog/retention.json --async --max-in-flight 3
 
 Requirements:
     - Python 3.x
-    - pytz library
+    - time_utils.py (zoneinfo)
     - requests library
-    - smtplib library
+    - opensearch_client.py
+    - notify.py (smtplib library)
     - re library
 
 Notes:
     - You must have authentication credentials for both OpenSearch and the Gmail SMTP server.
+    - OpenSearch requests go through opensearch_client.py (pooled connections, node failover, retries, timeouts).
+      Configure the nodes and credentials there or with OPENSEARCH_NODES/OPENSEARCH_USERNAME/OPENSEARCH_PASSWORD.
+    - The snapshot repository (my-fs-repository) and the log directory (/var/log/graylog-server, also holding the
+      ledger) can be changed with OPENSEARCH_REPOSITORY and GRAYLOG_LOG_DIR, e.g. to run against fake_opensearch.py.
+    - Snapshot names use the index creation time in US/Eastern (time_utils.py). Up to version 1.5 the host's local
+      time was read as UTC before converting, which only gave US/Eastern on hosts running in UTC. On a host in any
+      other timezone, new snapshot names are shifted by the host's UTC offset compared with older ones. Indices are
+      matched to existing snapshots by index name, not snapshot name, so nothing is snapshotted twice.
     - This script uses the urllib3 library, which will raise InsecureRequestWarnings if the verification of SSL certificates is disabled.
-    To suppress these warnings, the script has disabled these specific warnings.
+    To suppress these warnings, the client has disabled these specific warnings.
 ---------------------------------------------------------------
 """
 
+import argparse
+import fnmatch
+import json
 import logging
-import pytz
+import os
 import re
-import requests
-import smtplib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from email.mime.text import MIMEText
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
+
+import requests
+
+from notify import Notifier
+from opensearch_client import OpenSearchClient
+from time_utils import format_epoch
 
 
-requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+# Log directory and snapshot repository; the environment variables point a test run somewhere else
+LOG_DIR = os.environ.get('GRAYLOG_LOG_DIR', '/var/log/graylog-server')
+REPOSITORY = os.environ.get('OPENSEARCH_REPOSITORY', 'my-fs-repository')
 
 # Set up logging
 logging.basicConfig(
-    filename='/var/log/graylog-server/repository_management.log',
+    filename=os.path.join(LOG_DIR, 'repository_management.log'),
     level=logging.INFO,
     format='%(asctime)s %(levelname)s: %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-username = 'admin' # update with OS username
-password = 'password' # update with OS password
+# Nodes and credentials are configured in opensearch_client.py (or OPENSEARCH_* environment variables)
+client = OpenSearchClient()
 
-def send_email(subject, body, to, gmail_user, gmail_pwd):
-    msg = MIMEText(body)
-    msg['Subject'] = subject
-    msg['From'] = gmail_user
-    msg['To'] = to
+# Failures are queued during the run and emailed as one digest at the end (see notify.py)
+notifier = Notifier('OpenSearch snapshot failures', 'recipient@email.com', 'sender@email.com', 'sender password') # update recipient email, sender email/password
 
-    try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.ehlo()
-        server.login(gmail_user, gmail_pwd)
-        server.send_message(msg)
-        server.close()
-        print('Email sent!')
-        logging.info('Email sent!')
-    except Exception as e:
-        logging.error(f'Failed to send email: {e}')
-
-def create_snapshot(index_name, snapshot_name, auth, verify=False):
-    """Creates a snapshot for the given index"""
-    url = f"https://opensearch01:9200/_snapshot/my-fs-repository/{snapshot_name}"
+LEDGER_PATH = os.path.join(LOG_DIR, 'snapshot_ledger.json')
+
+# Snapshot status polling backs off from POLL_MIN_SECONDS up to POLL_MAX_SECONDS
+POLL_MIN_SECONDS = 2
+POLL_MAX_SECONDS = 60
+RUNNING_STATES = ('INIT', 'STARTED', 'IN_PROGRESS')
+
+def create_snapshot(index_name, snapshot_name):
+    """Starts a snapshot of the given index (or comma-separated indices); returns once the cluster has accepted it"""
+    path = f"/_snapshot/{REPOSITORY}/{snapshot_name}"
     headers = {'Content-Type': 'application/json'}
     payload = {
         "indices": index_name,
         "ignore_unavailable": True,
         "include_global_state": False
     }
-    response = requests.put(url, auth=auth, headers=headers, json=payload, verify=False)
+    try:
+        response = client.put(path, headers=headers, json=payload)
+    except requests.RequestException as e:
+        logging.error(f"Failed to create snapshot for {index_name}: {e}")
+        notifier.notify('Snapshot creation failed', f'Failed to create snapshot for {index_name}: {e}')
+        return False
     print(response.text)
     if response.status_code != 200:
         logging.error(f"Failed to create snapshot for {index_name}. Status code: {response.status_code}")
-        send_email('Snapshot creation failed', f'Failed to create snapshot for {index_name}. Status code: {response.status_code}', 'recipient@email.com', 'sender@email.com', 'sender password') # update recipient email, sender email/password
+        notifier.notify('Snapshot creation failed', f'Failed to create snapshot for {index_name}. Status code: {response.status_code}')
         return False
     return True
 
+def submit_snapshot(index_name, snapshot_name):
+    """Starts a snapshot without waiting for it. Returns 'accepted', 'busy' (too many snapshots running) or 'failed'"""
+    path = f"/_snapshot/{REPOSITORY}/{snapshot_name}?wait_for_completion=false"
+    payload = {
+        "indices": index_name,
+        "ignore_unavailable": True,
+        "include_global_state": False
+    }
+    # Not retried here: a busy cluster is handled by drain_snapshots() putting the group back in the queue
+    try:
+        response = client.put(path, json=payload, retries=0)
+    except requests.RequestException as e:
+        # The snapshot may have started anyway; the next run finds it in the repository
+        logging.error(f"Failed to submit snapshot for {index_name}: {e}")
+        notifier.notify('Snapshot creation failed', f'Failed to submit snapshot for {index_name}: {e}')
+        return 'failed'
+    if response.status_code == 200:
+        return 'accepted'
+    if response.status_code in (429, 503) or 'concurrent_snapshot_execution_exception' in response.text:
+        return 'busy'
+    logging.error(f"Failed to submit snapshot for {index_name}. Status code: {response.status_code}")
+    notifier.notify('Snapshot creation failed', f'Failed to submit snapshot for {index_name}. Status code: {response.status_code}')
+    return 'failed'
+
+def get_snapshot_states(snapshot_names):
+    """Returns {snapshot name: state} from the snapshot status API"""
+    try:
+        response = client.get(f"/_snapshot/{REPOSITORY}/{','.join(snapshot_names)}/_status")
+    except requests.RequestException as e:
+        # Polled again after the next backoff
+        logging.error(f"Failed to get snapshot status: {e}")
+        return {}
+    if response.status_code != 200:
+        logging.error(f"Failed to get snapshot status. Status code: {response.status_code}")
+        return {}
+    return {snapshot['snapshot']: snapshot['state'] for snapshot in response.json()['snapshots']}
+
+def drain_snapshots(groups, max_in_flight=2, max_wait=6 * 3600):
+    """Submits (snapshot name, [indices]) groups asynchronously, keeping at most max_in_flight running at once.
+
+    Running snapshots are polled with exponential backoff; a new one is submitted as soon as one finishes. If the
+    cluster reports it is busy, the group is retried after the next poll. Returns {snapshot name: final state};
+    snapshots still running after max_wait seconds are left to finish on their own and reported as IN_PROGRESS.
+    """
+    queue = deque(groups)
+    in_flight = {}
+    states = {}
+    delay = POLL_MIN_SECONDS
+    deadline = time.monotonic() + max_wait
+
+    while queue or in_flight:
+        while queue and len(in_flight) < max_in_flight:
+            snapshot_name, group = queue[0]
+            result = submit_snapshot(','.join(group), snapshot_name)
+            if result == 'busy':
+                break
+            queue.popleft()
+            if result == 'accepted':
+                logging.info(f"Submitted snapshot {snapshot_name} for {', '.join(group)}")
+                in_flight[snapshot_name] = group
+            else:
+                states[snapshot_name] = 'FAILED'
+
+        if time.monotonic() >= deadline:
+            logging.warning(f"Stopped waiting with {len(in_flight)} snapshots running and {len(queue)} not submitted")
+            states.update({snapshot_name: 'IN_PROGRESS' for snapshot_name in in_flight})
+            break
+        if not in_flight and not queue:
+            break
+
+        time.sleep(delay)
+        finished = False
+        if in_flight:
+            for snapshot_name, state in get_snapshot_states(list(in_flight)).items():
+                if snapshot_name in in_flight and state not in RUNNING_STATES:
+                    group = in_flight.pop(snapshot_name)
+                    states[snapshot_name] = state
+                    finished = True
+                    if state == 'SUCCESS':
+                        logging.info(f"Snapshot {snapshot_name} of {', '.join(group)} finished")
+                    else:
+                        logging.error(f"Snapshot {snapshot_name} of {', '.join(group)} ended in state {state}")
+                        notifier.notify('Snapshot creation failed', f'Snapshot {snapshot_name} of {", ".join(group)} ended in state {state}')
+        # Poll quickly while snapshots are completing, back off while they are not
+        delay = POLL_MIN_SECONDS if finished else min(delay * 2, POLL_MAX_SECONDS)
+
+    return states
+
 def get_indices():
-    # URL of your Elasticsearch instance
-    url = 'https://opensearch01:9200/_cat/indices?v=true&pretty'
+    # One request lists every index with its health and creation date (epoch milliseconds), so every index family
+    # in the retention policy is planned from the same listing and the run time does not grow with the index count
+    path = '/_cat/indices?format=json&h=health,index,creation.date&s=index'
 
     # Make the GET request to Elasticsearch
-    response = requests.get(url, auth=(username, password), verify=False)
+    try:
+        response = client.get(path)
+    except requests.RequestException as e:
+        logging.error(f"Request failed: {e}")
+        return
     # Check that the request was successful
     if response.status_code != 200:
         logging.error(f"Request failed with status code {response.status_code}")
         return
 
-    # Split the response into lines
-    lines = response.text.split("\n")
-
-    # Initialize an empty dictionary to store the indices and their creation date
+    # Initialize an empty list to store the indices and their creation date
     indices = []
 
-    # Loop over each line
-    for line in lines:
-        # Split the line into words
-        words = line.split()
-
-        # If the line has words and the first word is "green", it's an index
-        if words and words[0] == 'green':
-            # The index name is the third word
-            index = words[2]
-
-            # Extract the base name and the rotation number using a regex
-            match = re.match(r"(.*?)_(\d+)", index)
+    # Loop over each index
+    for entry in response.json():
+        index = entry['index']
 
-            # If the index name matches the pattern
-            if match:
-                base_name, rotation_number = match.groups()
+        # Extract the base name and the rotation number using a regex
+        match = re.match(r"(.*?)_(\d+)", index)
 
-                if base_name == 'firewall':
-                    # Get the creation date of the index
-                    response = requests.get(f"https://opensearch01:9200/{index}/_settings", auth=(username, password), verify=False)
-                    creation_date = response.json()[index]['settings']['index']['creation_date']
+        # If the index name matches the pattern
+        if match:
+            base_name, rotation_number = match.groups()
+            created = int(entry['creation.date']) / 1000.0
 
-                    # Convert the creation date to a datetime object
-                    creation_date = datetime.fromtimestamp(int(creation_date) / 1000.0)
+            # Format the creation date in US/Eastern time
+            creation_date_formatted = format_epoch(created, "%Y-%m-%d_%I%M%p").lower()
 
-                    # Convert the datetime object to the desired timezone
-                    creation_date = pytz.utc.localize(creation_date).astimezone(pytz.timezone('US/Eastern'))
-
-                    # Format the datetime object as a string
-                    creation_date_formatted = creation_date.strftime("%Y-%m-%d_%I%M%p").lower()
-
-                    # Add the index to the list as a tuple of base name, rotation number (as an integer), and full index name
-                    indices.append((base_name, int(rotation_number), creation_date_formatted, index))
+            # Add the index to the list as a tuple of base name, rotation number (as an integer), creation date,
+            # full index name, health and creation time (epoch seconds)
+            indices.append((base_name, int(rotation_number), creation_date_formatted, index, entry['health'], created))
 
     # Sort the list of indices
     # This will sort by base name first, then rotation number
-    indices.sort(key=lambda x: x[1])
+    indices.sort(key=lambda x: (x[0], x[1]))
 
     # Return the sorted list of indices
     return indices
 
-indices = get_indices()
+def load_policy(path):
+    """Reads a JSON retention policy: a list of rules, the first rule whose pattern matches an index applies"""
+    with open(path, 'r') as file:
+        policy = json.load(file)
+    if isinstance(policy, dict):
+        policy = policy['rules']
+    for rule in policy:
+        if 'pattern' not in rule:
+            raise ValueError(f"Retention rule without a pattern: {rule}")
+        if rule.get('keep') is None and rule.get('max_age_days') is None:
+            raise ValueError(f"Retention rule for {rule['pattern']} needs keep or max_age_days")
+        if rule.get('keep') is not None and rule['keep'] < 1:
+            raise ValueError(f"Retention rule for {rule['pattern']} must keep at least 1 index")
+        if rule.get('group_size', 1) < 1:
+            raise ValueError(f"Retention rule for {rule['pattern']} needs a group_size of at least 1")
+        rule.setdefault('keep', None)
+        rule.setdefault('max_age_days', None)
+        rule.setdefault('snapshot', True)
+        rule.setdefault('delete', False)
+        rule.setdefault('health', ['green'])
+        rule.setdefault('snapshot_prefix', None)
+    return policy
+
+def plan_retention(indices, policy, snapshots, group_size=1, now=None):
+    """Evaluates the policy over one index listing.
+
+    Indices are grouped into families (base name) per rule. In each family the newest `keep` indices are retained,
+    as long as they are younger than max_age_days; the rest are retired. The newest index of every family is always
+    retained, since it is the one still being written to. A retired index is snapshotted if the rule
+    says so, and deleted if the rule says so, but only once its snapshot is verified when it has to be snapshotted.
+
+    Returns (snapshot groups as [(snapshot name, [indices])], deletions as [(index, snapshot name or None)],
+    {index: (snapshot name, verified)} for retired indices already in the repository).
+    """
+    now = now or time.time()
+    families = {}
+    for base_name, rotation_number, creation_date, index, health, created in indices:
+        for number, rule in enumerate(policy):
+            if fnmatch.fnmatchcase(index, rule['pattern']):
+                if health in rule['health']:
+                    families.setdefault((number, base_name), []).append((creation_date, index, created))
+                break
+
+    groups = []
+    deletions = []
+    covered = {}
+    for (number, base_name), members in sorted(families.items()):
+        rule = policy[number]
+        retained = members if rule['keep'] is None else members[max(len(members) - rule['keep'], 0):]
+        if rule['max_age_days'] is not None:
+            retained = [member for member in retained if now - member[2] < rule['max_age_days'] * 86400]
+        # Never retire the active write index, even in a quiet family whose newest index is past max_age_days
+        if members[-1] not in retained:
+            retained.append(members[-1])
+        retired = [member for member in members if member not in retained]
+
+        pending = []
+        for creation_date, index, created in retired:
+            if not rule['snapshot']:
+                if rule['delete']:
+                    deletions.append((index, None))
+                continue
+            if index not in snapshots:
+                pending.append((creation_date, index))
+                continue
+            covered[index] = snapshots[index]
+            if rule['delete'] and snapshots[index][1]:
+                deletions.append((index, snapshots[index][0]))
+
+        # A single-index snapshot is named after the index's creation date, a group after its first and last.
+        # Rules for other families prefix the name so that snapshots of different families cannot collide.
+        prefix = rule['snapshot_prefix'] if rule['snapshot_prefix'] is not None else f"{base_name}_"
+        size = rule.get('group_size', group_size)
+        for start in range(0, len(pending), size):
+            chunk = pending[start:start + size]
+            snapshot_name = chunk[0][0] if len(chunk) == 1 else f"{chunk[0][0]}-{chunk[-1][0]}"
+            groups.append((prefix + snapshot_name, [index for _, index in chunk]))
+
+    return groups, deletions, covered
 
-# Keep the most recent 9 indices
-indices_to_keep = indices[-9:]
+def get_snapshots():
+    """Return {index: (snapshot name, verified)} for every index already in the repository.
 
-# Create a snapshot for the older indices
-for base_name, rotation_number, creation_date, index in indices:
-    if (base_name, rotation_number, creation_date, index) not in indices_to_keep:
-        if create_snapshot(index, creation_date, (username, password)):
-            logging.info(f"Created snapshot for {base_name}_{rotation_number}: {creation_date}")
-rotation_number}: {creation_date}")
+    A snapshot counts as verified once its state is SUCCESS with no failed shards. Snapshots that are still running
+    are included (unverified) so that their indices are not submitted again.
+    """
+    try:
+        response = client.get(f"/_snapshot/{REPOSITORY}/_all")
+    except requests.RequestException as e:
+        logging.error(f"Failed to list snapshots: {e}")
+        return None
+    if response.status_code != 200:
+        logging.error(f"Failed to list snapshots. Status code: {response.status_code}")
+        return None
+
+    covered = {}
+    for snapshot in response.json()['snapshots']:
+        if snapshot['state'] not in ('SUCCESS', 'IN_PROGRESS'):
+            continue
+        verified = snapshot['state'] == 'SUCCESS' and snapshot.get('shards', {}).get('failed', 0) == 0
+        for index in snapshot['indices']:
+            # Prefer a verified snapshot if the index is in more than one
+            if index not in covered or verified:
+                covered[index] = (snapshot['snapshot'], verified)
+    return covered
+
+def delete_index(index_name):
+    """Deletes an index whose snapshot has been verified"""
+    try:
+        response = client.delete(f"/{index_name}")
+    except requests.RequestException as e:
+        logging.error(f"Failed to delete index {index_name}: {e}")
+        notifier.notify('Index deletion failed', f'Failed to delete index {index_name}: {e}')
+        return False
+    if response.status_code != 200:
+        logging.error(f"Failed to delete index {index_name}. Status code: {response.status_code}")
+        notifier.notify('Index deletion failed', f'Failed to delete index {index_name}. Status code: {response.status_code}')
+        return False
+    return True
+
+def load_ledger(path):
+    """The ledger is a local record of what this script has submitted, verified and deleted"""
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            return json.load(file)
+    return {}
+
+def save_ledger(path, ledger):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(ledger, file, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot and retire older OpenSearch indices according to a retention policy.')
+    parser.add_argument('--policy', help='JSON retention policy covering any number of index families (default: firewall indices only, see --keep)')
+    parser.add_argument('--keep', type=int, default=9, help='Without --policy: number of most recent firewall indices to keep without a snapshot (default: 9)')
+    parser.add_argument('--ledger', default=LEDGER_PATH, help=f'Local ledger of submitted/verified/deleted indices (default: {LEDGER_PATH})')
+    parser.add_argument('--delete-source', action='store_true', help='Without --policy: delete older firewall indices once their snapshot is verified')
+    parser.add_argument('--async', dest='run_async', action='store_true',
+                        help='Submit snapshots without waiting and poll for completion, keeping --max-in-flight running at once')
+    parser.add_argument('--max-in-flight', type=int, default=2, help='Snapshots (with --async) and deletions allowed to run at once (default: 2)')
+    parser.add_argument('--max-wait', type=int, default=6 * 3600, help='Seconds to keep polling with --async (default: 21600)')
+    parser.add_argument('--group-size', type=int, default=1, help='Indices per snapshot, unless a rule sets group_size (default: 1)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the planned snapshots and deletions without running them')
+    args = parser.parse_args()
+    if args.keep < 1 or args.group_size < 1:
+        parser.error('--keep and --group-size must be at least 1')
+
+    if args.policy:
+        policy = load_policy(args.policy)
+    else:
+        # The original behaviour: green firewall indices, snapshot names without a family prefix
+        policy = [{'pattern': 'firewall_[0-9]*', 'keep': args.keep, 'max_age_days': None, 'snapshot': True,
+                   'delete': args.delete_source, 'health': ['green'], 'snapshot_prefix': ''}]
+
+    indices = get_indices()
+    if indices is None:
+        return
+
+    # Reconcile against what the repository already holds, so indices are only ever snapshotted once
+    snapshots = get_snapshots()
+    if snapshots is None:
+        return
+
+    groups, deletions, covered = plan_retention(indices, policy, snapshots, args.group_size)
+    if args.dry_run:
+        for snapshot_name, group in groups:
+            print(f"snapshot {snapshot_name}: {', '.join(group)}")
+        for index, snapshot_name in deletions:
+            print(f"delete {index}" + (f" (in verified snapshot {snapshot_name})" if snapshot_name else ''))
+        return
+
+    ledger = load_ledger(args.ledger)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    try:
+        for index, (snapshot_name, verified) in covered.items():
+            entry = ledger.setdefault(index, {'snapshot': snapshot_name})
+            if verified:
+                entry.setdefault('verified', now)
+            else:
+                logging.info(f"Snapshot {snapshot_name} of {index} is still in progress")
+
+        # Deletions only need an index name, so they share one small pool
+        with ThreadPoolExecutor(max_workers=args.max_in_flight) as executor:
+            for (index, snapshot_name), deleted in zip(deletions, executor.map(delete_index, [index for index, _ in deletions])):
+                if deleted:
+                    logging.info(f"Deleted {index}" + (f"; it is in verified snapshot {snapshot_name}" if snapshot_name else ''))
+                    ledger.setdefault(index, {})['deleted'] = now
+
+        # Every family's snapshots go through the same queue, so the cluster never runs more than --max-in-flight
+        if args.run_async:
+            states = drain_snapshots(groups, args.max_in_flight, args.max_wait)
+            for snapshot_name, group in groups:
+                if states.get(snapshot_name) in ('SUCCESS', 'IN_PROGRESS'):
+                    for index in group:
+                        ledger[index] = {'snapshot': snapshot_name, 'submitted': now}
+        else:
+            for snapshot_name, group in groups:
+                if create_snapshot(','.join(group), snapshot_name):
+                    logging.info(f"Created snapshot {snapshot_name} for {', '.join(group)}")
+                    for index in group:
+                        ledger[index] = {'snapshot': snapshot_name, 'submitted': now}
+    finally:
+        save_ledger(args.ledger, ledger)
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        # Send the digest of this run's failures, if there were any
+        notifier.close()
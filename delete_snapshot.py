@@ -3,105 +3,163 @@
 Script Name: OpenSearch Snapshot deletion management
 Author: Dan Clancey
 Date: 24-Oct-2023
-Version: 1.0
+Version: 1.3
 Description:
     This script automates the management of OpenSearch repositories. 
-    It periodically checks the number of repository snapshots and deletes the oldest one if the count exceeds 170. 
+    It periodically checks the number of repository snapshots and, if the count exceeds 170, deletes the oldest
+    snapshots until it is back at the threshold. Snapshots are ordered by their real start/end times and deleted in
+    batches of several names per request, with a bounded number of requests running at once.
     It uses basic authentication for OpenSearch server requests. 
     The script also features an email notification system using Gmail's SMTP server for alerts in case of failures.
+    Failures are collected during the run and sent as one digest email (notify.py).
 
 Usage:
-    python delete_snapshot.py
+    python delete_snapshot.py [--threshold COUNT] [--batch-size COUNT] [--workers COUNT] [--dry-run]
 
 Requirements:
     - Python 3.x
-    - requests library: for making HTTP requests to the OpenSearch server.
-    - smtplib library: for sending email notifications.
+    - requests library and opensearch_client.py: for making HTTP requests to the OpenSearch server.
+    - smtplib library and notify.py: for sending email notifications.
     - logging library: for logging actions and errors.
     - urllib3 library: for handling HTTP connections.
 
 Notes:
-    - Ensure that the OpenSearch server's URL, along with the username and password, are correctly configured in the script.
+    - Ensure that the OpenSearch server's URL, along with the username and password, are correctly configured in opensearch_client.py
+      (or the OPENSEARCH_NODES/OPENSEARCH_USERNAME/OPENSEARCH_PASSWORD environment variables).
+    - The snapshot repository (my-fs-repository) and the log directory (/var/log/graylog-server) can be changed with
+      OPENSEARCH_REPOSITORY and GRAYLOG_LOG_DIR, e.g. to run against fake_opensearch.py.
     - Update the email sender, recipient, and SMTP authentication details for the email notification functionality.
-    - The script disables SSL warnings (InsecureRequestWarning) from urllib3, which may occur during connections to the OpenSearch server. 
-      This is to prevent log clutter but consider the security implications in a production environment.
+    - The script disables SSL warnings (InsecureRequestWarning) from urllib3, which may occur during connections to the OpenSearch server
+      (opensearch_client.py does this). This is to prevent log clutter but consider the security implications in a production environment.
 ---------------------------------------------------------------
 """
 
 
-import requests
+import argparse
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from urllib3.exceptions import InsecureRequestWarning
 
-# Disable SSL warnings
-requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+import requests
+
+from notify import Notifier
+from opensearch_client import OpenSearchClient
+
+# Log directory and snapshot repository; the environment variables point a test run somewhere else
+LOG_DIR = os.environ.get('GRAYLOG_LOG_DIR', '/var/log/graylog-server')
+REPOSITORY = os.environ.get('OPENSEARCH_REPOSITORY', 'my-fs-repository')
 
 # Set up logging
 logging.basicConfig(
-    filename='/var/log/graylog-server/repository_management.log',
+    filename=os.path.join(LOG_DIR, 'repository_management.log'),
     level=logging.INFO,
     format='%(asctime)s %(levelname)s: %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-username = 'admin' # update with OS username
-password = 'password' # update with OS password
-auth = (username, password)
-
-def send_email(subject, body, to, gmail_user, gmail_pwd):
-    msg = MIMEText(body)
-    msg['Subject'] = subject
-    msg['From'] = gmail_user
-    msg['To'] = to
-
-    try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.ehlo()
-        server.login(gmail_user, gmail_pwd)
-        server.send_message(msg)
-        server.close()
-        logging.info('Email sent!')
-    except Exception as e:
-        logging.error(f'Failed to send email: {e}')
+# Nodes and credentials are configured in opensearch_client.py (or OPENSEARCH_* environment variables)
+client = OpenSearchClient()
 
+# Failures are queued during the run and emailed as one digest at the end (see notify.py)
+notifier = Notifier('OpenSearch snapshot deletion failures', 'recipient@email.com', 'sender@email.com', 'sender password') # update recipient email, sender email/password
 
 def get_repositories():
-    url = "https://opensearch01:9200/_cat/snapshots/my-fs-repository"
-    response = requests.get(url, auth=auth, verify=False)
+    """Returns [(snapshot name, start epoch, end epoch, status)] for the repository, oldest first.
+
+    The JSON listing gives the real start/end times, so the order does not depend on how the snapshots are named
+    (names like 2023-06-12_0130pm use a 12-hour clock and do not sort chronologically as strings).
+    """
+    try:
+        response = client.get(f"/_cat/snapshots/{REPOSITORY}?format=json&h=id,status,start_epoch,end_epoch")
+    except requests.RequestException as e:
+        logging.error(f"Failed to get repositories: {e}")
+        return None
     if response.status_code != 200:
         logging.error(f"Failed to get repositories. Status code: {response.status_code}")
         return None
-    repos = response.text.strip().split('\n')
-    return [(repo.split()[0], repo) for repo in repos]
+    repos = [(repo['id'], int(repo['start_epoch']), int(repo['end_epoch'] or 0), repo['status']) for repo in response.json()]
+    repos.sort(key=lambda x: (x[1], x[2]))
+    return repos
 
-def delete_oldest_repository(oldest_repo_name):
-    url = f"https://opensearch01:9200/_snapshot/my-fs-repository/{oldest_repo_name}"
-    response = requests.delete(url, auth=auth, verify=False)
-    if response.status_code != 200:
-        logging.error(f"Failed to delete {oldest_repo_name}. Status code: {response.status_code}")
-        send_email(
-            'Repository Deletion Failed',
-            f'Failed to delete {oldest_repo_name}. Status code: {response.status_code}',
-            'recipient@email.com', # update with recipient email
-            'sender@email.com', # update with sender email
-            'senderpassword' # update with sender password
-        )
-    else:
-        logging.info(f"Deleted oldest snapshot: {oldest_repo_name}")
+def multi_delete_unsupported(response, repo_names):
+    """True if a multi-snapshot delete failed because the cluster only takes one name per request.
+
+    Such clusters reject the comma-separated list as a snapshot name, or look it up as one snapshot and report that
+    whole name missing. Any other error (a snapshot running, one of the names missing, ...) is a real failure.
+    """
+    try:
+        error = response.json()['error']
+        error_type, reason = error['type'], error.get('reason', '')
+    except (ValueError, KeyError, TypeError):
+        return False
+    if error_type == 'invalid_snapshot_name_exception':
+        return True
+    return error_type == 'snapshot_missing_exception' and f":{','.join(repo_names)}]" in reason
+
+def delete_repositories(repo_names):
+    """Deletes one or more snapshots in a single request. Returns the names that could not be deleted."""
+    # Deleting a batch can take a while on a large repository
+    try:
+        response = client.delete(f"/_snapshot/{REPOSITORY}/{','.join(repo_names)}", timeout=(5, 600))
+    except requests.RequestException as e:
+        # Not sent again: the cluster may still be deleting them, and the next run picks up whatever is left
+        logging.error(f"Failed to delete {', '.join(repo_names)}: {e}")
+        notifier.notify('Repository Deletion Failed', f'Failed to delete {", ".join(repo_names)}: {e}')
+        return list(repo_names)
+    if response.status_code == 200:
+        logging.info(f"Deleted snapshots: {', '.join(repo_names)}")
+        return []
+    if len(repo_names) > 1 and response.status_code in (400, 404) and multi_delete_unsupported(response, repo_names):
+        # Older clusters only take one snapshot name per delete
+        logging.info(f"Multi-snapshot delete not accepted (status code {response.status_code}), deleting one at a time")
+        return [name for repo_name in repo_names for name in delete_repositories([repo_name])]
+    logging.error(f"Failed to delete {', '.join(repo_names)}. Status code: {response.status_code}")
+    notifier.notify(
+        'Repository Deletion Failed',
+        f'Failed to delete {", ".join(repo_names)}. Status code: {response.status_code}'
+    )
+    return list(repo_names)
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return number
 
 def main():
+    parser = argparse.ArgumentParser(description='Delete the oldest OpenSearch snapshots down to a threshold.')
+    parser.add_argument('--threshold', type=int, default=170, help='Number of snapshots to keep (default: 170)')
+    parser.add_argument('--batch-size', type=positive_int, default=10, help='Snapshots per delete request (default: 10)')
+    parser.add_argument('--workers', type=positive_int, default=2, help='Delete requests running at once (default: 2)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the snapshots that would be deleted')
+    args = parser.parse_args()
+
     repos = get_repositories()
     if repos is None:
         return
 
-    if len(repos) > 170:
-        # Sorting repositories by name (which is date formatted)
-        repos.sort(key=lambda x: x[0])
-        oldest_repo_name, _ = repos[0]
-        delete_oldest_repository(oldest_repo_name)
-    else:
+    overflow = len(repos) - args.threshold
+    if overflow <= 0:
         logging.info("Snapshot count is below threshold. No action taken")
+        return
+
+    # Delete the whole overflow, oldest first; snapshots that are still running are left alone
+    oldest = [name for name, _, _, status in repos if status != 'IN_PROGRESS'][:overflow]
+    if args.dry_run:
+        print('\n'.join(oldest))
+        return
+    logging.info(f"{len(repos)} snapshots, {overflow} over the threshold of {args.threshold}; deleting {len(oldest)}")
+
+    batches = [oldest[start:start + args.batch_size] for start in range(0, len(oldest), args.batch_size)]
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        failed = [name for names in executor.map(delete_repositories, batches) for name in names]
+    if failed:
+        logging.error(f"{len(failed)} of {len(oldest)} snapshots could not be deleted")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # Send the digest of this run's failures, if there were any
+        notifier.close()
@@ -0,0 +1,488 @@
+"""
+---------------------------------------------------------------
+Script Name: Fake OpenSearch Server
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Local stand-in for the parts of the OpenSearch API that create_snapshot.py and delete_snapshot.py use, so both
+    scripts can be run at realistic scale without touching a real cluster:
+
+        GET    /_cat/indices[/PATTERN]              (format=json, h=, s=)
+        GET    /INDEX/_settings                      (comma-separated names and wildcards)
+        DELETE /INDEX
+        PUT    /_snapshot/REPO/SNAPSHOT              (wait_for_completion, default false as on a real cluster)
+        GET    /_snapshot/REPO/_all | NAMES
+        GET    /_snapshot/REPO/NAMES/_status
+        DELETE /_snapshot/REPO/NAMES                 (comma-separated names)
+        GET    /_cat/snapshots/REPO                  (format=json, h=, s=)
+        GET    /_cluster/health
+        GET    /_fake/stats, POST /_fake/reset       (request counts per endpoint)
+
+    The cluster is filled with synthetic index families (firewall_N, graylog_N, ...) created --rotation-hours
+    apart, and with old snapshots of rotations that have already been removed. Snapshots run in the background for
+    --snapshot-seconds per index; more than --max-concurrent-snapshots at once are refused with
+    concurrent_snapshot_execution_exception. Every request waits --latency milliseconds (with jitter), a
+    snapshot delete request takes --delete-seconds, and --error-rate of the requests fail with a 503. With
+    --single-delete, a comma-separated delete is looked up as one snapshot name and fails with
+    snapshot_missing_exception, as on clusters that only delete one snapshot per request.
+
+    Plain HTTP, any credentials are accepted. Point the scripts at it with OPENSEARCH_NODES=http://127.0.0.1:9200.
+
+Usage:
+    python fake_opensearch.py [--port PORT] [--indices COUNT] [--snapshots COUNT] [--latency MS] [--error-rate RATE]
+                              [--snapshot-seconds SECONDS] [--delete-seconds SECONDS] [--single-delete]
+
+Examples:
+    python fake_opensearch.py --indices 5000 --snapshots 3000 --latency 20 --error-rate 0.01
+    OPENSEARCH_NODES=http://127.0.0.1:9200 GRAYLOG_LOG_DIR=/tmp python create_snapshot.py --dry-run
+
+Requirements:
+    - Python 3.x
+---------------------------------------------------------------
+"""
+
+import argparse
+import fnmatch
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_FAMILIES = ['firewall', 'graylog', 'gl-events', 'gl-system-events']
+DEFAULT_REPOSITORY = 'my-fs-repository'
+RUNNING = 'IN_PROGRESS'
+
+
+class FakeCluster:
+    """In-memory indices and snapshot repositories. All access goes through the lock."""
+
+    def __init__(self, indices=2000, snapshots=1000, families=DEFAULT_FAMILIES, repositories=(DEFAULT_REPOSITORY,),
+                 rotation_hours=24, yellow_rate=0.02, snapshot_seconds=0.05, max_concurrent_snapshots=1000,
+                 seed=1, now=None):
+        self.lock = threading.Lock()
+        self.snapshot_seconds = snapshot_seconds
+        self.max_concurrent_snapshots = max_concurrent_snapshots
+        self.indices = {}
+        self.repositories = {name: {} for name in repositories}
+        random_state = random.Random(seed)
+        now = now or time.time()
+
+        # Each family's newest rotation was created now; older ones rotation_hours apart
+        per_family = [indices // len(families) + (number < indices % len(families)) for number in range(len(families))]
+        first_rotation = {}
+        for family, count in zip(families, per_family):
+            first_rotation[family] = snapshots // len(families) + 1
+            for age in range(count):
+                rotation = first_rotation[family] + count - 1 - age
+                self.indices[f"{family}_{rotation}"] = {
+                    'health': 'yellow' if random_state.random() < yellow_rate else 'green',
+                    'created': now - (age * rotation_hours + random_state.random()) * 3600,
+                    'uuid': uuid.UUID(int=random_state.getrandbits(128)).hex,
+                }
+
+        # Old snapshots of the rotations before the oldest index still in the cluster, one index each
+        repository = self.repositories[repositories[0]]
+        oldest = min((index['created'] for index in self.indices.values()), default=now)
+        for number in range(snapshots):
+            family = families[number % len(families)]
+            rotation = first_rotation[family] - 1 - number // len(families)
+            start = oldest - (number + 1) * rotation_hours * 3600 / len(families)
+            name = f"{family}_{datetime.fromtimestamp(start):%Y-%m-%d_%I%M%p}".lower()
+            while name in repository:
+                name += 'x'
+            repository[name] = {'indices': [f"{family}_{rotation}"], 'state': 'SUCCESS', 'start': start,
+                                'end': start + 60, 'uuid': uuid.UUID(int=random_state.getrandbits(128)).hex}
+
+    def refresh(self, repository):
+        """Finish the snapshots whose time is up."""
+        now = time.time()
+        for snapshot in repository.values():
+            if snapshot['state'] == RUNNING and now >= snapshot['finish']:
+                snapshot['state'] = 'SUCCESS'
+                snapshot['end'] = snapshot['finish']
+
+    def running(self):
+        return sum(snapshot['state'] == RUNNING for repository in self.repositories.values()
+                   for snapshot in repository.values())
+
+
+def error(status, error_type, reason):
+    return status, {'error': {'root_cause': [{'type': error_type, 'reason': reason}], 'type': error_type,
+                              'reason': reason}, 'status': status}
+
+
+def cat_rows(rows, query):
+    """Format _cat rows like OpenSearch: JSON with format=json, otherwise a text table; h= picks columns, s= sorts."""
+    columns = query['h'][0].split(',') if 'h' in query else list(rows[0]) if rows else []
+    if 's' in query:
+        for key in reversed(query['s'][0].split(',')):
+            column, _, order = key.partition(':')
+            rows.sort(key=lambda row: row.get(column, ''), reverse=order == 'desc')
+    rows = [{column: row.get(column) for column in columns} for row in rows]
+    if query.get('format', [''])[0] == 'json':
+        return 200, rows
+    lines = [' '.join(columns)] if 'v' in query else []
+    lines += [' '.join(str(row[column]) for column in columns) for row in rows]
+    return 200, '\n'.join(lines) + '\n'
+
+
+class FakeOpenSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without TCP_NODELAY every keep-alive response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def dispatch(self, method):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'null') if length else None
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = parse_qs(url.query, keep_blank_values=True)
+
+        route, handler = self.route(method, parts)
+        server.count(f"{method} {route}")
+        time.sleep(server.delay())
+        if route.startswith('/_fake'):
+            status, payload = handler(parts, query, body)
+        elif server.fail():
+            server.count('injected 503')
+            status, payload = error(503, 'unavailable_shards_exception', 'injected failure')
+        else:
+            with server.cluster.lock:
+                status, payload = handler(parts, query, body)
+
+        if isinstance(payload, str):
+            data, content_type = payload.encode('utf-8'), 'text/plain; charset=UTF-8'
+        else:
+            data, content_type = json.dumps(payload).encode('utf-8'), 'application/json; charset=UTF-8'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def route(self, method, parts):
+        """Return (endpoint label for the statistics, handler)."""
+        head = parts[0] if parts else ''
+        routes = {
+            ('GET', '_cat', 'indices'): ('/_cat/indices', self.cat_indices),
+            ('GET', '_cat', 'snapshots'): ('/_cat/snapshots/REPO', self.cat_snapshots),
+            ('GET', '_cluster', 'health'): ('/_cluster/health', self.cluster_health),
+            ('GET', '_fake', 'stats'): ('/_fake/stats', self.fake_stats),
+            ('POST', '_fake', 'reset'): ('/_fake/reset', self.fake_reset),
+        }
+        if len(parts) >= 2 and (method, head, parts[1]) in routes:
+            return routes[(method, head, parts[1])]
+        if head == '_snapshot' and len(parts) >= 3:
+            if method == 'GET' and len(parts) == 4 and parts[3] == '_status':
+                return '/_snapshot/REPO/NAMES/_status', self.snapshot_status
+            if method == 'GET' and len(parts) == 3:
+                return '/_snapshot/REPO/NAMES', self.get_snapshots
+            if method in ('PUT', 'POST') and len(parts) == 3:
+                return '/_snapshot/REPO/SNAPSHOT', self.create_snapshot
+            if method == 'DELETE' and len(parts) == 3:
+                return '/_snapshot/REPO/NAMES', self.delete_snapshots
+        if head and not head.startswith('_'):
+            if method == 'GET' and len(parts) == 2 and parts[1] == '_settings':
+                return '/INDEX/_settings', self.index_settings
+            if method == 'DELETE' and len(parts) == 1:
+                return '/INDEX', self.delete_index
+        return '/' + '/'.join(parts), self.not_found
+
+    def not_found(self, parts, query, body):
+        return error(400, 'illegal_argument_exception', f"no handler found for uri [{self.path}]")
+
+    def repository(self, name):
+        repository = self.server.cluster.repositories.get(name)
+        if repository is not None:
+            self.server.cluster.refresh(repository)
+        return repository
+
+    def match_indices(self, expression):
+        indices = self.server.cluster.indices
+        names = []
+        for pattern in expression.split(','):
+            if pattern in ('_all', '*'):
+                names.extend(indices)
+            elif '*' in pattern or '?' in pattern:
+                names.extend(name for name in indices if fnmatch.fnmatchcase(name, pattern))
+            elif pattern in indices:
+                names.append(pattern)
+            else:
+                return None, pattern
+        return sorted(set(names)), None
+
+    def cat_indices(self, parts, query, body):
+        names, missing = self.match_indices(parts[2]) if len(parts) > 2 else (sorted(self.server.cluster.indices), None)
+        if names is None:
+            return error(404, 'index_not_found_exception', f"no such index [{missing}]")
+        rows = []
+        for name in names:
+            index = self.server.cluster.indices[name]
+            rows.append({'health': index['health'], 'status': 'open', 'index': name, 'uuid': index['uuid'],
+                         'pri': '1', 'rep': '0', 'docs.count': '0', 'store.size': '1mb',
+                         'creation.date': str(int(index['created'] * 1000))})
+        return cat_rows(rows, query)
+
+    def index_settings(self, parts, query, body):
+        names, missing = self.match_indices(parts[0])
+        if names is None:
+            return error(404, 'index_not_found_exception', f"no such index [{missing}]")
+        settings = {}
+        for name in names:
+            index = self.server.cluster.indices[name]
+            settings[name] = {'settings': {'index': {
+                'creation_date': str(int(index['created'] * 1000)), 'number_of_shards': '1',
+                'number_of_replicas': '0', 'uuid': index['uuid'], 'provided_name': name}}}
+        return 200, settings
+
+    def delete_index(self, parts, query, body):
+        names, missing = self.match_indices(parts[0])
+        if names is None:
+            return error(404, 'index_not_found_exception', f"no such index [{missing}]")
+        for name in names:
+            del self.server.cluster.indices[name]
+        return 200, {'acknowledged': True}
+
+    def snapshot_info(self, name, snapshot, repository_name):
+        return {'snapshot': name, 'uuid': snapshot['uuid'], 'repository': repository_name,
+                'indices': snapshot['indices'], 'state': snapshot['state'],
+                'start_time_in_millis': int(snapshot['start'] * 1000),
+                'end_time_in_millis': int(snapshot['end'] * 1000) if snapshot['state'] != RUNNING else 0,
+                'shards': {'total': len(snapshot['indices']), 'failed': 0,
+                           'successful': len(snapshot['indices']) if snapshot['state'] == 'SUCCESS' else 0}}
+
+    def find_snapshots(self, repository, expression):
+        if expression in ('_all', '*'):
+            return list(repository), None
+        names = []
+        for pattern in expression.split(','):
+            if '*' in pattern:
+                names.extend(name for name in repository if fnmatch.fnmatchcase(name, pattern))
+            elif pattern in repository:
+                names.append(pattern)
+            else:
+                return None, pattern
+        return names, None
+
+    def missing_repository(self, name):
+        return error(404, 'repository_missing_exception', f"[{name}] missing")
+
+    def get_snapshots(self, parts, query, body):
+        repository = self.repository(parts[1])
+        if repository is None:
+            return self.missing_repository(parts[1])
+        names, missing = self.find_snapshots(repository, parts[2])
+        if names is None:
+            return error(404, 'snapshot_missing_exception', f"[{parts[1]}:{missing}] is missing")
+        return 200, {'snapshots': [self.snapshot_info(name, repository[name], parts[1]) for name in names]}
+
+    def snapshot_status(self, parts, query, body):
+        repository = self.repository(parts[1])
+        if repository is None:
+            return self.missing_repository(parts[1])
+        names, missing = self.find_snapshots(repository, parts[2])
+        if names is None:
+            return error(404, 'snapshot_missing_exception', f"[{parts[1]}:{missing}] is missing")
+        statuses = []
+        for name in names:
+            snapshot = repository[name]
+            done = len(snapshot['indices']) if snapshot['state'] == 'SUCCESS' else 0
+            statuses.append({'snapshot': name, 'repository': parts[1], 'uuid': snapshot['uuid'],
+                             'state': 'STARTED' if snapshot['state'] == RUNNING else snapshot['state'],
+                             'include_global_state': False,
+                             'shards_stats': {'initializing': 0, 'started': len(snapshot['indices']) - done,
+                                              'finalizing': 0, 'done': done, 'failed': 0,
+                                              'total': len(snapshot['indices'])}})
+        return 200, {'snapshots': statuses}
+
+    def create_snapshot(self, parts, query, body):
+        cluster = self.server.cluster
+        repository = self.repository(parts[1])
+        if repository is None:
+            return self.missing_repository(parts[1])
+        name = parts[2]
+        if name in repository:
+            return error(400, 'invalid_snapshot_name_exception',
+                         f"[{parts[1]}:{name}] Invalid snapshot name [{name}], snapshot with the same name already exists")
+        if cluster.running() >= cluster.max_concurrent_snapshots:
+            return error(503, 'concurrent_snapshot_execution_exception',
+                         f"[{parts[1]}:{name}] cannot start another operation, already running "
+                         f"{cluster.max_concurrent_snapshots} operations")
+        body = body or {}
+        requested = body.get('indices', '_all')
+        if isinstance(requested, list):
+            requested = ','.join(requested)
+        names = []
+        for pattern in requested.split(','):
+            found, missing = self.match_indices(pattern)
+            if found is None and not body.get('ignore_unavailable'):
+                return error(404, 'index_not_found_exception', f"no such index [{missing}]")
+            names.extend(found or [])
+        start = time.time()
+        snapshot = {'indices': sorted(set(names)), 'state': RUNNING, 'start': start, 'end': 0,
+                    'finish': start + cluster.snapshot_seconds * len(set(names)), 'uuid': uuid.uuid4().hex}
+        repository[name] = snapshot
+
+        if query.get('wait_for_completion', ['false'])[0] != 'true':
+            return 200, {'accepted': True}
+        # Wait outside the lock so other requests keep being served
+        cluster.lock.release()
+        try:
+            time.sleep(max(snapshot['finish'] - time.time(), 0))
+        finally:
+            cluster.lock.acquire()
+        self.server.cluster.refresh(repository)
+        return 200, {'snapshot': self.snapshot_info(name, snapshot, parts[1])}
+
+    def delete_snapshots(self, parts, query, body):
+        server = self.server
+        repository = self.repository(parts[1])
+        if repository is None:
+            return self.missing_repository(parts[1])
+        if server.single_delete and ',' in parts[2]:
+            # Clusters without multi-snapshot deletes look the whole list up as one snapshot name
+            return error(404, 'snapshot_missing_exception', f"[{parts[1]}:{parts[2]}] is missing")
+        names, missing = self.find_snapshots(repository, parts[2])
+        if names is None:
+            return error(404, 'snapshot_missing_exception', f"[{parts[1]}:{missing}] is missing")
+        for name in names:
+            del repository[name]
+        # Rewriting the repository metadata is what makes a delete slow, once per request
+        server.cluster.lock.release()
+        try:
+            time.sleep(server.delete_seconds)
+        finally:
+            server.cluster.lock.acquire()
+        return 200, {'acknowledged': True}
+
+    def cat_snapshots(self, parts, query, body):
+        repository = self.repository(parts[2]) if len(parts) > 2 else None
+        if repository is None:
+            return self.missing_repository(parts[2] if len(parts) > 2 else '')
+        rows = []
+        for name, snapshot in repository.items():
+            end = int(snapshot['end']) if snapshot['state'] != RUNNING else 0
+            rows.append({'id': name, 'status': snapshot['state'], 'start_epoch': str(int(snapshot['start'])),
+                         'start_time': f"{datetime.fromtimestamp(snapshot['start']):%H:%M:%S}",
+                         'end_epoch': str(end), 'end_time': f"{datetime.fromtimestamp(end):%H:%M:%S}",
+                         'duration': f"{max(end - int(snapshot['start']), 0)}s",
+                         'indices': str(len(snapshot['indices'])), 'successful_shards': str(len(snapshot['indices'])),
+                         'failed_shards': '0', 'total_shards': str(len(snapshot['indices']))})
+        return cat_rows(rows, query)
+
+    def cluster_health(self, parts, query, body):
+        indices = self.server.cluster.indices.values()
+        status = 'yellow' if any(index['health'] == 'yellow' for index in indices) else 'green'
+        return 200, {'cluster_name': 'fake-opensearch', 'status': status, 'number_of_nodes': 1,
+                     'active_primary_shards': len(indices)}
+
+    def fake_stats(self, parts, query, body):
+        with self.server.stats_lock:
+            return 200, dict(self.server.stats)
+
+    def fake_reset(self, parts, query, body):
+        with self.server.stats_lock:
+            self.server.stats.clear()
+        return 200, {'acknowledged': True}
+
+
+class FakeOpenSearch(ThreadingHTTPServer):
+    """HTTP server for a FakeCluster, with request latency, injected errors and request counts."""
+
+    daemon_threads = True
+
+    def __init__(self, address, cluster, latency=0.0, jitter=0.5, error_rate=0.0, delete_seconds=0.0,
+                 single_delete=False, seed=1):
+        super().__init__(address, FakeOpenSearchHandler)
+        self.cluster = cluster
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.delete_seconds = delete_seconds
+        self.single_delete = single_delete
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def delay(self):
+        with self.stats_lock:
+            return self.latency * (1 + self.jitter * (2 * self.random.random() - 1))
+
+    def fail(self):
+        with self.stats_lock:
+            return self.random.random() < self.error_rate
+
+    def start(self):
+        """Serve from a background thread (for benchmarks); stop with shutdown()."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a fake OpenSearch cluster for testing the snapshot scripts.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=9200, help='Port to listen on (default: 9200)')
+    parser.add_argument('--indices', type=int, default=2000, help='Synthetic indices (default: 2000)')
+    parser.add_argument('--snapshots', type=int, default=1000, help='Existing snapshots in the repository (default: 1000)')
+    parser.add_argument('--families', default=','.join(DEFAULT_FAMILIES), help='Comma-separated index families')
+    parser.add_argument('--repository', default=DEFAULT_REPOSITORY, help=f'Snapshot repository name (default: {DEFAULT_REPOSITORY})')
+    parser.add_argument('--rotation-hours', type=float, default=24, help='Hours between index rotations (default: 24)')
+    parser.add_argument('--latency', type=float, default=0, help='Milliseconds added to every request (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with a 503 (default: 0)')
+    parser.add_argument('--snapshot-seconds', type=float, default=0.05, help='Snapshot run time per index (default: 0.05)')
+    parser.add_argument('--delete-seconds', type=float, default=0, help='Time taken by each snapshot delete request (default: 0)')
+    parser.add_argument('--max-concurrent-snapshots', type=int, default=1000, help='Running snapshots allowed at once (default: 1000)')
+    parser.add_argument('--single-delete', action='store_true', help='Refuse deletes of more than one snapshot, like older clusters')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic data')
+    args = parser.parse_args()
+
+    cluster = FakeCluster(args.indices, args.snapshots, args.families.split(','), [args.repository],
+                          args.rotation_hours, snapshot_seconds=args.snapshot_seconds,
+                          max_concurrent_snapshots=args.max_concurrent_snapshots, seed=args.seed)
+    server = FakeOpenSearch((args.host, args.port), cluster, args.latency / 1000.0, error_rate=args.error_rate,
+                            delete_seconds=args.delete_seconds, single_delete=args.single_delete, seed=args.seed)
+    print(f"Serving {len(cluster.indices)} indices and {args.snapshots} snapshots on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for key, count in sorted(server.stats.items()):
+            print(f"{count:>8}  {key}")
+
+
+if __name__ == '__main__':
+    main()
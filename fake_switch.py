@@ -0,0 +1,642 @@
+"""
+---------------------------------------------------------------
+Script Name: Fake Switch Fleet
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.1
+Description:
+    Simulates a fleet of Cisco IOS switches on loopback addresses, over SSH (paramiko) and Telnet, so that
+    BulkFetch-SwitchConfig.py, parse_cdp_neighbors.py and parse_cdp_neighbors_telnet.py can be load-tested
+    without real gear.
+
+    Every device gets its own loopback address (127.0.1.1, 127.0.1.2, ... by default), all listening on the same
+    SSH and Telnet ports (2222 and 2323 by default, passed to the collectors with -ssh_port/-telnet_port).
+    Linux routes all of 127.0.0.0/8 to the loopback interface; on macOS the extra addresses have to be added first
+    (sudo ifconfig lo0 alias 127.0.1.2 up, ...).
+
+    Devices answer "show running-config" (a generated config of --config-lines lines), "show cdp neighbors
+    detail", "show version", "terminal length N" and "exit", with IOS-style abbreviations ("sh run"). The CDP
+    neighbors link the devices into a tree (--fanout children per switch), so a --crawl from the first device
+    finds the whole fleet, and every device also reports --neighbors phones and access points.
+
+    Telnet follows an IOS login: option negotiation, a banner (--banner: none, motd, or quirky with blank lines,
+    prompt-like characters and "Password:" inside a sentence), "User Access Verification" and configurable
+    Username/Password prompts. Output is paged with --More-- until "terminal length 0"
+    (--ignore-terminal-length keeps paging anyway). SSH serves the same CLI in an interactive shell, with an
+    optional pre-login banner; like IOS, each SSH login gets one session channel, so a client that opens an exec
+    channel per command gets its first command answered and the rest refused.
+
+    Behaviour is tunable: --latency before every prompt and output, --rate to limit the bytes per second of each
+    session, --telnet-only for the share of devices without SSH, and --failure-rate for the share of connections
+    that fail in one of the --failure-modes: refuse (closed straight away), hang (never answers), drop (closed in
+    the middle of an output) or auth (the login is rejected).
+
+Usage:
+    python fake_switch.py [--devices COUNT] [--base-ip IP] [--ssh-port PORT] [--telnet-port PORT]
+                          [--config-lines COUNT] [--neighbors COUNT] [--latency MS] [--failure-rate RATE]
+
+Examples:
+    python fake_switch.py --devices 200 --latency 50 --failure-rate 0.02
+    python BulkFetch-SwitchConfig.py -file fleet.txt -username admin -password admin -ssh_port 2222 -telnet_port 2323
+
+    The addresses of the devices are written to --list (default: fake_switches.txt) for -file.
+
+Requirements:
+    - Python 3.x
+    - paramiko library for SSH (without it only Telnet is served)
+---------------------------------------------------------------
+"""
+
+import argparse
+import functools
+import ipaddress
+import logging
+import random
+import resource
+import selectors
+import socket
+import threading
+import time
+from collections import Counter
+
+try:
+    import paramiko
+except ImportError:  # Telnet-only simulation
+    paramiko = None
+
+# Clients hanging up mid-session are expected; keep paramiko's server-side errors off the console
+logging.getLogger('fake_switch.ssh').addHandler(logging.NullHandler())
+logging.getLogger('fake_switch.ssh').propagate = False
+
+DEFAULT_BASE_IP = '127.0.1.1'
+DEFAULT_SSH_PORT = 2222
+DEFAULT_TELNET_PORT = 2323
+FAILURE_MODES = ('refuse', 'hang', 'drop', 'auth')
+# Output is written in chunks of this size, so --rate and drops happen part way through
+CHUNK_SIZE = 4096
+# How long an idle or hanging session is kept open
+IDLE_SECONDS = 300
+
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+ECHO, SUPPRESS_GO_AHEAD = 1, 3
+MORE = b' --More-- '
+MORE_ERASE = b'\x08' * len(MORE) + b' ' * len(MORE) + b'\x08' * len(MORE)
+
+BANNERS = {
+    'none': '',
+    'motd': ('**************************************************************************\r\n'
+             '* This system is for authorized use only. All login: attempts and       *\r\n'
+             '* activity are logged. Disconnect now if you are not an authorized user. *\r\n'
+             '**************************************************************************'),
+    # Blank lines, prompt-like characters and a Password: inside a sentence, sent line by line
+    'quirky': ('\r\n\r\n#####  N E T W O R K   O P E R A T I O N S  #####\r\n'
+               'Contact noc@example.com (ext. 4357) >> before making changes\r\n'
+               'Password: policy requires 90-day rotation.\r\n'
+               '-> Use your own account, not a shared one <-\r\n'),
+}
+
+COMMANDS = [
+    ('show', 'running-config'),
+    ('show', 'cdp', 'neighbors', 'detail'),
+    ('show', 'version'),
+    ('terminal', 'length'),
+    ('exit',),
+    ('logout',),
+    ('quit',),
+]
+INVALID_INPUT = "                ^\r\n% Invalid input detected at '^' marker.\r\n"
+
+PHONE_PLATFORMS = ['Cisco IP Phone 8845', 'Cisco IP Phone 7841', 'cisco AIR-AP2802I-B-K9', 'cisco C9120AXI-B']
+SWITCH_PLATFORMS = ['cisco WS-C2960X-48FPD-L', 'cisco WS-C3850-48P', 'cisco C9300-48P']
+
+
+def match_command(line):
+    """Resolve an IOS command with abbreviations. Returns (full command words, arguments) or (None, None)."""
+    words = line.split()
+    if not words:
+        return None, None
+    for command in COMMANDS:
+        typed = words[:len(command)]
+        if len(typed) == len(command) and all(known.startswith(word.lower()) for word, known in zip(typed, command)):
+            return command, words[len(command):]
+    return None, None
+
+
+class FakeDevice:
+    """One simulated switch: its address, hostname, neighbors in the fleet and the outputs it serves."""
+
+    def __init__(self, number, ip, hostname, ssh=True, config_lines=2000, neighbors=40, seed=1):
+        self.number = number
+        self.ip = ip
+        self.hostname = hostname
+        self.ssh = ssh
+        self.config_lines = config_lines
+        self.neighbors = neighbors
+        self.seed = seed
+        self.links = []  # [(FakeDevice, local interface, remote interface)]
+
+    def output(self, command):
+        if command == ('show', 'running-config'):
+            return render_config(self)
+        if command == ('show', 'cdp', 'neighbors', 'detail'):
+            return render_cdp(self)
+        if command == ('show', 'version'):
+            return render_version(self)
+        return ''
+
+
+def build_fleet(count, base_ip=DEFAULT_BASE_IP, fanout=4, telnet_only=0.0, config_lines=2000, neighbors=40, seed=1):
+    """Return count devices with consecutive addresses, linked into a tree with fanout children per switch."""
+    rng = random.Random(seed)
+    first = ipaddress.ip_address(base_ip)
+    devices = [FakeDevice(number, str(first + number), f"sw-{number + 1:04d}", rng.random() >= telnet_only,
+                          config_lines, neighbors, seed * 100003 + number) for number in range(count)]
+    for number, device in enumerate(devices[1:], 1):
+        parent = devices[(number - 1) // fanout]
+        uplink = f"TenGigabitEthernet1/1/{1 + (number - 1) % fanout}"
+        device.links.append((parent, 'TenGigabitEthernet1/1/1', uplink))
+        parent.links.append((device, uplink, 'TenGigabitEthernet1/1/1'))
+    return devices
+
+
+def write_lines(lines):
+    return '\r\n'.join(lines) + '\r\n'
+
+
+@functools.lru_cache(maxsize=64)
+def render_config(device):
+    rng = random.Random(device.seed)
+    lines = ['Building configuration...', '', f"Current configuration : {device.config_lines * 30} bytes", '!',
+             f"! Last configuration change at {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00 UTC Mon Oct 12 2026",
+             '!', 'version 15.2', 'no service pad', 'service timestamps debug datetime msec',
+             'service timestamps log datetime msec', 'service password-encryption', '!', f"hostname {device.hostname}",
+             '!', 'boot-start-marker', 'boot-end-marker', '!', 'enable secret 5 $1$abcd$0123456789abcdefghij', '!',
+             'username admin privilege 15 secret 5 $1$efgh$0123456789abcdefghij', 'aaa new-model', '!',
+             'ip domain-name example.com', 'spanning-tree mode rapid-pvst', '!']
+    for vlan in range(10, 10 + min(200, device.config_lines // 50)):
+        lines += [f"vlan {vlan}", f" name VLAN{vlan:04d}", '!']
+    interface = 0
+    # Access ports fill the rest of the config, 1/0/1 to 1/0/48 on every stack member
+    while len(lines) < device.config_lines - 20:
+        member, port = interface // 48 + 1, interface % 48 + 1
+        lines += [f"interface GigabitEthernet{member}/0/{port}",
+                  f" description user-port-{member}-{port:02d}",
+                  f" switchport access vlan {rng.randint(10, 60)}",
+                  ' switchport mode access',
+                  ' switchport voice vlan 100',
+                  ' spanning-tree portfast',
+                  '!']
+        interface += 1
+    lines += ['interface Vlan1', ' ip address ' + device.ip + ' 255.0.0.0', '!', 'ip http server',
+              'ip http secure-server', '!', 'snmp-server community public RO', '!', 'line con 0', ' logging synchronous',
+              'line vty 0 4', ' transport input ssh telnet', 'line vty 5 15', ' transport input ssh telnet', '!', 'end']
+    return write_lines(lines)
+
+
+def cdp_record(device_id, address, platform, capabilities, interface, port_id, version):
+    return ['-------------------------', f"Device ID: {device_id}", 'Entry address(es): ', f"  IP address: {address}",
+            f"Platform: {platform},  Capabilities: {capabilities} ",
+            f"Interface: {interface},  Port ID (outgoing port): {port_id}", 'Holdtime : 150 sec', '', 'Version :',
+            version, '', 'advertisement version: 2', "VTP Management Domain: ''", 'Native VLAN: 1', 'Duplex: full',
+            'Management address(es): ', f"  IP address: {address}", '']
+
+
+@functools.lru_cache(maxsize=64)
+def render_cdp(device):
+    rng = random.Random(device.seed + 1)
+    lines = []
+    for neighbor, interface, port_id in device.links:
+        lines += cdp_record(f"{neighbor.hostname}.example.com", neighbor.ip, rng.choice(SWITCH_PLATFORMS),
+                            'Switch IGMP', interface, port_id,
+                            'Cisco IOS Software, C2960X Software (C2960X-UNIVERSALK9-M), Version 15.2(7)E4')
+    # Phones and access points, which a crawl does not follow
+    for number in range(device.neighbors):
+        address = f"10.{device.number // 256 % 256}.{device.number % 256}.{number % 250 + 1}"
+        platform = rng.choice(PHONE_PLATFORMS)
+        capabilities = 'Host Phone Two-port Mac Relay' if 'Phone' in platform else 'Trans-Bridge Source-Route-Bridge IGMP'
+        lines += cdp_record(f"SEP{device.number:06X}{number:06X}", address, platform, capabilities,
+                            f"GigabitEthernet{number // 48 + 1}/0/{number % 48 + 1}", 'Port 1', 'SCCP 12.8.1')
+    lines.append(f"Total cdp entries displayed : {len(device.links) + device.neighbors}")
+    return write_lines(lines)
+
+
+def render_version(device):
+    return write_lines([
+        'Cisco IOS Software, C2960X Software (C2960X-UNIVERSALK9-M), Version 15.2(7)E4, RELEASE SOFTWARE (fc2)',
+        'Technical Support: http://www.cisco.com/techsupport', '',
+        f"{device.hostname} uptime is {device.number % 52} weeks, 3 days, 2 hours, 11 minutes",
+        'System image file is "flash:c2960x-universalk9-mz.152-7.E4.bin"', '',
+        'cisco WS-C2960X-48FPD-L (APM86XXX) processor with 524288K bytes of memory.',
+        f"System serial number            : FOC{device.number:08d}"])
+
+
+class ClientInput:
+    """Line and key input from a Telnet client or SSH shell channel, with Telnet option negotiation stripped."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+        self.skip_newline = False
+
+    def fill(self):
+        data = self.sock.recv(4096)
+        if not data:
+            raise EOFError('client closed the connection')
+        index = 0
+        while index < len(data):
+            byte = data[index]
+            if byte == IAC and index + 1 < len(data):
+                command = data[index + 1]
+                if command == SB:
+                    end = data.find(bytes([IAC, SE]), index)
+                    index = len(data) if end < 0 else end + 2
+                elif command in (DO, DONT, WILL, WONT):
+                    index += 3
+                elif command == IAC:
+                    self.buffer.append(IAC)
+                    index += 2
+                else:
+                    index += 2
+                continue
+            self.buffer.append(byte)
+            index += 1
+
+    def read_key(self):
+        while True:
+            while self.buffer:
+                key = self.buffer.pop(0)
+                # "\r\n" and "\r\0" end a line once
+                if self.skip_newline and key in (0, 10):
+                    self.skip_newline = False
+                    continue
+                self.skip_newline = key == 13
+                return key
+            self.fill()
+
+    def read_line(self):
+        line = bytearray()
+        while True:
+            key = self.read_key()
+            if key in (10, 13):
+                return line.decode('ascii', errors='replace')
+            line.append(key)
+
+
+class FakeSwitchServer:
+    """Serves a fleet of FakeDevices over SSH and Telnet from one accept loop and a thread per connection."""
+
+    def __init__(self, devices, ssh_port=DEFAULT_SSH_PORT, telnet_port=DEFAULT_TELNET_PORT, username='admin',
+                 password='admin', latency=0.0, rate=0, failure_rate=0.0, failure_modes=FAILURE_MODES,
+                 page_lines=24, ignore_terminal_length=False, banner='motd', login_prompt='Username: ',
+                 password_prompt='Password: ', seed=1):
+        self.devices = devices
+        self.ssh_port = ssh_port
+        self.telnet_port = telnet_port
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.rate = rate
+        self.failure_rate = failure_rate
+        self.failure_modes = list(failure_modes)
+        self.page_lines = page_lines
+        self.ignore_terminal_length = ignore_terminal_length
+        self.banner = BANNERS.get(banner, banner)
+        self.login_prompt = login_prompt
+        self.password_prompt = password_prompt
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.sessions = []  # (ip, transport, start, end, completed)
+        self.active = 0
+        self.selector = selectors.DefaultSelector()
+        self.listeners = []
+        self.running = False
+        self.host_key = paramiko.ECDSAKey.generate() if paramiko else None
+
+    def start(self):
+        """Listen on every device's address and serve from a background thread; stop with shutdown()."""
+        # Two listening sockets per device plus the connections
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = 4 * len(self.devices) + 256
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted if hard == resource.RLIM_INFINITY else min(wanted, hard), hard))
+        for device in self.devices:
+            transports = [('telnet', self.telnet_port)]
+            if device.ssh and paramiko:
+                transports.append(('ssh', self.ssh_port))
+            for transport, port in transports:
+                listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind((device.ip, port))
+                listener.listen(64)
+                listener.setblocking(False)
+                self.selector.register(listener, selectors.EVENT_READ, (device, transport))
+                self.listeners.append(listener)
+        self.running = True
+        threading.Thread(target=self.serve, daemon=True).start()
+        return self
+
+    def serve(self):
+        while self.running:
+            for key, _ in self.selector.select(timeout=0.2):
+                try:
+                    sock, _ = key.fileobj.accept()
+                except (BlockingIOError, OSError):
+                    continue
+                device, transport = key.data
+                handler = self.handle_ssh if transport == 'ssh' else self.handle_telnet
+                threading.Thread(target=self.handle, args=(handler, sock, device, transport), daemon=True).start()
+
+    def shutdown(self):
+        self.running = False
+        for listener in self.listeners:
+            self.selector.unregister(listener)
+            listener.close()
+        self.listeners = []
+
+    def wait_idle(self, timeout=10):
+        """Wait for the open sessions to end, e.g. after the client has exited."""
+        deadline = time.monotonic() + timeout
+        while self.active and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def pick_failure(self):
+        with self.lock:
+            if self.failure_modes and self.random.random() < self.failure_rate:
+                return self.random.choice(self.failure_modes)
+        return None
+
+    def handle(self, handler, sock, device, transport):
+        start = time.monotonic()
+        failure = self.pick_failure()
+        with self.lock:
+            self.active += 1
+        self.count(f"{transport} connections")
+        if failure:
+            self.count(f"injected {failure}")
+        completed = False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(IDLE_SECONDS)
+        try:
+            if failure == 'refuse':
+                return
+            if failure == 'hang':
+                # Answer nothing until the client gives up
+                while sock.recv(4096):
+                    pass
+                return
+            completed = handler(sock, device, failure)
+        except (OSError, EOFError):
+            pass
+        except Exception as e:
+            if not (paramiko and isinstance(e, paramiko.SSHException)):
+                raise
+        finally:
+            sock.close()
+            with self.lock:
+                self.sessions.append((device.ip, transport, start, time.monotonic(), completed))
+                self.active -= 1
+
+    def send(self, write, data, failure):
+        """Write output in chunks at the configured rate; a drop failure closes half way through."""
+        data = data.encode('utf-8') if isinstance(data, str) else data
+        limit = len(data) // 2 if failure == 'drop' else len(data)
+        for offset in range(0, limit, CHUNK_SIZE):
+            chunk = data[offset:min(offset + CHUNK_SIZE, limit)]
+            write(chunk)
+            if self.rate:
+                time.sleep(len(chunk) / self.rate)
+        self.count('bytes sent', limit)
+        if failure == 'drop':
+            raise EOFError('dropped')
+
+    def handle_telnet(self, sock, device, failure):
+        connection = ClientInput(sock)
+        sock.sendall(bytes([IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD, IAC, DONT, ECHO]))
+        time.sleep(self.latency)
+        if self.banner:
+            # Line by line, as a slow device sends it
+            for line in self.banner.split('\r\n'):
+                sock.sendall(line.encode('utf-8') + b'\r\n')
+        sock.sendall(b'\r\nUser Access Verification\r\n\r\n')
+        for attempt in range(3):
+            sock.sendall(self.login_prompt.encode('ascii'))
+            username = connection.read_line()
+            sock.sendall(username.encode('ascii', errors='replace') + b'\r\n')
+            sock.sendall(self.password_prompt.encode('ascii'))
+            password = connection.read_line()
+            sock.sendall(b'\r\n')
+            time.sleep(self.latency)
+            if failure != 'auth' and (username, password) == (self.username, self.password):
+                break
+            self.count('rejected logins')
+            sock.sendall(b'% Login invalid\r\n\r\n')
+        else:
+            sock.sendall(b'% Bad passwords\r\n')
+            return False
+        return self.cli(sock.sendall, connection, device, failure)
+
+    def cli(self, write, connection, device, failure):
+        """Echo and answer commands at the device prompt until the client exits. Returns whether one completed."""
+        prompt = f"\r\n{device.hostname}#".encode('ascii')
+        write(prompt)
+        page_lines = self.page_lines
+        completed = False
+        while True:
+            try:
+                line = connection.read_line()
+            except EOFError:
+                # The client hung up at the prompt
+                return completed
+            write(line.encode('ascii', errors='replace') + b'\r\n')
+            command, arguments = match_command(line)
+            time.sleep(self.latency)
+            if command in (('exit',), ('logout',), ('quit',)):
+                return completed
+            if command == ('terminal', 'length') and arguments and arguments[0].isdigit():
+                if not self.ignore_terminal_length:
+                    page_lines = int(arguments[0])
+            elif command:
+                self.count('commands')
+                self.page(write, connection, device.output(command), page_lines, failure)
+                completed = True
+            elif line.strip():
+                write(INVALID_INPUT.encode('ascii'))
+            write(prompt)
+
+    def page(self, write, connection, output, page_lines, failure):
+        """Send output a screen at a time with --More--, like IOS before "terminal length 0"."""
+        if not page_lines:
+            self.send(write, output, failure)
+            return
+        lines = output.encode('utf-8').split(b'\r\n')
+        page = page_lines - 1
+        sent = 0
+        while sent < len(lines):
+            chunk = b'\r\n'.join(lines[sent:sent + page])
+            sent += page
+            if sent >= len(lines):
+                self.send(write, chunk, failure)
+                return
+            self.send(write, chunk + b'\r\n', failure if sent >= len(lines) // 2 else None)
+            write(MORE)
+            key = connection.read_key()
+            write(MORE_ERASE)
+            if key in (ord('q'), ord('Q')):
+                return
+            if key in (10, 13):
+                page = 1
+            else:
+                page = page_lines - 1
+
+    def handle_ssh(self, sock, device, failure):
+        transport = paramiko.Transport(sock)
+        transport.local_version = 'SSH-2.0-Cisco-1.25'
+        transport.set_log_channel('fake_switch.ssh')
+        transport.add_server_key(self.host_key)
+        interface = SSHServer(self, device, failure)
+        try:
+            transport.start_server(server=interface)
+            # The transport runs in its own thread until the client disconnects
+            transport.join(IDLE_SECONDS)
+        finally:
+            transport.close()
+        for thread in interface.threads:
+            thread.join(IDLE_SECONDS)
+        return interface.completed
+
+
+if paramiko:
+    class SSHServer(paramiko.ServerInterface):
+        """One SSH login to a fake device.
+
+        Like IOS, a login gets a single session channel: either an interactive shell (the same CLI as Telnet, with
+        paging until "terminal length 0") or one exec command, after which the connection is closed.
+        """
+
+        def __init__(self, server, device, failure):
+            self.server = server
+            self.device = device
+            self.failure = failure
+            self.completed = False
+            self.channels = 0
+            self.threads = []
+
+        def get_banner(self):
+            return (self.server.banner + '\r\n', 'en-US') if self.server.banner else (None, None)
+
+        def get_allowed_auths(self, username):
+            return 'password'
+
+        def check_auth_password(self, username, password):
+            time.sleep(self.server.latency)
+            if self.failure != 'auth' and (username, password) == (self.server.username, self.server.password):
+                return paramiko.AUTH_SUCCESSFUL
+            self.server.count('rejected logins')
+            return paramiko.AUTH_FAILED
+
+        def check_channel_request(self, kind, chanid):
+            if kind != 'session' or self.channels:
+                self.server.count('refused ssh channels')
+                return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+            self.channels += 1
+            return paramiko.OPEN_SUCCEEDED
+
+        def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+            return True
+
+        def check_channel_shell_request(self, channel):
+            self.start_thread(self.shell, channel)
+            return True
+
+        def check_channel_exec_request(self, channel, command):
+            self.start_thread(self.run, channel, command.decode('utf-8', errors='replace'))
+            return True
+
+        def start_thread(self, target, *args):
+            thread = threading.Thread(target=target, args=args, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        def shell(self, channel):
+            try:
+                time.sleep(self.server.latency)
+                self.completed = self.server.cli(channel.sendall, ClientInput(channel), self.device, self.failure)
+            except (OSError, EOFError, paramiko.SSHException):
+                pass
+            finally:
+                channel.close()
+                channel.get_transport().close()
+
+        def run(self, channel, line):
+            try:
+                time.sleep(self.server.latency)
+                command, arguments = match_command(line)
+                if command and command[0] not in ('exit', 'logout', 'quit', 'terminal'):
+                    self.server.count('commands')
+                    self.server.send(channel.sendall, self.device.output(command), self.failure)
+                    self.completed = True
+                elif not command:
+                    channel.sendall(INVALID_INPUT.encode('ascii'))
+                channel.send_exit_status(0)
+            except (OSError, EOFError, paramiko.SSHException):
+                pass
+            finally:
+                # IOS ends the connection after an exec command
+                channel.close()
+                channel.get_transport().close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a fleet of Cisco IOS switches over SSH and Telnet.')
+    parser.add_argument('--devices', type=int, default=50, help='Number of switches (default: 50)')
+    parser.add_argument('--base-ip', default=DEFAULT_BASE_IP, help=f'Address of the first switch (default: {DEFAULT_BASE_IP})')
+    parser.add_argument('--ssh-port', type=int, default=DEFAULT_SSH_PORT, help=f'SSH port (default: {DEFAULT_SSH_PORT})')
+    parser.add_argument('--telnet-port', type=int, default=DEFAULT_TELNET_PORT, help=f'Telnet port (default: {DEFAULT_TELNET_PORT})')
+    parser.add_argument('--username', default='admin', help='Login username (default: admin)')
+    parser.add_argument('--password', default='admin', help='Login password (default: admin)')
+    parser.add_argument('--list', default='fake_switches.txt', help='Write the switch addresses here (default: fake_switches.txt)')
+    parser.add_argument('--config-lines', type=int, default=2000, help='Lines of running-config per switch (default: 2000)')
+    parser.add_argument('--neighbors', type=int, default=40, help='Phones and access points per switch in CDP (default: 40)')
+    parser.add_argument('--fanout', type=int, default=4, help='Downstream switches per switch in the CDP tree (default: 4)')
+    parser.add_argument('--telnet-only', type=float, default=0, help='Share of switches without SSH (default: 0)')
+    parser.add_argument('--latency', type=float, default=0, help='Milliseconds before every prompt and output (default: 0)')
+    parser.add_argument('--rate', type=int, default=0, help='Bytes per second per session, 0 for unlimited (default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0, help='Share of connections that fail (default: 0)')
+    parser.add_argument('--failure-modes', default=','.join(FAILURE_MODES),
+                        help=f"Comma-separated failures to choose from (default: {','.join(FAILURE_MODES)})")
+    parser.add_argument('--page-lines', type=int, default=24, help='Screen length before "terminal length 0" (default: 24)')
+    parser.add_argument('--ignore-terminal-length', action='store_true', help='Keep paging output after "terminal length 0"')
+    parser.add_argument('--banner', choices=list(BANNERS), default='motd', help='Login banner (default: motd)')
+    parser.add_argument('--login-prompt', default='Username: ', help="Telnet username prompt (default: 'Username: ')")
+    parser.add_argument('--password-prompt', default='Password: ', help="Telnet password prompt (default: 'Password: ')")
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated fleet and failures')
+    args = parser.parse_args()
+
+    devices = build_fleet(args.devices, args.base_ip, args.fanout, args.telnet_only, args.config_lines, args.neighbors, args.seed)
+    server = FakeSwitchServer(devices, args.ssh_port, args.telnet_port, args.username, args.password, args.latency / 1000.0,
+                              args.rate, args.failure_rate, [mode for mode in args.failure_modes.split(',') if mode],
+                              args.page_lines, args.ignore_terminal_length, args.banner, args.login_prompt,
+                              args.password_prompt, args.seed).start()
+    with open(args.list, 'w') as file:
+        file.write(''.join(f"{device.ip}\n" for device in devices))
+    ssh_count = sum(device.ssh for device in devices) if paramiko else 0
+    print(f"Serving {len(devices)} switches ({devices[0].ip} - {devices[-1].ip}): SSH on port {args.ssh_port} for "
+          f"{ssh_count}, Telnet on port {args.telnet_port} for all; addresses in {args.list}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        for key, count in sorted(server.stats.items()):
+            print(f"{count:>10}  {key}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+---------------------------------------------------------------
+Script Name: Failure Notification Queue
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Collects failure notifications during a run and emails them as one digest, instead of opening a new SMTP
+    connection and logging in for every failure.
+
+    notify() only puts the message on a queue and returns at once, so the main loop never waits on SMTP. A
+    background worker gathers the messages and sends the digest when close() is called (or every flush_interval
+    seconds during long runs). One SMTP connection is opened for the first digest and reused for later ones; it is
+    re-opened only if the server has dropped it.
+
+    The SMTP server defaults to smtp.gmail.com:465 over SSL. It can be changed per Notifier or with the
+    NOTIFY_SMTP_HOST, NOTIFY_SMTP_PORT and NOTIFY_SMTP_SSL (1/0) environment variables. For testing, a local
+    debugging server (e.g. "python -m aiosmtpd -n -l localhost:8025") can stand in with NOTIFY_SMTP_HOST=localhost,
+    NOTIFY_SMTP_PORT=8025 and NOTIFY_SMTP_SSL=0. No login is attempted when there is no password.
+
+Usage:
+    from notify import Notifier
+    notifier = Notifier('Snapshot failures', 'recipient@email.com', 'sender@email.com', 'sender password')
+    notifier.notify('Snapshot creation failed', 'Failed to create snapshot for firewall_12')
+    notifier.close()  # sends the digest and waits for it
+
+Requirements:
+    - Python 3.x
+    - smtplib library
+---------------------------------------------------------------
+"""
+
+import logging
+import os
+import queue
+import smtplib
+import threading
+from datetime import datetime
+from email.mime.text import MIMEText
+
+DEFAULT_SMTP_HOST = 'smtp.gmail.com'
+DEFAULT_SMTP_PORT = 465
+# Messages per digest email; a longer digest is split over several emails on the same connection
+MAX_DIGEST_ITEMS = 200
+
+
+class Notifier:
+    """Queue of failure messages, sent as digests by a background worker over one reused SMTP connection."""
+
+    def __init__(self, subject, to, sender, password=None, host=None, port=None, use_ssl=None, flush_interval=None):
+        self.subject = subject
+        self.to = to
+        self.sender = sender
+        self.password = password
+        self.host = host or os.environ.get('NOTIFY_SMTP_HOST', DEFAULT_SMTP_HOST)
+        self.port = int(port or os.environ.get('NOTIFY_SMTP_PORT', DEFAULT_SMTP_PORT))
+        self.use_ssl = use_ssl if use_ssl is not None else os.environ.get('NOTIFY_SMTP_SSL', '1') != '0'
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.worker = None
+        self.server = None
+        self.lock = threading.Lock()
+
+    def notify(self, subject, body):
+        """Queue a failure for the digest; never blocks on SMTP."""
+        logging.info(f"Queued notification: {subject}")
+        with self.lock:
+            if self.worker is None:
+                # Started on the first failure, so runs without failures never touch SMTP
+                self.worker = threading.Thread(target=self.run, name='notifier', daemon=True)
+                self.worker.start()
+        self.queue.put((datetime.now(), subject, body))
+
+    def close(self):
+        """Send whatever is queued and wait for the worker to finish."""
+        with self.lock:
+            worker = self.worker
+        if worker is not None:
+            self.queue.put(None)
+            worker.join()
+
+    def run(self):
+        pending = []
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = False  # Periodic flush
+            if item:
+                pending.append(item)
+                continue
+            if pending:
+                self.send_digest(pending)
+                pending = []
+            if item is None:
+                break
+        self.disconnect()
+
+    def send_digest(self, items):
+        for start in range(0, len(items), MAX_DIGEST_ITEMS):
+            chunk = items[start:start + MAX_DIGEST_ITEMS]
+            lines = [f"{len(chunk)} failure(s):", '']
+            for queued_at, subject, body in chunk:
+                lines += [f"[{queued_at:%Y-%m-%d %H:%M:%S}] {subject}", f"    {body}", '']
+            msg = MIMEText('\n'.join(lines))
+            msg['Subject'] = f"{self.subject} ({len(chunk)})"
+            msg['From'] = self.sender
+            msg['To'] = self.to
+            try:
+                self.connection().send_message(msg)
+                logging.info(f"Email sent with {len(chunk)} notifications")
+            except (smtplib.SMTPException, OSError) as e:
+                logging.error(f'Failed to send email: {e}')
+                self.server = None
+
+    def connection(self):
+        """Return the open SMTP connection, opening (or re-opening) it if needed."""
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return self.server
+            except (smtplib.SMTPException, OSError):
+                pass
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        self.server = smtp_class(self.host, self.port, timeout=30)
+        self.server.ehlo()
+        if self.password:
+            self.server.login(self.sender, self.password)
+        return self.server
+
+    def disconnect(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
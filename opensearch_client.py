@@ -0,0 +1,189 @@
+"""
+---------------------------------------------------------------
+Script Name: OpenSearch Client
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Shared OpenSearch client for create_snapshot.py and delete_snapshot.py.
+
+    All requests go through one requests.Session, so connections (and their TLS handshakes) are kept alive and
+    reused from a connection pool instead of being opened for every call. The client is configured with a list of
+    nodes: if a node cannot be reached, the request moves on to the next node, and that node is used from then on.
+    Responses with status 429, 502, 503 or 504 are retried with exponential backoff (honouring Retry-After), and
+    every call has a connect/read timeout.
+
+    Only GET and HEAD are sent again after a read timeout. A PUT, POST or DELETE that timed out waiting for the
+    response may already have been applied (a snapshot started, an index deleted), so the timeout is raised to the
+    caller instead of replaying it against the same or another node. Those methods are still retried and failed over
+    when the connection could not be made at all.
+
+    Timing hooks are called after every request with (method, path, status code or None, seconds, node), e.g. to
+    log slow calls or count requests. Status codes are not raised as exceptions; callers check them as before.
+
+    Nodes and credentials come from the OPENSEARCH_NODES (comma-separated URLs), OPENSEARCH_USERNAME and
+    OPENSEARCH_PASSWORD environment variables, falling back to the defaults below.
+
+Usage:
+    from opensearch_client import OpenSearchClient
+    client = OpenSearchClient()
+    response = client.get('/_cat/indices?format=json')
+
+    python opensearch_client.py PATH     # GET a path and print the response and its timing
+
+Examples:
+    OPENSEARCH_NODES=https://opensearch01:9200,https://opensearch02:9200 python opensearch_client.py /_cluster/health
+
+Requirements:
+    - Python 3.x
+    - requests library
+---------------------------------------------------------------
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+
+DEFAULT_NODES = ['https://opensearch01:9200']
+DEFAULT_USERNAME = 'admin' # update with OS username
+DEFAULT_PASSWORD = 'password' # update with OS password
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 60)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 30
+RETRY_STATUSES = (429, 502, 503, 504)
+# Methods that are safe to send again when it is unknown whether the node applied them
+REPLAYABLE_METHODS = ('GET', 'HEAD')
+
+
+def log_request(method, path, status, seconds, node):
+    """Timing hook that logs every request at debug level and slow ones as warnings."""
+    level = logging.WARNING if seconds > 10 else logging.DEBUG
+    logging.log(level, f"{method} {node}{path} -> {status} in {seconds:.2f}s")
+
+
+class OpenSearchClient:
+    """Pooled, retrying OpenSearch client with node failover."""
+
+    def __init__(self, nodes=None, auth=None, verify=False, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, pool_size=10, hooks=(log_request,)):
+        if nodes is None:
+            nodes = os.environ.get('OPENSEARCH_NODES', '').split(',') if os.environ.get('OPENSEARCH_NODES') else DEFAULT_NODES
+        self.nodes = [node.strip().rstrip('/') for node in nodes]
+        self.auth = auth or (os.environ.get('OPENSEARCH_USERNAME', DEFAULT_USERNAME),
+                             os.environ.get('OPENSEARCH_PASSWORD', DEFAULT_PASSWORD))
+        self.verify = verify
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hooks = list(hooks)
+        self.lock = threading.Lock()
+        self.current = 0
+
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        # One pool per node, big enough for the scripts' worker threads
+        adapter = HTTPAdapter(pool_connections=len(self.nodes), pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, path, timeout=None, retries=None, **kwargs):
+        """Send a request to the first reachable node and return the response.
+
+        Connection errors and timeouts move on to the next node; retryable status codes are retried on the same
+        node after a backoff. The last response is returned (or the last connection error raised) once the retries
+        are used up. A read timeout is only retried for GET and HEAD and raised straight away for other methods.
+        """
+        retries = self.retries if retries is None else retries
+        timeout = timeout or self.timeout
+        failed_nodes = 0
+        attempt = 0
+        while True:
+            with self.lock:
+                node = self.nodes[self.current]
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, node + path, timeout=timeout, verify=self.verify, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.run_hooks(method, path, None, time.monotonic() - start, node)
+                # A read timeout means the node has the request and may have applied it (ConnectTimeout is a
+                # ConnectionError), so anything but a read is not sent a second time
+                if method not in REPLAYABLE_METHODS and not isinstance(e, requests.ConnectionError):
+                    raise
+                failed_nodes += 1
+                if len(self.nodes) > 1 and failed_nodes % len(self.nodes):
+                    logging.warning(f"OpenSearch node {node} unavailable ({e}), failing over")
+                    self.fail_over(node)
+                    continue
+                # Every node has failed once in this round
+                if attempt >= retries:
+                    raise
+                self.fail_over(node)
+                self.sleep(attempt, None)
+                attempt += 1
+                continue
+
+            self.run_hooks(method, path, response.status_code, time.monotonic() - start, node)
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            logging.info(f"{method} {path} returned {response.status_code}, retrying")
+            self.sleep(attempt, response.headers.get('Retry-After'))
+            attempt += 1
+
+    def fail_over(self, node):
+        with self.lock:
+            # Another thread may already have moved on
+            if self.nodes[self.current] == node:
+                self.current = (self.current + 1) % len(self.nodes)
+
+    def sleep(self, attempt, retry_after):
+        delay = min(self.backoff * 2 ** attempt, MAX_BACKOFF)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(int(retry_after), MAX_BACKOFF))
+        time.sleep(delay)
+
+    def run_hooks(self, method, path, status, seconds, node):
+        for hook in self.hooks:
+            hook(method, path, status, seconds, node)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send a GET request through the shared OpenSearch client.')
+    parser.add_argument('path', help='Request path, e.g. /_cluster/health')
+    args = parser.parse_args()
+
+    timings = []
+    client = OpenSearchClient(hooks=[lambda *call: timings.append(call)])
+    response = client.get(args.path if args.path.startswith('/') else '/' + args.path)
+    print(response.text)
+    for method, path, status, seconds, node in timings:
+        print(f"{method} {node}{path} -> {status} in {seconds * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
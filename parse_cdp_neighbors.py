@@ -3,125 +3,233 @@
 Script Name: CDP Neighbor Info Fetcher and Parser
 Author: Dan Clancey
 Date: 2-May-2023
-Version: 1.0
+Version: 1.2
 Description:
     This script connects to a remote device via SSH to retrieve CDP (Cisco Discovery Protocol) neighbor information.
-    The raw CDP neighbor information is saved to a specified text file, and then parsed to collect details like Device ID,
-    IP address, Platform, Capabilities, and Interface. The parsed information is then written to a CSV file for easy analysis.
+    The output is parsed as it arrives from the SSH channel to collect details like Device ID, IP address, Platform,
+    Capabilities, and Interface, and each neighbor is written to a CSV file for easy analysis as soon as it is parsed.
+    The raw CDP neighbor information can optionally be saved to a text file at the same time.
 
 Usage:
-    python parse_cdp_neighbors.py -u [SSH_USERNAME] -p [SSH_PASSWORD] -H [SSH_HOST] -t [TEXT_OUTPUT_FILE]
+    python parse_cdp_neighbors.py -u [SSH_USERNAME] -p [SSH_PASSWORD] -H [SSH_HOST] [-t [TEXT_OUTPUT_FILE]] [-c [CSV_OUTPUT_FILE]]
 
     Where:
     [SSH_USERNAME] is the SSH username for the device.
     [SSH_PASSWORD] is the SSH password for the device.
     [SSH_HOST] is the SSH hostname or IP address of the device.
     [TEXT_OUTPUT_FILE] is the output text file to store raw CDP neighbor information.
+    [CSV_OUTPUT_FILE] is the output CSV file (defaults to TEXT_OUTPUT_FILE with a .csv extension).
+
+    With --crawl, the script maps the network instead: starting from the seed hosts it logs in to each device
+    (SSH, falling back to Telnet), parses its neighbors and queues newly discovered switches and routers by their
+    management address. Devices are crawled concurrently (--workers) breadth first up to --depth hops, each address
+    once, and the deduplicated links are written to an edge list CSV (-e).
+
+    With --db, every parsed neighbor (including the management address and port left out of the CSV) is also added
+    to the fleet-wide neighbor database in cdp_store.py.
 
 Examples:
     python parse_cdp_neighbors.py -u admin -p password -H 192.168.1.1 -t cdp_output.txt
+    python parse_cdp_neighbors.py -u admin -p password -H 192.168.1.1 -c cdp_output.csv
+    python parse_cdp_neighbors.py -u admin -p password -H 192.168.1.1 -S 192.168.2.1 --crawl --depth 5 --workers 32 -e campus_edges.csv
 
 Requirements:
     - Python 3.x
-    - paramiko library for SSH
+    - paramiko library for SSH (via switch_session.py)
     - argparse library for parsing command-line arguments
-    - re library for regular expression matching
+    - cdp_parser.py for parsing the CDP output
     - csv library for CSV file operations
     - os library for file and path manipulation
 ---------------------------------------------------------------
 """
 
-import re
 import csv
 import argparse
-import paramiko
 import os
-
-def ssh_and_save_cdp_neighbors(username, password, host, output_file):
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh.connect(host, username=username, password=password)
-
-    stdin, stdout, stderr = ssh.exec_command('show cdp neighbors detail')
-    cdp_neighbors_output = stdout.read().decode()
-
-    with open(output_file, 'w') as file:
-        file.write(cdp_neighbors_output)
-
-    ssh.close()
-
-def parse_cdp_neighbors(data):
-    neighbors = []
-
-    device_id_pattern = re.compile(r'Device ID:(.+)')
-    ip_address_pattern = re.compile(r'IPv4 Address: (.+)|IP address: (.+)')
-    platform_pattern = re.compile(r'Platform: (.+),\s*Capabilities: (.+)')
-    interface_pattern = re.compile(r'Interface: (.+),\s*Port ID \(outgoing port\): (.+)|Interface: (.+),\s*Port ID \(outgoing port\): (.+)')
-    management_address_pattern = re.compile(r'Management address\(es\):')
-
-    lines = data.split('\n')
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        i += 1
-
-        if device_id_pattern.match(line):
-            neighbor = {}
-            neighbor['device_id'] = device_id_pattern.match(line).group(1).strip()
-
-            while i < len(lines):
-                line = lines[i].strip()
-                i += 1
-
-                if ip_address_pattern.match(line):
-                    match = ip_address_pattern.match(line)
-                    neighbor['ip_address'] = match.group(1).strip() if match.group(1) else match.group(2).strip()
-                elif platform_pattern.match(line):
-                    neighbor['platform'], neighbor['capabilities'] = platform_pattern.match(line).group(1, 2)
-                elif interface_pattern.match(line):
-                    match = interface_pattern.match(line)
-                    neighbor['interface'] = match.group(1).strip() if match.group(1) else match.group(3).strip()
-                elif management_address_pattern.match(line):
-                    while i < len(lines) and not re.match(r'\S', lines[i]):
-                        i += 1
-                    line = lines[i].strip()
-                    ip_address = re.match(r'IP address: (.+)|IPv4 Address: (.+)', line)
-                    if ip_address:
-                        neighbor['management_address'] = ip_address.group(1).strip() if ip_address.group(1) else ip_address.group(2).strip()
-                elif '---' in line:
-                    neighbors.append(neighbor)
-                    break
-            else:
-                neighbors.append(neighbor)  # Append the last neighbor when the loop finishes
-
-    return neighbors
-
-
-# Parse command-line arguments
-parser = argparse.ArgumentParser(description='SSH into the device, save CDP neighbor information to a text file, and convert to a CSV file.')
-parser.add_argument('-u', '--username', help='SSH username', required=True)
-parser.add_argument('-p', '--password', help='SSH password', required=True)
-parser.add_argument('-H', '--host', help='SSH hostname or IP address', required=True)
-parser.add_argument('-t', '--text_output', help='Output text file to store raw CDP neighbor information', required=True)
-args = parser.parse_args()
-
-# SSH into the device, run 'show cdp neighbors detail', and save the output to the specified text file
-ssh_and_save_cdp_neighbors(args.username, args.password, args.host, args.text_output)
-
-# Read CDP neighbor information from the specified text file
-with open(args.text_output, 'r') as file:
-    cdp_neighbor_data = file.read()
-
-parsed_neighbors = parse_cdp_neighbors(cdp_neighbor_data)
-
-# Replace the .txt extension with .csv
-csv_output = os.path.splitext(args.text_output)[0] + '.csv'
-
-# Write the parsed information to the output CSV file
-with open(csv_output, 'w', newline='') as csvfile:
-    fieldnames = ['device_id', 'ip_address', 'platform', 'capabilities', 'interface']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-    writer.writeheader()
-    for neighbor in parsed_neighbors:
-        writer.writerow(neighbor)
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cdp_parser import iter_cdp_neighbors, iter_lines
+from cdp_store import CdpStore
+from switch_session import DEFAULT_SSH_PORT, DEFAULT_TELNET_PORT, SSHSession, collect
+
+CSV_FIELDNAMES = ['device_id', 'ip_address', 'platform', 'capabilities', 'interface']
+EDGE_FIELDNAMES = ['local_device', 'local_interface', 'remote_device', 'remote_interface', 'remote_address', 'platform', 'capabilities']
+DEFAULT_CRAWL_CAPABILITIES = ['Switch', 'Router']
+
+
+def tee_chunks(chunks, file):
+    """Pass chunks through unchanged while writing them to a binary file."""
+    for chunk in chunks:
+        file.write(chunk)
+        yield chunk
+
+
+def ssh_stream_cdp_neighbors(username, password, host, text_output=None, port=DEFAULT_SSH_PORT):
+    """SSH into the device and yield CDP neighbors while 'show cdp neighbors detail' is still arriving.
+
+    If text_output is given, the raw output is written to it at the same time.
+    """
+    with SSHSession(host, username, password, port=port) as session:
+        chunks = session.stream('show cdp neighbors detail')
+        if text_output:
+            with open(text_output, 'wb') as file:
+                yield from iter_cdp_neighbors(iter_lines(tee_chunks(chunks, file)))
+        else:
+            yield from iter_cdp_neighbors(iter_lines(chunks))
+
+
+def collect_into(neighbors, collected):
+    """Pass neighbors through unchanged while appending them to a list."""
+    for neighbor in neighbors:
+        collected.append(neighbor)
+        yield neighbor
+
+
+def write_neighbors_csv(neighbors, csv_output):
+    """Write neighbors to a CSV file as they are produced."""
+    with open(csv_output, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+
+        writer.writeheader()
+        for neighbor in neighbors:
+            writer.writerow(neighbor)
+
+
+def fetch_neighbors(host, username, password, ssh_port=DEFAULT_SSH_PORT, telnet_port=DEFAULT_TELNET_PORT):
+    """Log in to a device (SSH, falling back to Telnet) and return its parsed CDP neighbors."""
+    transport, outputs = collect(host, username, password, ['show cdp neighbors detail'], ssh_port=ssh_port,
+                                 telnet_port=telnet_port)
+    return list(iter_cdp_neighbors(outputs[0].splitlines()))
+
+
+def crawl(seeds, username, password, max_depth=3, workers=16, capabilities=DEFAULT_CRAWL_CAPABILITIES,
+          ssh_port=DEFAULT_SSH_PORT, telnet_port=DEFAULT_TELNET_PORT):
+    """Concurrent breadth-first CDP crawl from the seed hosts.
+
+    Neighbors whose capabilities include one of the given ones are queued by management address (or entry address)
+    until max_depth hops from the seeds. Every address and device ID is crawled at most once. Returns
+    (links, names, failures): links is a list of (crawled host, neighbor) pairs, names maps addresses to the
+    device IDs neighbors reported for them, and failures maps hosts that could not be crawled to their error.
+    """
+    visited = set(seeds)  # addresses already queued or crawled
+    queued_devices = set()
+    names = {}
+    links = []
+    failures = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(fetch_neighbors, host, username, password, ssh_port, telnet_port): (host, 0)
+                   for host in visited}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                host, depth = pending.pop(future)
+                try:
+                    neighbors = future.result()
+                except Exception as e:
+                    failures[host] = e
+                    print(f"Failed to crawl {host}: {e}")
+                    continue
+                print(f"Crawled {host} (depth {depth}): {len(neighbors)} neighbors, {len(pending)} devices in progress")
+
+                for neighbor in neighbors:
+                    links.append((host, neighbor))
+                    addresses = [neighbor[key] for key in ('management_address', 'ip_address') if neighbor.get(key)]
+                    for address in addresses:
+                        names.setdefault(address, neighbor['device_id'])
+                    if (depth >= max_depth or not addresses or neighbor['device_id'] in queued_devices
+                            or any(address in visited for address in addresses)
+                            or not any(capability in neighbor.get('capabilities', '').split() for capability in capabilities)):
+                        continue
+                    queued_devices.add(neighbor['device_id'])
+                    visited.update(addresses)
+                    pending[executor.submit(fetch_neighbors, addresses[0], username, password, ssh_port,
+                                            telnet_port)] = (addresses[0], depth + 1)
+
+    return links, names, failures
+
+
+def build_edges(links, names):
+    """Turn crawled links into a list of edges, keeping one edge per physical link even if both ends were crawled."""
+    edges = {}
+    for host, neighbor in links:
+        local_device = names.get(host, host)
+        ends = frozenset([(local_device, neighbor.get('interface')), (neighbor['device_id'], neighbor.get('port_id'))])
+        edges.setdefault(ends, {
+            'local_device': local_device,
+            'local_interface': neighbor.get('interface'),
+            'remote_device': neighbor['device_id'],
+            'remote_interface': neighbor.get('port_id'),
+            'remote_address': neighbor.get('management_address') or neighbor.get('ip_address'),
+            'platform': neighbor.get('platform'),
+            'capabilities': neighbor.get('capabilities'),
+        })
+    return list(edges.values())
+
+
+def write_edges_csv(edges, edges_output):
+    with open(edges_output, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=EDGE_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(edges)
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description='SSH into the device, save CDP neighbor information to a text file, and convert to a CSV file.')
+    parser.add_argument('-u', '--username', help='SSH username', required=True)
+    parser.add_argument('-p', '--password', help='SSH password', required=True)
+    parser.add_argument('-H', '--host', help='SSH hostname or IP address')
+    parser.add_argument('-t', '--text_output', help='Optional output text file to store raw CDP neighbor information')
+    parser.add_argument('-c', '--csv_output', help='Output CSV file (default: the text output file with a .csv extension)')
+    parser.add_argument('--crawl', action='store_true', help='Crawl the network from the seed hosts instead of fetching a single host')
+    parser.add_argument('-S', '--seed', action='append', default=[], help='Additional seed host for --crawl (repeatable)')
+    parser.add_argument('-e', '--edges_output', help='Output CSV file for the crawled edge list (required with --crawl)')
+    parser.add_argument('--depth', type=int, default=3, help='Maximum number of hops from the seeds to crawl (default: 3)')
+    parser.add_argument('--workers', type=int, default=16, help='Maximum number of devices to log in to at once (default: 16)')
+    parser.add_argument('--capabilities', default=','.join(DEFAULT_CRAWL_CAPABILITIES),
+                        help='Only crawl neighbors with one of these comma-separated capabilities (default: Switch,Router)')
+    parser.add_argument('--db', help='Also add the parsed neighbors to this CDP neighbor database (see cdp_store.py)')
+    parser.add_argument('--ssh_port', type=int, default=DEFAULT_SSH_PORT, help=f'SSH port (default: {DEFAULT_SSH_PORT})')
+    parser.add_argument('--telnet_port', type=int, default=DEFAULT_TELNET_PORT,
+                        help=f'Telnet port for the --crawl fallback (default: {DEFAULT_TELNET_PORT})')
+    args = parser.parse_args()
+    cdp_store = CdpStore(args.db) if args.db else None
+
+    if args.crawl:
+        seeds = ([args.host] if args.host else []) + args.seed
+        if not seeds or not args.edges_output:
+            parser.error('--crawl needs at least one seed (-H/--seed) and -e/--edges_output')
+        links, names, failures = crawl(seeds, args.username, args.password, args.depth, args.workers,
+                                       args.capabilities.split(','), args.ssh_port, args.telnet_port)
+        edges = build_edges(links, names)
+        write_edges_csv(edges, args.edges_output)
+        if cdp_store:
+            by_host = {}
+            for host, neighbor in links:
+                by_host.setdefault(host, []).append(neighbor)
+            for host, neighbors in by_host.items():
+                cdp_store.ingest(host, neighbors)
+        reporting = len({host for host, _ in links})
+        print(f"Found {len(edges)} links from {reporting} devices with neighbors ({len(failures)} devices failed)")
+        return
+
+    if not args.host:
+        parser.error('-H/--host is required')
+
+    # Replace the .txt extension with .csv
+    csv_output = args.csv_output or (os.path.splitext(args.text_output)[0] + '.csv' if args.text_output else None)
+    if not csv_output:
+        parser.error('at least one of -t/--text_output or -c/--csv_output is required')
+
+    # SSH into the device, run 'show cdp neighbors detail' and parse the output as it arrives,
+    # saving the raw output to the text file at the same time
+    neighbors = ssh_stream_cdp_neighbors(args.username, args.password, args.host, args.text_output, args.ssh_port)
+    collected = []
+    write_neighbors_csv(collect_into(neighbors, collected) if cdp_store else neighbors, csv_output)
+    if cdp_store:
+        cdp_store.ingest(args.host, collected)
+
+
+if __name__ == '__main__':
+    main()
@@ -24,97 +24,42 @@ Examples:
 
 Requirements:
     - Python 3.x
-    - telnetlib library for Telnet
+    - telnetlib library for Telnet (via switch_session.py)
     - argparse library for parsing command-line arguments
-    - re library for regular expression matching
+    - cdp_parser.py for parsing the CDP output
     - csv library for CSV file operations
     - os library for file and path manipulation
 ---------------------------------------------------------------
 """
 
-import re
 import csv
 import argparse
-import telnetlib
 import os
 
-def telnet_and_save_cdp_neighbors(username, password, host, output_file):
-    telnet = telnetlib.Telnet(host)
-    telnet.read_until(b'Username:')
-    telnet.write(username.encode('ascii') + b'\n')
+from cdp_parser import parse_cdp_neighbors
+from cdp_store import CdpStore
+from switch_session import DEFAULT_TELNET_PORT, TelnetSession
 
-    if password:
-        telnet.read_until(b'Password:')
-        telnet.write(password.encode('ascii') + b'\n')
-
-    telnet.write(b'terminal length 0\n')  # To avoid pagination in the output
-    telnet.write(b'show cdp neighbors detail\n')
-    telnet.write(b'exit\n')
-
-    cdp_neighbors_output = telnet.read_until(b'exit').decode()  # Read data until the 'exit' string is encountered
+def telnet_and_save_cdp_neighbors(username, password, host, output_file, port=DEFAULT_TELNET_PORT):
+    # The session returns as soon as the device prompt comes back, instead of waiting for the connection to close
+    with TelnetSession(host, username, password, port=port) as telnet:
+        cdp_neighbors_output = telnet.run('show cdp neighbors detail')
 
     with open(output_file, 'w') as file:
         file.write(cdp_neighbors_output)
 
-    telnet.close()
-
-def parse_cdp_neighbors(data):
-    neighbors = []
-
-    device_id_pattern = re.compile(r'Device ID:(.+)')
-    ip_address_pattern = re.compile(r'IPv4 Address: (.+)|IP address: (.+)')
-    platform_pattern = re.compile(r'Platform: (.+),\s*Capabilities: (.+)')
-    interface_pattern = re.compile(r'Interface: (.+),\s*Port ID \(outgoing port\): (.+)|Interface: (.+),\s*Port ID \(outgoing port\): (.+)')
-    management_address_pattern = re.compile(r'Management address\(es\):')
-
-    lines = data.split('\n')
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        i += 1
-
-        if device_id_pattern.match(line):
-            neighbor = {}
-            neighbor['device_id'] = device_id_pattern.match(line).group(1).strip()
-
-            while i < len(lines):
-                line = lines[i].strip()
-                i += 1
-
-                if ip_address_pattern.match(line):
-                    match = ip_address_pattern.match(line)
-                    neighbor['ip_address'] = match.group(1).strip() if match.group(1) else match.group(2).strip()
-                elif platform_pattern.match(line):
-                    neighbor['platform'], neighbor['capabilities'] = platform_pattern.match(line).group(1, 2)
-                elif interface_pattern.match(line):
-                    match = interface_pattern.match(line)
-                    neighbor['interface'] = match.group(1).strip() if match.group(1) else match.group(3).strip()
-                elif management_address_pattern.match(line):
-                    while i < len(lines) and not re.match(r'\S', lines[i]):
-                        i += 1
-                    line = lines[i].strip()
-                    ip_address = re.match(r'IP address: (.+)|IPv4 Address: (.+)', line)
-                    if ip_address:
-                        neighbor['management_address'] = ip_address.group(1).strip() if ip_address.group(1) else ip_address.group(2).strip()
-                elif '---' in line:
-                    neighbors.append(neighbor)
-                    break
-            else:
-                neighbors.append(neighbor)  # Append the last neighbor when the loop finishes
-
-    return neighbors
-
-
 # Parse command-line arguments
 parser = argparse.ArgumentParser(description='Telnet into the device, save CDP neighbor information to a text file, and convert to a CSV file.')
 parser.add_argument('-u', '--username', help='Telnet username', required=True)
 parser.add_argument('-p', '--password', help='Telnet password', required=True)
 parser.add_argument('-H', '--host', help='Telnet hostname or IP address', required=True)
 parser.add_argument('-t', '--text_output', help='Output text file to store raw CDP neighbor information', required=True)
+parser.add_argument('--db', help='Also add the parsed neighbors to this CDP neighbor database (see cdp_store.py)')
+parser.add_argument('--port', type=int, default=DEFAULT_TELNET_PORT, help=f'Telnet port (default: {DEFAULT_TELNET_PORT})')
 args = parser.parse_args()
 
 # Telnet into the device, run 'show cdp neighbors detail', and save the output to the specified text file
-telnet_and_save_cdp_neighbors(args.username, args.password, args.host, args.text_output)
+telnet_and_save_cdp_neighbors(args.username, args.password, args.host, args.text_output, args.port)
 
 # Read CDP neighbor information from the specified text file
 with open(args.text_output, 'r') as file:
@@ -128,8 +73,12 @@ csv_output = os.path.splitext(args.text_output)[0] + '.csv'
 # Write the parsed information to the output CSV file
 with open(csv_output, 'w', newline='') as csvfile:
     fieldnames = ['device_id', 'ip_address', 'platform', 'capabilities', 'interface']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
 
     writer.writeheader()
     for neighbor in parsed_neighbors:
         writer.writerow(neighbor)
+
+# Add the parsed neighbors to the fleet-wide neighbor database
+if args.db:
+    CdpStore(args.db).ingest(args.host, parsed_neighbors)
@@ -0,0 +1,97 @@
+"""
+---------------------------------------------------------------
+Script Name: Switch Fetch Run Journal
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Records, per host, how each BulkFetch-SwitchConfig.py run went, so an interrupted run can be resumed without
+    re-fetching the switches that already succeeded.
+
+    The journal is a small append-only TSV file (by default ~/configs/bulkfetch_journal.tsv). A run starts with a
+    "run" line naming the input file and the commands; every finished host adds one line as soon as it is done, so
+    the journal survives the process being killed. A resumed run reads the hosts that succeeded under the same run
+    and carries on appending; a fresh run starts a new journal.
+
+Usage:
+    python run_journal.py [--path JOURNAL_FILE]
+
+    Prints the current run and how many hosts succeeded and failed.
+
+Requirements:
+    - Python 3.x
+---------------------------------------------------------------
+"""
+
+import argparse
+import os
+import threading
+import time
+
+DEFAULT_JOURNAL_PATH = '~/configs/bulkfetch_journal.tsv'
+
+
+class RunJournal:
+    """Thread-safe, append-only record of the hosts finished in the current run."""
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = os.path.expanduser(path)
+        self.lock = threading.Lock()
+
+    def read(self):
+        """Return (run id, {ip: (status, transport, seconds)}) for the journal's run, or (None, {})."""
+        run_id = None
+        hosts = {}
+        if not os.path.exists(self.path):
+            return run_id, hosts
+        with open(self.path, 'r') as file:
+            for line in file:
+                fields = line.rstrip('\n').split('\t')
+                if fields[0] == 'run':
+                    run_id, hosts = fields[1], {}
+                elif len(fields) == 5:
+                    # A later line for the same host (e.g. a retry after a failure) wins
+                    epoch, ip, status, transport, seconds = fields
+                    hosts[ip] = (status, transport, float(seconds))
+        return run_id, hosts
+
+    def completed(self, run_id):
+        """Return the hosts that succeeded in run_id, or an empty set if the journal belongs to another run."""
+        journal_run, hosts = self.read()
+        if journal_run != run_id:
+            return set()
+        return {ip for ip, (status, transport, seconds) in hosts.items() if status == 'ok'}
+
+    def start(self, run_id, resume=False):
+        """Begin a run: keep the journal when resuming the same run, otherwise start a new one."""
+        if resume and self.read()[0] == run_id:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock, open(self.path, 'w') as file:
+            file.write(f"run\t{run_id}\t{int(time.time())}\n")
+
+    def record(self, ip, status, transport, seconds):
+        """Append a finished host; flushed straight away so a killed run keeps it."""
+        with self.lock, open(self.path, 'a') as file:
+            file.write(f"{int(time.time())}\t{ip}\t{status}\t{transport or ''}\t{seconds:.2f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the BulkFetch-SwitchConfig.py run journal.')
+    parser.add_argument('--path', default=DEFAULT_JOURNAL_PATH, help=f'Journal file (default: {DEFAULT_JOURNAL_PATH})')
+    args = parser.parse_args()
+
+    run_id, hosts = RunJournal(args.path).read()
+    if run_id is None:
+        print('No run recorded')
+        return
+    statuses = [status for status, transport, seconds in hosts.values()]
+    print(f"Run: {run_id}")
+    print(f"{statuses.count('ok')} succeeded, {statuses.count('failed')} failed")
+    for ip, (status, transport, seconds) in sorted(hosts.items()):
+        if status != 'ok':
+            print(f"  {status:<7} {ip}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+---------------------------------------------------------------
+Script Name: Switch Session Helpers
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.3
+Description:
+    Shared SSH/Telnet session code for the switch collectors. A session logs in to a Cisco IOS device once and runs
+    any number of commands over that single login, so a full inventory sweep (show run, show version, show cdp
+    neighbors detail, ...) costs one authentication per device instead of one per command.
+
+    collect() tries the transports in order (SSH, then Telnet, or whatever order a TransportCache suggests),
+    runs the commands and returns the transport that worked together with one output per command.
+
+    Both sessions detect the device prompt after login and return each command's output as soon as the prompt
+    reappears, rather than waiting for the device to close the connection. Over SSH the commands are typed into one
+    interactive shell, because IOS allows only one exec channel per SSH connection. A connection that drops before
+    the prompt comes back is an error, not a short output.
+
+    SSH and Telnet default to ports 22 and 23; both can be changed per session or per collect() call, e.g. to run
+    the collectors against the simulated switches in fake_switch.py.
+
+Usage:
+    from switch_session import collect
+    transport, outputs = collect('192.168.1.1', 'admin', 'secret', ['show run', 'show version'])
+
+Requirements:
+    - Python 3.x
+    - paramiko library for SSH
+    - telnetlib library for Telnet
+---------------------------------------------------------------
+"""
+
+import re
+import select
+import socket
+import telnetlib
+import time
+
+try:
+    import paramiko
+except ImportError:  # Telnet-only callers such as parse_cdp_neighbors_telnet.py do not need it
+    paramiko = None
+
+DEFAULT_CONNECT_TIMEOUT = 15
+DEFAULT_SSH_PORT = 22
+DEFAULT_TELNET_PORT = 23
+DEFAULT_COMMAND_TIMEOUT = 120
+
+# Telnet prompts are only looked for in the last TAIL_SIZE bytes read
+TAIL_SIZE = 512
+# Bytes read from a Telnet socket per call
+RECV_SIZE = 65536
+LOGIN_PATTERN = re.compile(rb'(?i)(?:username|login): ?$')
+PASSWORD_PATTERN = re.compile(rb'(?i)password: ?$')
+ANY_PROMPT_PATTERN = re.compile(rb'[\r\n]([^\s#>()]+)(?:\([^)\r\n]*\))?[#>] ?$')
+MORE_PATTERN = re.compile(rb' ?(?:--More--|<--- More --->) ?$')
+# What IOS prints after the space to wipe the --More-- marker
+PAGER_ERASE_PATTERN = re.compile(rb'(?:\x08+ +\x08+|\r {8,}\r)')
+
+
+def prompt_pattern(hostname):
+    """Pattern for a device's own prompt, in exec, enable or config mode."""
+    return re.compile(rb'[\r\n]' + re.escape(hostname) + rb'(?:\([^)\r\n]*\))?[#>] ?$')
+
+
+class CliSession:
+    """Command loop shared by the SSH and Telnet sessions: each command's output ends where the prompt reappears.
+
+    Output is read into a growable buffer and only the tail of the buffer is checked for the prompt, so long outputs
+    cost linear time. "--More--" pagers are answered with a space in case "terminal length 0" is not honoured, and
+    every command has its own deadline. A connection that closes before the prompt comes back raises EOFError
+    instead of returning the output received so far.
+
+    Subclasses provide write(data) and receive(timeout), which returns b'' if nothing arrived in time.
+    """
+
+    prompt = None
+
+    def read_until(self, patterns, buffer, deadline):
+        """Read into buffer until one of the patterns matches its tail; page through --More-- on the way."""
+        while True:
+            tail = bytes(buffer[-TAIL_SIZE:])
+            more = MORE_PATTERN.search(tail)
+            if more:
+                del buffer[len(buffer) - len(tail) + more.start():]
+                self.write(b' ')
+            else:
+                for pattern in patterns:
+                    match = pattern.search(b'\n' + tail)
+                    if match:
+                        return match
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("command deadline exceeded")
+            buffer.extend(self.receive(remaining))
+
+    def stream(self, command, timeout=None):
+        """Run one command and yield its raw output chunk by chunk as it arrives, without the echoed command line
+        and trailing prompt."""
+        self.write(command.encode('ascii') + b"\n")
+        deadline = time.monotonic() + (timeout or self.command_timeout)
+        buffer = bytearray()
+        echoed = False
+        while True:
+            if not echoed:
+                newline = buffer.find(b'\n')
+                if newline >= 0:
+                    del buffer[:newline + 1]
+                    echoed = True
+            if echoed:
+                tail = bytes(buffer[-TAIL_SIZE:])
+                more = MORE_PATTERN.search(tail)
+                if more:
+                    del buffer[len(buffer) - len(tail) + more.start():]
+                    self.write(b' ')
+                else:
+                    match = self.prompt.search(b'\n' + tail)
+                    if match:
+                        end = len(buffer) - (len(match.group(0)) - 1)
+                        if end > 0:
+                            yield PAGER_ERASE_PATTERN.sub(b'', bytes(buffer[:end]))
+                        return
+                    # Hand over whole lines, keeping the tail back in case the prompt or a pager is split
+                    cut = buffer.rfind(b'\n', 0, len(buffer) - TAIL_SIZE) + 1 if len(buffer) > TAIL_SIZE else 0
+                    if cut:
+                        yield PAGER_ERASE_PATTERN.sub(b'', bytes(buffer[:cut]))
+                        del buffer[:cut]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("command deadline exceeded")
+            buffer.extend(self.receive(remaining))
+
+    def run(self, command, timeout=None):
+        """Run one command and return its output without the echoed command line and trailing prompt."""
+        return b''.join(self.stream(command, timeout)).decode('utf-8', errors='replace')
+
+    def run_commands(self, commands):
+        return [self.run(command) for command in commands]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SSHSession(CliSession):
+    """One SSH login; every command runs in the same interactive shell.
+
+    IOS only allows one exec channel per SSH connection, so commands are typed into a shell channel and read back
+    up to the prompt, as over Telnet.
+    """
+
+    transport = 'ssh'
+
+    def __init__(self, ip, username, password, connect_timeout=DEFAULT_CONNECT_TIMEOUT, command_timeout=DEFAULT_COMMAND_TIMEOUT,
+                 port=DEFAULT_SSH_PORT):
+        self.command_timeout = command_timeout
+        self.ssh = paramiko.SSHClient()
+        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            self.ssh.connect(ip, port=port, username=username, password=password, timeout=connect_timeout,
+                             banner_timeout=connect_timeout, auth_timeout=connect_timeout)
+            self.channel = self.ssh.invoke_shell(width=511)
+            match = self.read_until([ANY_PROMPT_PATTERN], bytearray(), time.monotonic() + connect_timeout)
+            self.prompt = prompt_pattern(match.group(1))
+            self.run('terminal length 0')  # Set terminal length to 0 for no pagination
+        except Exception:
+            self.ssh.close()
+            raise
+
+    def write(self, data):
+        self.channel.sendall(data)
+
+    def receive(self, timeout):
+        self.channel.settimeout(timeout)
+        try:
+            chunk = self.channel.recv(65536)
+        except socket.timeout:
+            return b''
+        if not chunk:
+            raise EOFError("SSH channel closed before the prompt came back")
+        return chunk
+
+    def close(self):
+        self.ssh.close()
+
+
+class TelnetSession(CliSession):
+    """One Telnet login; each command returns as soon as the device prompt comes back after it."""
+
+    transport = 'telnet'
+
+    def __init__(self, ip, username, password, connect_timeout=DEFAULT_CONNECT_TIMEOUT, command_timeout=DEFAULT_COMMAND_TIMEOUT,
+                 port=DEFAULT_TELNET_PORT):
+        self.command_timeout = command_timeout
+        self.tn = telnetlib.Telnet(ip, port, timeout=connect_timeout)
+        try:
+            self.prompt = self.login(username, password, time.monotonic() + connect_timeout)
+            self.run('terminal length 0')  # Set terminal length to 0 for no pagination
+        except Exception:
+            self.tn.close()
+            raise
+
+    def login(self, username, password, deadline):
+        """Answer the Username/Password prompts and return a pattern matching the device prompt."""
+        sent_username = sent_password = False
+        buffer = bytearray()
+        while True:
+            match = self.read_until([LOGIN_PATTERN, PASSWORD_PATTERN, ANY_PROMPT_PATTERN], buffer, deadline)
+            if match.re is ANY_PROMPT_PATTERN:
+                return prompt_pattern(match.group(1))
+            if match.re is LOGIN_PATTERN:
+                if sent_username:
+                    raise Exception("Telnet login rejected")
+                self.tn.write(username.encode('ascii') + b"\n")
+                sent_username = True
+            else:
+                if sent_password:
+                    raise Exception("Telnet login rejected")
+                self.tn.write(password.encode('ascii') + b"\n")
+                sent_password = True
+            buffer.clear()
+
+    def write(self, data):
+        self.tn.write(data)
+
+    def receive(self, timeout):
+        # One bounded recv per call, so the buffer grows linearly and the prompt, --More-- and deadline are checked
+        # after every chunk. telnetlib's own reads drain the socket into a queue grown by concatenation, which is
+        # quadratic on multi-megabyte outputs.
+        sock = self.tn.get_socket()
+        if not select.select([sock], [], [], timeout)[0]:
+            return b''
+        data = sock.recv(RECV_SIZE)
+        if not data:
+            raise EOFError("telnet connection closed")
+        start = 0 if self.tn.iacseq or self.tn.sb else data.find(telnetlib.IAC)
+        if start < 0:
+            # Plain text: drop NUL and XON as telnetlib does
+            return data.replace(telnetlib.theNULL, b'').replace(b'\x11', b'')
+        # Option negotiation (mostly around the login): telnetlib answers it and keeps any partial sequence
+        self.tn.rawq += data[start:]
+        self.tn.process_rawq()
+        cooked, self.tn.cookedq = self.tn.cookedq, b''
+        return data[:start].replace(telnetlib.theNULL, b'').replace(b'\x11', b'') + cooked
+
+    def close(self):
+        try:
+            self.tn.write(b"exit\n")
+        except OSError:
+            pass
+        self.tn.close()
+
+
+SESSIONS = {'ssh': SSHSession, 'telnet': TelnetSession}
+
+# Bad credentials are not worth retrying over another transport
+AUTHENTICATION_ERRORS = (paramiko.ssh_exception.AuthenticationException,) if paramiko else ()
+
+
+def collect(ip, username, password, commands, connect_timeout=DEFAULT_CONNECT_TIMEOUT, command_timeout=DEFAULT_COMMAND_TIMEOUT,
+            transport_cache=None, ssh_port=DEFAULT_SSH_PORT, telnet_port=DEFAULT_TELNET_PORT):
+    """Run commands on a switch over a single login. Returns (transport, [output per command]).
+
+    Without a transport cache SSH is tried first and Telnet is the fallback. With one, a switch that is known to be
+    Telnet-only goes straight to Telnet until its SSH re-probe is due. An SSH authentication failure is raised
+    straight away rather than retried over Telnet.
+    """
+    transports = transport_cache.transports_to_try(ip) if transport_cache else ['ssh', 'telnet']
+    ports = {'ssh': ssh_port, 'telnet': telnet_port}
+    for attempt, transport in enumerate(transports):
+        start = time.monotonic()
+        try:
+            with SESSIONS[transport](ip, username, password, connect_timeout, command_timeout, ports[transport]) as session:
+                outputs = session.run_commands(commands)
+            break
+        except AUTHENTICATION_ERRORS:
+            raise
+        except Exception as e:
+            if attempt + 1 == len(transports):
+                raise Exception(f"{transport.capitalize()} also failed for {ip} with error: {e}")
+            # If this transport fails, try the next one
+            print(f"{transport.upper()} failed for {ip}. Trying {transports[attempt + 1].capitalize()}...")
+
+    if transport_cache:
+        transport_cache.record(ip, transport, time.monotonic() - start, ssh_probed='ssh' in transports[:attempt])
+    return transport, outputs
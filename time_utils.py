@@ -0,0 +1,73 @@
+"""
+---------------------------------------------------------------
+Script Name: Time Utilities
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Shared timestamp formatting for convert_epoch.py, create_snapshot.py and BulkFetch-SwitchConfig.py.
+
+    Timezones come from the standard library's zoneinfo instead of pytz. zoneinfo is only imported the first time
+    a timezone is needed, and each timezone is resolved once and cached. format_epoch() memoizes its results per
+    minute (or per second, if the format shows seconds), so formatting many timestamps from the same minute, e.g.
+    every index created in one rotation, only does the conversion once.
+
+    benchmark_time_utils.py compares import time and throughput with the pytz version.
+
+Usage:
+    from time_utils import format_epoch
+    format_epoch(1686587400, '%Y-%m-%d_%I%M%p')    # '2023-06-12_1230PM' (US/Eastern by default)
+
+Requirements:
+    - Python 3.9+ (zoneinfo); on systems without an IANA tz database, the tzdata package
+---------------------------------------------------------------
+"""
+
+import functools
+import time
+
+DEFAULT_TIMEZONE = 'US/Eastern'
+# Directives that change within a minute; with any of them results are cached per second instead
+SECOND_DIRECTIVES = ('%S', '%T', '%X', '%c', '%s', '%r')
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name=DEFAULT_TIMEZONE):
+    """Return the tzinfo for an IANA timezone name, resolved once per name"""
+    if name == 'UTC':
+        from datetime import timezone
+        return timezone.utc
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(name)
+
+
+@functools.lru_cache(maxsize=None)
+def bucket_size(fmt):
+    """Seconds that share one formatted result, or None if the format shows sub-second precision"""
+    if '%f' in fmt:
+        return None
+    return 1 if any(directive in fmt for directive in SECOND_DIRECTIVES) else 60
+
+
+def format_seconds(seconds, fmt, timezone=DEFAULT_TIMEZONE):
+    """Format an epoch in seconds in the given timezone, without caching"""
+    from datetime import datetime
+    return datetime.fromtimestamp(seconds, get_timezone(timezone)).strftime(fmt)
+
+
+@functools.lru_cache(maxsize=65536)
+def format_bucket(bucket, step, fmt, timezone):
+    return format_seconds(bucket * step, fmt, timezone)
+
+
+def format_epoch(seconds, fmt, timezone=DEFAULT_TIMEZONE):
+    """Format an epoch in seconds in the given timezone, memoized per minute (or second) bucket"""
+    step = bucket_size(fmt)
+    if step is None:
+        return format_seconds(seconds, fmt, timezone)
+    return format_bucket(int(seconds // step), step, fmt, timezone)
+
+
+def format_now(fmt, timezone=DEFAULT_TIMEZONE):
+    """Format the current time in the given timezone"""
+    return format_epoch(time.time(), fmt, timezone)
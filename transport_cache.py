@@ -0,0 +1,91 @@
+"""
+---------------------------------------------------------------
+Script Name: Switch Transport Cache
+Author: Dan Clancey
+Date: 18-Oct-2026
+Version: 1.0
+Description:
+    Remembers, per switch, which transport (SSH or Telnet) last worked, when it worked and how long the fetch took.
+    The collectors use it to go straight to Telnet on switches that are known not to speak SSH, instead of waiting
+    for an SSH connect timeout on every run. SSH is re-probed on Telnet-only switches once the last probe is older
+    than the configured interval, so upgraded switches move back to SSH on their own.
+
+    The cache is a small JSON file, by default ~/configs/transport_cache.json (next to ~/configs/switches).
+
+Usage:
+    python transport_cache.py [--path CACHE_FILE]
+
+    Prints the cached transport for every switch.
+
+Requirements:
+    - Python 3.x
+---------------------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_PATH = '~/configs/transport_cache.json'
+DEFAULT_REPROBE_DAYS = 7
+
+
+class TransportCache:
+    """Thread-safe per-host record of the transport that last worked."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, reprobe_days=DEFAULT_REPROBE_DAYS):
+        self.path = os.path.expanduser(path)
+        self.reprobe_seconds = reprobe_days * 86400
+        self.lock = threading.Lock()
+        self.hosts = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as file:
+                self.hosts = json.load(file)
+
+    def transports_to_try(self, ip):
+        """Return the transports to attempt for a host, in order."""
+        with self.lock:
+            entry = self.hosts.get(ip)
+        if not entry or entry['transport'] == 'ssh':
+            return ['ssh', 'telnet']
+        if time.time() - entry.get('ssh_probed', 0) >= self.reprobe_seconds:
+            return ['ssh', 'telnet']
+        return ['telnet', 'ssh']
+
+    def record(self, ip, transport, seconds, ssh_probed=False):
+        """Record a successful fetch. ssh_probed marks that SSH was tried (and failed) on the way."""
+        now = time.time()
+        with self.lock:
+            entry = self.hosts.setdefault(ip, {})
+            entry['transport'] = transport
+            entry['checked'] = int(now)
+            entry['seconds'] = round(seconds, 2)
+            if transport == 'ssh' or ssh_probed:
+                entry['ssh_probed'] = int(now)
+
+    def save(self):
+        """Write the cache to disk atomically."""
+        with self.lock:
+            data = json.dumps(self.hosts, indent=2, sort_keys=True)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(data)
+        os.replace(temp_path, self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the cached transport for every switch.')
+    parser.add_argument('--path', default=DEFAULT_CACHE_PATH, help=f'Cache file (default: {DEFAULT_CACHE_PATH})')
+    args = parser.parse_args()
+
+    cache = TransportCache(args.path)
+    for ip, entry in sorted(cache.hosts.items()):
+        checked = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['checked']))
+        print(f"{ip:<16} {entry['transport']:<7} {entry['seconds']:>7.2f}s  last worked {checked}")
+
+
+if __name__ == '__main__':
+    main()